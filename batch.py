@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttbzrs_millionaire.services.document_service import DocumentService
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.llm_backends import StubBackend
+from ttbzrs_millionaire.services.llm_service import LLMService
+from ttbzrs_millionaire.services.scheduler_service import RequestScheduler
+
+
+def find_pdfs(directory: str, recursive: bool = False) -> List[str]:
+    """List PDF files under a directory in a stable order"""
+    found = []
+    if recursive:
+        for root, _, files in os.walk(directory):
+            found.extend(os.path.join(root, name) for name in files if name.lower().endswith('.pdf'))
+    else:
+        found = [os.path.join(directory, name) for name in os.listdir(directory)
+                 if name.lower().endswith('.pdf')]
+    return sorted(os.path.abspath(path) for path in found)
+
+
+def load_finished(output_path: str) -> Set[str]:
+    """Files already analyzed successfully in a previous run"""
+    finished = set()
+    if not os.path.exists(output_path):
+        return finished
+
+    with open(output_path, 'r') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run interrupted mid-write leaves a truncated last line
+                continue
+            if record.get('status') == 'success':
+                finished.add(record['file'])
+    return finished
+
+
+def extract_pdf(file_path: str, cache_dir: Optional[str] = None) -> Dict:
+    """Runs in a worker process so extraction is not bound by the GIL"""
+    if cache_dir is None:
+        return asyncio.run(DocumentService.read_pdf(file_path))
+    return asyncio.run(DocumentService(cache_dir).read_pdf_incremental(file_path))
+
+
+class BatchRunner:
+    def __init__(self, llm_service: LLMService, output_path: str, workers: int = 4,
+                 cache_dir: Optional[str] = None):
+        self.llm_service = llm_service
+        self.output_path = output_path
+        self.workers = workers
+        # With a cache directory, pages unchanged since a statement's last version are reused
+        self.documents = DocumentService(cache_dir) if cache_dir else None
+
+        self.completed = 0
+        self.failed = 0
+        self.completion_tokens = 0
+        self.started_at = None
+
+    async def run(self, files: List[str]) -> Dict:
+        self.started_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        # Bound documents held in memory between extraction and analysis
+        in_flight = asyncio.Semaphore(self.workers + self.llm_service.scheduler.max_concurrent)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, \
+                open(self.output_path, 'a') as output:
+
+            async def process(file_path: str):
+                async with in_flight:
+                    record = await self._process(loop, pool, file_path)
+                self._write(output, record)
+
+            await asyncio.gather(*(process(file_path) for file_path in files))
+
+        return self.summary()
+
+    async def _process(self, loop, pool, file_path: str) -> Dict:
+        started = time.monotonic()
+        try:
+            pdf_result = await loop.run_in_executor(
+                pool, extract_pdf, file_path, self.documents.cache_dir if self.documents else None
+            )
+        except Exception as e:
+            pdf_result = {'status': 'error', 'message': str(e)}
+
+        if pdf_result['status'] != 'success':
+            return {
+                'file': file_path,
+                'status': 'error',
+                'stage': 'extract',
+                'message': pdf_result['message'],
+                'timestamp': datetime.now().isoformat()
+            }
+
+        if self.documents is None:
+            analysis = await self.llm_service.analyze_document(
+                pdf_result['content'], job=file_path,
+                figures=DocumentService.figures_for_model(pdf_result['figures'])
+            )
+        else:
+            analysis = await self._analyze_incremental(file_path, pdf_result)
+        record = {
+            'file': file_path,
+            'status': analysis['status'],
+            'message': analysis['message'],
+            'characters': len(pdf_result['content']),
+            'figures': pdf_result['figures'],
+            'seconds': round(time.monotonic() - started, 3),
+            'timestamp': analysis['timestamp']
+        }
+        if 'pages' in pdf_result:
+            record['pages'] = len(pdf_result['pages'])
+            record['changed_pages'] = len(pdf_result['changed_pages'])
+        if analysis['status'] == 'success':
+            record['usage'] = analysis['usage']
+        else:
+            record['stage'] = 'analyze'
+        return record
+
+    async def _analyze_incremental(self, file_path: str, pdf_result: Dict) -> Dict:
+        if pdf_result['summary'] is not None:
+            # Same pages as last time: nothing to send to the model
+            return {
+                'status': 'success',
+                'message': pdf_result['summary'],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'eval_seconds': 0.0},
+                'timestamp': pdf_result['timestamp']
+            }
+        analysis = await self.llm_service.analyze_pages(
+            pdf_result['pages'], job=file_path, figures=DocumentService.figures_for_model(pdf_result['figures'])
+        )
+        if analysis['status'] == 'success':
+            await self.documents.save_analysis(pdf_result['source'], file_path, pdf_result['pages'],
+                                               analysis['notes'], analysis['message'])
+        return analysis
+
+    def _write(self, output, record: Dict):
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+        os.fsync(output.fileno())
+
+        if record['status'] == 'success':
+            self.completed += 1
+            self.completion_tokens += record['usage']['completion_tokens']
+        else:
+            self.failed += 1
+
+        stats = self.summary()
+        print(f"[{stats['completed'] + stats['failed']}] {record['status']}: {os.path.basename(record['file'])} "
+              f"({stats['docs_per_minute']:.1f} docs/min, {stats['tokens_per_second']:.1f} tokens/s)",
+              file=sys.stderr)
+
+    def summary(self) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'elapsed_seconds': round(elapsed, 3),
+            'docs_per_minute': self.completed / elapsed * 60,
+            'tokens_per_second': self.completion_tokens / elapsed,
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the advisor over a directory of PDFs without the GUI")
+    parser.add_argument("directory", help="Directory containing PDF statements")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Include PDFs in subdirectories")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 2,
+                        help="Processes used for PDF extraction")
+    parser.add_argument("-c", "--concurrency", type=int, default=2,
+                        help="Maximum concurrent model requests")
+    parser.add_argument("-m", "--model", default="llama3.2", help="Ollama model name")
+    parser.add_argument("--fast-model", help="Small model for per-chunk notes; summaries stay on --model")
+    parser.add_argument("--stub", action="store_true", help="Use the deterministic stub backend instead of Ollama")
+    parser.add_argument("--trace", help="Write a Chrome trace of the run to this file")
+    parser.add_argument("--cache-dir", help="Reuse pages unchanged since the last version of each statement, "
+                                            "cached in this directory")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+
+    files = find_pdfs(args.directory, args.recursive)
+    finished = load_finished(args.output)
+    pending = [file_path for file_path in files if file_path not in finished]
+    print(f"{len(files)} PDFs found, {len(files) - len(pending)} already done, {len(pending)} to process",
+          file=sys.stderr)
+
+    scheduler = RequestScheduler(max_concurrent=args.concurrency)
+    backend = StubBackend() if args.stub else None
+    llm_service = LLMService(args.model, scheduler=scheduler, backend=backend, fast_model=args.fast_model)
+    runner = BatchRunner(llm_service, args.output, workers=args.workers, cache_dir=args.cache_dir)
+    summary = await runner.run(pending)
+
+    print(json.dumps(summary), file=sys.stderr)
+    if args.trace:
+        tracer.export(args.trace)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
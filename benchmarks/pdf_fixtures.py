@@ -0,0 +1,65 @@
+import random
+from typing import Iterable, List
+
+STATEMENT_LINES = [
+    "Account balance as of statement date: ${amount}",
+    "Dividend reinvested in index ETF: ${amount}",
+    "Management fee 0.{rate}% charged on portfolio value",
+    "Mortgage principal remaining ${amount} at {rate}.25% APR",
+    "Transfer to high-yield savings account ${amount}",
+    "Estimated tax withholding on lump sum payout ${amount}",
+]
+
+
+def statement_page(rng: random.Random, lines: int) -> List[str]:
+    return [
+        rng.choice(STATEMENT_LINES).format(amount=f"{rng.randint(100, 999_999):,}.{rng.randint(0, 99):02d}",
+                                           rate=rng.randint(1, 9))
+        for _ in range(lines)
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_statement_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0,
+                        revised_pages: Iterable[int] = ()):
+    """Write a text PDF of synthetic statement lines that PyPDF2 can extract.
+
+    Pages listed in ``revised_pages`` get different lines while every other
+    page stays identical, like next month's version of the same statement.
+    """
+    rng = random.Random(seed)
+    revised_pages = set(revised_pages)
+    offsets = []
+    out = bytearray(b"%PDF-1.4\n")
+
+    def add(obj: bytes):
+        offsets.append(len(out))
+        out.extend(f"{len(offsets)} 0 obj\n".encode() + obj + b"\nendobj\n")
+
+    # Objects 1-3 are the catalog, page tree and font; each page is a page/content pair
+    page_ids = [4 + 2 * index for index in range(pages)]
+    add(b"<< /Type /Catalog /Pages 2 0 R >>")
+    add(f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {pages} >>".encode())
+    add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for index, page_id in enumerate(page_ids):
+        lines = statement_page(rng, lines_per_page)
+        if index in revised_pages:
+            lines = statement_page(random.Random(f"{seed}-revised-{index}"), lines_per_page)
+        text = ' T* '.join(f"({_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 760 Td {text} ET".encode('latin-1')
+        add(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        add(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    xref = len(out)
+    out.extend(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.extend(f"{offset:010d} 00000 n \n".encode())
+    out.extend(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+    with open(path, 'wb') as file:
+        file.write(out)
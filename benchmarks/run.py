@@ -0,0 +1,454 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ttbzrs_millionaire.benchmarks.pdf_fixtures import statement_page, write_statement_pdf
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.document_service import DocumentService
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.llm_backends import StubBackend
+from ttbzrs_millionaire.services.llm_service import LLMService
+from ttbzrs_millionaire.services.messages import ChatMessage
+from ttbzrs_millionaire.services.service_host import ServiceHost
+from ttbzrs_millionaire.services.session_service import SessionService
+from ttbzrs_millionaire.ui.events import StreamPieceEvent
+from ttbzrs_millionaire.ui.formatting import format_financial_terms, parse_markdown
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def measure(function: Callable, repeat: int, warmup: int = 1, items: int = None, unit: str = None) -> Dict:
+    """Time a callable; when items is given also report items per second"""
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+
+    result = {
+        'repeat': repeat,
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+    if items:
+        result['throughput'] = items / result['median']
+        result['unit'] = unit
+    return result
+
+
+def sample_messages(count: int) -> List[str]:
+    rng = random.Random(42)
+    messages = []
+    for index in range(count):
+        lines = statement_page(rng, 6)
+        messages.append(
+            f"Option {index}: consider a **diversified** portfolio.\n"
+            + '\n'.join(f"- {line}" for line in lines)
+            + "\n```\nstocks 60%\nbonds 40%\n```\nKeep an *emergency fund* and review your `IRA`."
+        )
+    return messages
+
+
+@benchmark("read_pdf")
+def bench_read_pdf(args) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pdf_pages:
+            path = os.path.join(directory, f"statement_{pages}.pdf")
+            write_statement_pdf(path, pages)
+            results[f"{pages}_pages"] = measure(
+                lambda: asyncio.run(DocumentService.read_pdf(path)),
+                repeat=args.repeat, items=pages, unit="pages/s"
+            )
+            results[f"{pages}_pages"]['bytes'] = os.path.getsize(path)
+    return results
+
+
+@benchmark("service_host")
+def bench_service_host(args) -> Dict:
+    """Main-thread frame lateness while a large PDF is read in a thread vs. in the service worker"""
+    frame = 1 / 60
+
+    def frames_during(work: Callable) -> Dict:
+        # Tick like a 60 fps UI loop on this thread while the work runs on another
+        worker = threading.Thread(target=work)
+        lateness = []
+        started = time.perf_counter()
+        worker.start()
+        expected = time.perf_counter() + frame
+        while worker.is_alive():
+            time.sleep(max(0.0, expected - time.perf_counter()))
+            now = time.perf_counter()
+            lateness.append(max(0.0, now - expected))
+            expected = now + frame
+        worker.join()
+        lateness.sort()
+        return {
+            'seconds': time.perf_counter() - started,
+            'frames': len(lateness),
+            'dropped_frames': sum(1 for late in lateness if late > frame),
+            'p95_late_ms': lateness[min(len(lateness) - 1, int(len(lateness) * 0.95))] * 1000 if lateness else 0.0,
+            'max_late_ms': lateness[-1] * 1000 if lateness else 0.0,
+        }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "statement.pdf")
+        write_statement_pdf(path, args.host_pdf_pages)
+        in_thread = frames_during(lambda: asyncio.run(
+            DocumentService(os.path.join(directory, "thread_cache")).read_pdf_incremental(path)))
+
+        host = ServiceHost({'cache_dir': os.path.join(directory, "host_cache"), 'stub': {}})
+        host.start()
+        try:
+            # Wait for the worker to come up so its start-up is not counted
+            asyncio.run(host.call('tracer.stats'))
+            hosted = frames_during(lambda: asyncio.run(host.call('documents.read_pdf_incremental', path)))
+        finally:
+            host.stop()
+    return {'pages': args.host_pdf_pages, 'in_thread': in_thread, 'service_host': hosted}
+
+
+@benchmark("format_financial_terms")
+def bench_format(args) -> Dict:
+    messages = sample_messages(args.messages)
+    return measure(lambda: [format_financial_terms(message) for message in messages],
+                   repeat=args.repeat, items=len(messages), unit="messages/s")
+
+
+@benchmark("parse_markdown")
+def bench_parse(args) -> Dict:
+    messages = [format_financial_terms(message) for message in sample_messages(args.messages)]
+    return measure(lambda: [parse_markdown(message, "#ff1493") for message in messages],
+                   repeat=args.repeat, items=len(messages), unit="messages/s")
+
+
+@benchmark("render_chat_message")
+def bench_render(args) -> Dict:
+    """Full ConversationTab.add_message into a real textbox; needs a display"""
+    try:
+        import customtkinter as ctk
+        from ttbzrs_millionaire.ui.conversation_tab import ConversationTab
+        root = ctk.CTk()
+    except Exception as e:
+        return {'skipped': f"No display available: {e}"}
+
+    try:
+        messages = [format_financial_terms(message) for message in sample_messages(args.messages)]
+        tab = ConversationTab("bench", root)
+        tab.attach()
+
+        def render():
+            tab.clear()
+            for message in messages:
+                tab.add_message("Assistant", message)
+            root.update_idletasks()
+
+        return measure(render, repeat=args.repeat, items=len(messages), unit="messages/s")
+    finally:
+        root.destroy()
+
+
+@benchmark("session_io")
+def bench_sessions(args) -> Dict:
+    messages = [
+        ChatMessage('You' if index % 2 else 'Assistant', message)
+        for index, message in enumerate(sample_messages(args.session_messages))
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        service = SessionService(directory)
+        save = measure(lambda: asyncio.run(service.save_session(messages, "bench.json")),
+                       repeat=args.repeat, items=len(messages), unit="messages/s")
+        save['bytes'] = os.path.getsize(os.path.join(directory, "bench.json"))
+        load = measure(lambda: asyncio.run(service.load_session(os.path.join(directory, "bench.json"))),
+                       repeat=args.repeat, items=len(messages), unit="messages/s")
+        load_records = measure(
+            lambda: asyncio.run(service.load_session(os.path.join(directory, "bench.json"), records=True)),
+            repeat=args.repeat, items=len(messages), unit="messages/s"
+        )
+    return {'save_session': save, 'load_session': load, 'load_session_records': load_records}
+
+
+@benchmark("message_memory")
+def bench_message_memory(args) -> Dict:
+    """Memory held by a session journal and by queued UI events: dicts vs. slotted records"""
+    texts = [message for message in sample_messages(100)]
+    senders = ['You', 'Assistant']
+
+    def journal_dicts():
+        return [
+            {'sender': senders[index % 2], 'message': texts[index % len(texts)],
+             'timestamp': datetime.now().isoformat()}
+            for index in range(args.memory_messages)
+        ]
+
+    def journal_records():
+        return [ChatMessage(senders[index % 2], texts[index % len(texts)]) for index in range(args.memory_messages)]
+
+    def event_dicts():
+        return [{'type': 'stream_piece', 'tab': 'tab-1', 'text': texts[index % len(texts)]}
+                for index in range(args.memory_messages)]
+
+    def event_records():
+        return [StreamPieceEvent(texts[index % len(texts)], tab='tab-1') for index in range(args.memory_messages)]
+
+    def allocated(build: Callable) -> Dict:
+        # Message texts are shared by both variants, so only the per-message overhead is counted
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        built = build()
+        seconds = time.perf_counter() - started
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del built
+        return {'bytes': size, 'bytes_per_message': size / args.memory_messages, 'build_seconds': seconds}
+
+    results = {'messages': args.memory_messages}
+    for name, dicts, records in (('journal', journal_dicts, journal_records), ('events', event_dicts, event_records)):
+        before, after = allocated(dicts), allocated(records)
+        results[name] = {'dicts': before, 'records': after, 'reduction': 1 - after['bytes'] / before['bytes']}
+    return results
+
+
+@benchmark("time_to_first_token")
+def bench_ttft(args) -> Dict:
+    backend = StubBackend(token_rate=args.stub_token_rate, prefill_rate=args.stub_prefill_rate,
+                          base_latency=args.stub_latency)
+    service = LLMService(backend=backend)
+    context = '\n'.join(sample_messages(10))
+    first_tokens, totals = [], []
+
+    async def turn():
+        started = time.perf_counter()
+        first = None
+        async for _ in service.stream_response("Should I pay off my mortgage first?", context):
+            if first is None:
+                first = time.perf_counter() - started
+        first_tokens.append(first)
+        totals.append(time.perf_counter() - started)
+
+    for _ in range(args.repeat):
+        asyncio.run(turn())
+
+    return {
+        'repeat': args.repeat,
+        'ttft_median': statistics.median(first_tokens),
+        'ttft_max': max(first_tokens),
+        'total_median': statistics.median(totals),
+        'stub': {'token_rate': backend.token_rate, 'prefill_rate': backend.prefill_rate,
+                 'base_latency': backend.base_latency},
+    }
+
+
+@benchmark("prefill_reuse")
+def bench_prefill_reuse(args) -> Dict:
+    """Multi-turn chat against a prompt-caching stub: flattened context vs. append-only conversation"""
+    questions = [message.split('\n')[0] + " What should I do?" for message in sample_messages(args.turns)]
+
+    def run(use_conversation: bool) -> Dict:
+        backend = StubBackend(token_rate=args.stub_token_rate, prefill_rate=args.stub_prefill_rate,
+                              base_latency=args.stub_latency, cache_prompt=True)
+        service = LLMService(backend=backend)
+        conversation = Conversation()
+        history = []
+        turns = []
+
+        async def turn(question: str):
+            started = time.perf_counter()
+            first = None
+            if use_conversation:
+                stream = service.stream_response(question, conversation=conversation)
+            else:
+                stream = service.stream_response(question, '\n'.join(history))
+            pieces = []
+            async for piece in stream:
+                if first is None:
+                    first = time.perf_counter() - started
+                pieces.append(piece)
+            history.extend([f"You: {question}", f"Assistant: {''.join(pieces)}"])
+            turns.append({
+                'ttft': first,
+                'prefill_tokens': tracer.latest('llm.prefill_tokens_evaluated'),
+                'prefill_seconds_saved': tracer.latest('llm.prefill_seconds_saved'),
+            })
+
+        for question in questions:
+            asyncio.run(turn(question))
+        return {
+            'ttft_median': statistics.median(turn['ttft'] for turn in turns),
+            'last_turn_ttft': turns[-1]['ttft'],
+            'prefill_tokens': [turn['prefill_tokens'] for turn in turns],
+            'prefill_seconds_saved': [round(turn['prefill_seconds_saved'], 4) for turn in turns],
+        }
+
+    return {'turns': args.turns, 'flattened': run(False), 'conversation': run(True)}
+
+
+@benchmark("incremental_reanalysis")
+def bench_incremental(args) -> Dict:
+    """Next month's statement with a few revised pages: full vs. incremental re-analysis"""
+    pages = args.pdf_pages[0]
+    revised = range(0, pages, max(1, pages // args.revised_pages))[:args.revised_pages]
+    backend = StubBackend(sleep=False)
+    service = LLMService(backend=backend)
+
+    async def analyze(documents: DocumentService, path: str) -> Dict:
+        started = time.perf_counter()
+        pdf = await documents.read_pdf_incremental(path, source="statement")
+        extracted = time.perf_counter() - started
+        analysis = await service.analyze_pages(pdf['pages'])
+        await documents.save_analysis(pdf['source'], path, pdf['pages'], analysis['notes'], analysis['message'])
+        return {
+            'extract_seconds': extracted,
+            'pages_extracted': len(pdf['changed_pages']),
+            'pages_analyzed': analysis['analyzed_pages'],
+            'prompt_tokens': analysis['usage']['prompt_tokens'],
+            'completion_tokens': analysis['usage']['completion_tokens'],
+        }
+
+    with tempfile.TemporaryDirectory() as directory:
+        last_month = os.path.join(directory, "statement_05.pdf")
+        this_month = os.path.join(directory, "statement_06.pdf")
+        write_statement_pdf(last_month, pages)
+        write_statement_pdf(this_month, pages, revised_pages=revised)
+
+        full = asyncio.run(analyze(DocumentService(os.path.join(directory, "empty_cache")), this_month))
+        documents = DocumentService(os.path.join(directory, "cache"))
+        asyncio.run(analyze(documents, last_month))
+        incremental = asyncio.run(analyze(documents, this_month))
+
+    return {'pages': pages, 'revised_pages': len(revised), 'full': full, 'incremental': incremental}
+
+
+@benchmark("extract_figures")
+def bench_extract_figures(args) -> Dict:
+    """Local figure extraction and summary, and the prompt it saves against sending the text"""
+    rng = random.Random(7)
+    results = {}
+    for pages in args.pdf_pages:
+        text = ['\n'.join(statement_page(rng, 40)) for _ in range(pages)]
+        results[f"{pages}_pages"] = measure(
+            lambda: DocumentService.summarize_figures(DocumentService.extract_figures(text)),
+            repeat=args.repeat, items=pages, unit="pages/s"
+        )
+
+    text = ['\n'.join(statement_page(rng, 40)) for _ in range(args.pdf_pages[0])]
+    figures = DocumentService.figures_for_model(DocumentService.summarize_figures(DocumentService.extract_figures(text)))
+    service = LLMService(backend=StubBackend(sleep=False))
+    from_text = asyncio.run(service.analyze_document('\n'.join(text)))
+    from_figures = asyncio.run(service.analyze_document('\n'.join(text), figures=figures))
+    results['prompt_tokens'] = {
+        'text': from_text['usage']['prompt_tokens'],
+        'figures': from_figures['usage']['prompt_tokens'],
+    }
+    return results
+
+
+def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    """Map dotted benchmark paths to their headline timing for comparisons"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if not isinstance(value, dict):
+            continue
+        for metric in ('median', 'ttft_median'):
+            if metric in value:
+                flat[f"{path}.{metric}"] = value[metric]
+        flat.update(flatten(value, path + "."))
+    return flat
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print timing ratios against a baseline report, returning regressions"""
+    current, previous = flatten(report['results']), flatten(baseline['results'])
+    regressions = []
+    for path in sorted(current):
+        if path not in previous or not previous[path]:
+            continue
+        ratio = current[path] / previous[path]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(path)
+        print(f"{path:55s} {previous[path]:10.4f}s -> {current[path]:10.4f}s  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite")
+    parser.add_argument("-o", "--output", default="benchmark_report.json", help="JSON report to write")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Run a subset of benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per benchmark")
+    parser.add_argument("--pdf-pages", type=int, nargs="+", default=[100, 300], help="PDF sizes to extract")
+    parser.add_argument("--host-pdf-pages", type=int, default=500, help="PDF size read while measuring frames")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per formatting/rendering run")
+    parser.add_argument("--memory-messages", type=int, default=100_000, help="Messages per memory comparison")
+    parser.add_argument("--session-messages", type=int, default=10_000, help="Messages per saved session")
+    parser.add_argument("--revised-pages", type=int, default=5, help="Pages changed between statement versions")
+    parser.add_argument("--turns", type=int, default=8, help="Chat turns per prefill reuse run")
+    parser.add_argument("--stub-token-rate", type=float, default=200.0, help="Stub generation tokens/s")
+    parser.add_argument("--stub-prefill-rate", type=float, default=2000.0, help="Stub prefill tokens/s")
+    parser.add_argument("--stub-latency", type=float, default=0.02, help="Stub fixed latency in seconds")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown ratio counted as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        },
+        'results': {},
+    }
+
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        report['results'][name] = BENCHMARKS[name](args)
+
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
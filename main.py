@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import customtkinter as ctk
 import os
@@ -9,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ttbzrs_millionaire.ui.splash_screen import SplashScreen
 from ttbzrs_millionaire.ui.main_window import MainWindow
 
-async def main():
+async def main(args):
     # Set appearance mode and default color theme
     ctk.set_appearance_mode("dark")
     ctk.set_default_color_theme("blue")
@@ -19,7 +20,7 @@ async def main():
     root.withdraw()  # Hide the root window
     
     # Create main window but don't show it yet
-    app = MainWindow()
+    app = MainWindow(fast_model=args.fast_model)
     app.withdraw()
     
     # Show splash screen
@@ -37,4 +38,6 @@ def transition_to_main(splash, app):
     app.deiconify()  # Show main window
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Run the advisor desktop app")
+    parser.add_argument("--fast-model", help="Small model for simple turns; enables model routing")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.llm_backends import StubBackend
+from ttbzrs_millionaire.services.llm_service import LLMService
+from ttbzrs_millionaire.services.scheduler_service import RequestScheduler
+from ttbzrs_millionaire.services.session_service import SessionService
+
+# Summary metrics compared against a baseline, and whether lower is better
+COMPARED_METRICS = [
+    ('latency.p50', True),
+    ('latency.p95', True),
+    ('time_to_first_token.p50', True),
+    ('time_to_first_token.p95', True),
+    ('tokens_per_second.p50', False),
+    ('turns_per_second', False),
+]
+
+
+def find_sessions(paths: List[str]) -> List[str]:
+    """Session files given directly or found in the given directories, in a stable order"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.json'))
+        else:
+            found.append(path)
+    return sorted(os.path.abspath(path) for path in found)
+
+
+async def load_user_turns(files: List[str], max_turns: Optional[int] = None) -> List[Dict]:
+    """The user messages of every saved session, skipping files that fail to load"""
+    if not files:
+        return []
+    sessions = []
+    service = SessionService(os.path.dirname(files[0]))
+    for file_path in files:
+        result = await service.load_session(file_path, records=True)
+        if result['status'] != 'success':
+            print(f"Skipping {file_path}: {result['message']}", file=sys.stderr)
+            continue
+        turns = [entry.message for entry in result['data'] if entry.sender == 'You']
+        if turns:
+            sessions.append({'file': file_path, 'turns': turns[:max_turns]})
+    return sessions
+
+
+def summarize(values: List[float]) -> Optional[Dict]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        'max': ordered[-1],
+    }
+
+
+class ReplayRunner:
+    """Replays the user turns of saved sessions against an LLMService.
+
+    Each session is replayed in order on its own conversation, so prompt
+    prefixes grow as they did for the real user. Sessions arrive as a
+    Poisson process at ``rate`` sessions per second, or, without a rate,
+    ``users`` sessions run back to back at a time. Model requests share the
+    service's scheduler, so time spent queued for a slot counts as latency.
+    """
+
+    def __init__(self, llm_service: LLMService, rate: float = 0.0, users: int = 1,
+                 think_time: float = 0.0, seed: int = 0):
+        self.llm_service = llm_service
+        self.rate = rate
+        self.users = users
+        self.think_time = think_time
+        self.random = random.Random(seed)
+        self.turns: List[Dict] = []
+        self.started_at = None
+
+    async def run(self, sessions: List[Dict]) -> Dict:
+        self.started_at = time.perf_counter()
+        if self.rate > 0:
+            tasks = []
+            for index, session in enumerate(sessions):
+                tasks.append(asyncio.create_task(self.replay_session(index, session)))
+                await asyncio.sleep(self.random.expovariate(self.rate))
+            await asyncio.gather(*tasks)
+        else:
+            pending = iter(enumerate(sessions))
+
+            async def user():
+                for index, session in pending:
+                    await self.replay_session(index, session)
+
+            await asyncio.gather(*(user() for _ in range(max(1, self.users))))
+        return self.summary()
+
+    async def replay_session(self, index: int, session: Dict):
+        conversation = Conversation()
+        for turn, message in enumerate(session['turns']):
+            if turn and self.think_time:
+                await asyncio.sleep(self.random.expovariate(1 / self.think_time))
+            record = await self.replay_turn(message, conversation)
+            record.update(session=index, file=os.path.basename(session['file']), turn=turn)
+            self.turns.append(record)
+            print(f"[{len(self.turns)}] session {index} turn {turn}: {record['status']} "
+                  f"{record['latency']:.2f}s", file=sys.stderr)
+            if record['status'] != 'success':
+                # Later turns build on this reply; without it the rest of the session is not comparable
+                break
+
+    async def replay_turn(self, message: str, conversation: Conversation) -> Dict:
+        started = time.perf_counter()
+        first_piece = None
+        pieces = 0
+        try:
+            # Offline answers would look like very fast turns; count an outage as errors instead
+            async for piece in self.llm_service.stream_response(message, conversation=conversation, degrade=False):
+                if first_piece is None and piece:
+                    first_piece = time.perf_counter()
+                pieces += 1
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'offset': started - self.started_at,
+                'latency': time.perf_counter() - started,
+            }
+        finished = time.perf_counter()
+        generating = finished - first_piece if first_piece is not None else 0.0
+        return {
+            'status': 'success',
+            'offset': started - self.started_at,
+            'latency': finished - started,
+            'time_to_first_token': (first_piece or finished) - started,
+            # Ollama streams one token per piece
+            'tokens': pieces,
+            'tokens_per_second': pieces / generating if generating > 0 else None,
+            'prompt_characters': len(message),
+        }
+
+    def summary(self) -> Dict:
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        succeeded = [turn for turn in self.turns if turn['status'] == 'success']
+        errors = len(self.turns) - len(succeeded)
+        return {
+            'turns': len(self.turns),
+            'errors': errors,
+            'error_rate': errors / len(self.turns) if self.turns else 0.0,
+            'elapsed_seconds': round(elapsed, 3),
+            'turns_per_second': len(succeeded) / elapsed,
+            'tokens': sum(turn['tokens'] for turn in succeeded),
+            'latency': summarize([turn['latency'] for turn in succeeded]),
+            'time_to_first_token': summarize([turn['time_to_first_token'] for turn in succeeded]),
+            'tokens_per_second': summarize([turn['tokens_per_second'] for turn in succeeded
+                                            if turn['tokens_per_second'] is not None]),
+        }
+
+
+def metric(summary: Dict, path: str) -> Optional[float]:
+    value = summary
+    for key in path.split('.'):
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(report: Dict, baseline: Dict, threshold: float, error_threshold: float) -> List[str]:
+    """Print summary metrics against a baseline report, returning regressions"""
+    current, previous = report['summary'], baseline['summary']
+    regressions = []
+    for path, lower_is_better in COMPARED_METRICS:
+        now, before = metric(current, path), metric(previous, path)
+        if now is None or not before:
+            continue
+        ratio = now / before
+        worse = ratio > 1 + threshold if lower_is_better else ratio < 1 - threshold
+        if worse:
+            regressions.append(path)
+        print(f"{path:28s} {before:10.4f} -> {now:10.4f}  x{ratio:5.2f}{'  REGRESSION' if worse else ''}")
+
+    worse = current['error_rate'] - previous['error_rate'] > error_threshold
+    if worse:
+        regressions.append('error_rate')
+    print(f"{'error_rate':28s} {previous['error_rate']:10.2%} -> {current['error_rate']:10.2%}"
+          f"{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay saved sessions against the model to measure latency")
+    parser.add_argument("sessions", nargs="+", help="Session files or directories of them")
+    parser.add_argument("-o", "--output", default="replay_report.json", help="JSON report to write")
+    parser.add_argument("-c", "--concurrency", type=int, default=2, help="Maximum concurrent model requests")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Session arrivals per second (Poisson); 0 replays --users sessions at a time")
+    parser.add_argument("--users", type=int, default=2, help="Sessions replayed at a time when --rate is 0")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between a user's turns")
+    parser.add_argument("--max-turns", type=int, help="Replay at most this many user turns per session")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the whole set of sessions this many times")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for arrival and think times")
+    parser.add_argument("-m", "--model", default="llama3.2", help="Ollama model name")
+    parser.add_argument("--fast-model", help="Route simple turns to this small model")
+    parser.add_argument("--ollama-host", help="Ollama server URL, e.g. http://gpu-box:11434")
+    parser.add_argument("--stub", action="store_true", help="Use the deterministic stub backend instead of Ollama")
+    parser.add_argument("--stub-token-rate", type=float, default=50.0, help="Stub generation tokens/s")
+    parser.add_argument("--stub-prefill-rate", type=float, default=500.0, help="Stub prefill tokens/s")
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="Stub fixed latency in seconds")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--error-threshold", type=float, default=0.01,
+                        help="Error rate increase counted as a regression")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+
+    files = find_sessions(args.sessions)
+    sessions = await load_user_turns(files, args.max_turns) * args.repeat
+    print(f"{len(files)} session files, {sum(len(session['turns']) for session in sessions)} user turns to replay",
+          file=sys.stderr)
+    if not sessions:
+        return 1
+
+    backend = None
+    if args.stub:
+        backend = StubBackend(token_rate=args.stub_token_rate, prefill_rate=args.stub_prefill_rate,
+                              base_latency=args.stub_latency, cache_prompt=True)
+    llm_service = LLMService(args.model, scheduler=RequestScheduler(max_concurrent=args.concurrency),
+                             host=args.ollama_host, backend=backend, fast_model=args.fast_model)
+    runner = ReplayRunner(llm_service, rate=args.rate, users=args.users, think_time=args.think_time,
+                          seed=args.seed)
+    summary = await runner.run(sessions)
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                    'cpus': os.cpu_count()},
+        'config': {
+            'model': args.model,
+            'fast_model': args.fast_model,
+            'backend': 'stub' if args.stub else (args.ollama_host or 'ollama'),
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'users': args.users,
+            'think_time': args.think_time,
+            'sessions': len(sessions),
+        },
+        'summary': summary,
+        'turns': runner.turns,
+    }
+    if llm_service.router is not None:
+        report['router'] = llm_service.router.stats()
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(json.dumps(summary), file=sys.stderr)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.threshold, args.error_threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions", file=sys.stderr)
+            return 1
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
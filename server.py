@@ -0,0 +1,415 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.document_service import DocumentService
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.llm_backends import StubBackend
+from ttbzrs_millionaire.services.llm_service import LLMService
+from ttbzrs_millionaire.services.messages import ChatMessage
+from ttbzrs_millionaire.services.resilience import DegradedAnswer
+from ttbzrs_millionaire.services.scheduler_service import RequestScheduler
+from ttbzrs_millionaire.services.session_service import SessionService
+
+SAFE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+MAX_BODY = 64 * 1024 * 1024
+
+STATUS_TEXT = {
+    200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path.rstrip('/') or '/'
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        try:
+            payload = json.loads(self.body)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return payload
+
+    @property
+    def client_id(self) -> str:
+        client_id = self.headers.get('x-client-id', 'default')
+        if not SAFE_ID.match(client_id):
+            raise HTTPError(400, "X-Client-Id must be 1-64 letters, digits, '-' or '_'")
+        return client_id
+
+
+class AdvisorServer:
+    """Serves the advisor services over HTTP without the GUI.
+
+    All clients share one LLMService, and therefore one connection pool and
+    one scheduler. Sessions are stored per client under
+    ``storage_dir/<X-Client-Id>`` so clients never see each other's data.
+    """
+
+    def __init__(self, llm_service: LLMService, storage_dir: str = "sessions"):
+        self.llm_service = llm_service
+        self.storage_dir = storage_dir
+        self._session_services: Dict[str, SessionService] = {}
+        # (client, session) -> [lock, holders and waiters]; dropped when nobody needs the lock
+        self._session_locks: Dict[Tuple[str, str], List] = {}
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Advisor API listening on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {'status': 'error', 'message': str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                try:
+                    keep_alive = await self.dispatch(request, writer, keep_alive) and keep_alive
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {'status': 'error', 'message': str(e)}, keep_alive)
+                except Exception as e:
+                    await self._send_json(writer, 500, {'status': 'error', 'message': str(e)}, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: Request, writer: asyncio.StreamWriter, keep_alive: bool) -> bool:
+        """Route a request; returns False when the connection must be closed"""
+        segments = [segment for segment in request.path.split('/') if segment]
+
+        if segments == ['health'] and request.method == 'GET':
+            await self._send_json(writer, 200, {
+                'status': 'success',
+                'scheduler': self.llm_service.scheduler.stats(),
+                'backend': self.llm_service.breaker.stats(),
+                'timestamp': datetime.now().isoformat()
+            }, keep_alive)
+            return True
+
+        if segments == ['stats'] and request.method == 'GET':
+            stats = tracer.stats()
+            if self.llm_service.router is not None:
+                stats['router'] = self.llm_service.router.stats()
+            await self._send_json(writer, 200, dict(stats, status='success'), keep_alive)
+            return True
+
+        if segments == ['router'] and request.method == 'POST':
+            await self._send_json(writer, *self.handle_router(request), keep_alive)
+            return True
+
+        if segments == ['trace'] and request.method == 'GET':
+            await self._send_json(writer, 200, tracer.chrome_trace(), keep_alive)
+            return True
+
+        if segments == ['chat'] and request.method == 'POST':
+            return await self.handle_chat(request, writer, keep_alive)
+
+        if segments == ['documents'] and request.method == 'POST':
+            await self._send_json(writer, 200, await self.handle_document(request), keep_alive)
+            return True
+
+        if segments and segments[0] == 'sessions' and len(segments) <= 2:
+            status, body = await self.handle_sessions(request, segments[1] if len(segments) == 2 else None)
+            await self._send_json(writer, status, body, keep_alive)
+            return True
+
+        if segments in (['health'], ['stats'], ['trace'], ['chat'], ['documents'], ['router']):
+            raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+        raise HTTPError(404, f"No route for {request.path}")
+
+    async def handle_chat(self, request: Request, writer: asyncio.StreamWriter, keep_alive: bool) -> bool:
+        payload = request.json()
+        message = payload.get('message')
+        message = message.strip() if isinstance(message, str) else ''
+        if not message:
+            raise HTTPError(400, "'message' is required")
+        session_id = self._session_id(payload.get('session_id') or 'default')
+        stream = payload.get('stream', request.query.get('stream') == '1')
+        route = payload.get('route')
+        if route is not None and (not isinstance(route, str) or self.llm_service.router is None
+                                  or route not in self.llm_service.router.models):
+            raise HTTPError(400, "'route' must be 'fast' or 'full' and needs the server started with --fast-model")
+
+        sessions = self._sessions(request.client_id)
+        async with self._session_lock(request.client_id, session_id):
+            history = await self._load_history(sessions, session_id)
+            # Rebuilt identically every turn, so the backend's cached prefix still matches
+            conversation = Conversation.from_history(history)
+
+            if not stream:
+                response = await self.llm_service.get_response(message, conversation=conversation, route=route)
+                # An outage reply is not part of the conversation the model will see next time
+                if response['status'] == 'success' and not response.get('degraded'):
+                    await self._append(sessions, session_id, history, message, response['message'])
+                await self._send_json(writer, 200 if response['status'] == 'success' else 500,
+                                      dict(response, session_id=session_id), keep_alive)
+                return True
+
+            # Server-sent events: one event per generated piece, then a final done event
+            writer.write(self._head(200, {
+                'Content-Type': 'text/event-stream',
+                'Cache-Control': 'no-cache',
+                'Connection': 'close',
+            }))
+            pieces = []
+            degraded = False
+            try:
+                async for piece in self.llm_service.stream_response(message, conversation=conversation, route=route):
+                    degraded = degraded or isinstance(piece, DegradedAnswer)
+                    pieces.append(piece)
+                    data = {'content': piece, 'degraded': True} if degraded else {'content': piece}
+                    writer.write(f"data: {json.dumps(data)}\n\n".encode())
+                    await writer.drain()
+            except ConnectionError:
+                raise
+            except Exception as e:
+                writer.write(f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n".encode())
+            else:
+                if not degraded:
+                    await self._append(sessions, session_id, history, message, ''.join(pieces))
+                done = {'session_id': session_id, 'degraded': True} if degraded else {'session_id': session_id}
+                writer.write(f"event: done\ndata: {json.dumps(done)}\n\n".encode())
+            await writer.drain()
+            return False
+
+    def handle_router(self, request: Request) -> Tuple[int, Dict]:
+        """Set or clear the manual model override: {"override": "fast" | "full" | null}"""
+        router = self.llm_service.router
+        if router is None:
+            raise HTTPError(400, "Routing is off; start the server with --fast-model")
+        override = request.json().get('override')
+        if override is not None and not isinstance(override, str):
+            raise HTTPError(400, "'override' must be 'fast', 'full' or null")
+        try:
+            router.set_override(override)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, {'status': 'success', 'router': router.stats(), 'timestamp': datetime.now().isoformat()}
+
+    async def handle_document(self, request: Request) -> Dict:
+        if not request.body:
+            raise HTTPError(400, "Request body must contain the PDF file")
+
+        # PyPDF2 wants a file and is CPU bound, so keep it off the event loop
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as file:
+            file.write(request.body)
+        try:
+            pdf_result = await DocumentService.read_pdf(file.name)
+        finally:
+            os.remove(file.name)
+
+        if pdf_result['status'] != 'success':
+            raise HTTPError(400, f"Failed to load PDF: {pdf_result['message']}")
+
+        name = request.query.get('name', 'upload.pdf')
+        analysis = await self.llm_service.analyze_document(
+            pdf_result['content'], job=f"{request.client_id}/{name}",
+            figures=DocumentService.figures_for_model(pdf_result['figures'])
+        )
+        return dict(analysis, figures=pdf_result['figures'])
+
+    async def handle_sessions(self, request: Request, session_id: Optional[str]) -> Tuple[int, Dict]:
+        sessions = self._sessions(request.client_id)
+
+        if session_id is None:
+            if request.method == 'GET':
+                result = await sessions.list_sessions()
+                if result['status'] == 'success':
+                    result['data'] = [dict(item, id=item['filename'][:-len('.json')]) for item in result['data']]
+                return self._result_status(result), result
+            if request.method == 'POST':
+                payload = request.json()
+                session_id = self._session_id(
+                    payload.get('id') or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+                )
+                result = await sessions.save_session(self._messages(payload, []), f"{session_id}.json")
+                return (201 if result['status'] == 'success' else 500), dict(result, id=session_id)
+            raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+
+        session_id = self._session_id(session_id)
+        filename = f"{session_id}.json"
+        if not os.path.exists(os.path.join(sessions.storage_dir, filename)) and request.method != 'PUT':
+            raise HTTPError(404, f"Session {session_id} not found")
+
+        async with self._session_lock(request.client_id, session_id):
+            if request.method == 'GET':
+                result = await sessions.load_session(os.path.join(sessions.storage_dir, filename))
+            elif request.method == 'PUT':
+                result = await sessions.save_session(self._messages(request.json()), filename)
+            elif request.method == 'DELETE':
+                result = await sessions.delete_session(filename)
+            else:
+                raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+        return self._result_status(result), dict(result, id=session_id)
+
+    def _sessions(self, client_id: str) -> SessionService:
+        if client_id not in self._session_services:
+            self._session_services[client_id] = SessionService(os.path.join(self.storage_dir, client_id))
+        return self._session_services[client_id]
+
+    @asynccontextmanager
+    async def _session_lock(self, client_id: str, session_id: str):
+        """Serialize requests on one session"""
+        key = (client_id, session_id)
+        entry = self._session_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._session_locks[key]
+
+    @staticmethod
+    def _session_id(session_id: str) -> str:
+        if not isinstance(session_id, str) or not SAFE_ID.match(session_id):
+            raise HTTPError(400, "Session ids must be 1-64 letters, digits, '-' or '_'")
+        return session_id
+
+    @staticmethod
+    def _messages(payload: Dict, default: Optional[List] = None) -> List[Dict]:
+        """The session entries of a request body, as saved session files hold them"""
+        messages = payload.get('messages', default)
+        if not isinstance(messages, list) or not all(
+                isinstance(entry, dict) and isinstance(entry.get('sender'), str)
+                and isinstance(entry.get('message'), str) for entry in messages):
+            raise HTTPError(400, "'messages' must be a list of {\"sender\": ..., \"message\": ...} objects")
+        return messages
+
+    @staticmethod
+    async def _load_history(sessions: SessionService, session_id: str) -> List[ChatMessage]:
+        filepath = os.path.join(sessions.storage_dir, f"{session_id}.json")
+        if not os.path.exists(filepath):
+            return []
+        result = await sessions.load_session(filepath, records=True)
+        if result['status'] != 'success':
+            raise HTTPError(500, result['message'])
+        return result['data']
+
+    @staticmethod
+    async def _append(sessions: SessionService, session_id: str, history: List[ChatMessage], message: str,
+                      reply: str):
+        history.append(ChatMessage('You', message))
+        history.append(ChatMessage('Assistant', reply))
+        result = await sessions.save_session(history, f"{session_id}.json")
+        if result['status'] != 'success':
+            raise HTTPError(500, result['message'])
+
+    @staticmethod
+    def _result_status(result: Dict) -> int:
+        return 200 if result['status'] == 'success' else 500
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Malformed Content-Length header")
+        if length > MAX_BODY:
+            raise HTTPError(413, f"Request body larger than {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, headers, body)
+
+    @staticmethod
+    def _head(status: int, headers: Dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, body: Dict, keep_alive: bool = True):
+        payload = json.dumps(body).encode()
+        writer.write(self._head(status, {
+            'Content-Type': 'application/json',
+            'Content-Length': str(len(payload)),
+            'Connection': 'keep-alive' if keep_alive else 'close',
+        }) + payload)
+        await writer.drain()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the advisor over a local HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--ollama-host", default=None, help="Ollama server URL")
+    parser.add_argument("--stub", action="store_true", help="Use the deterministic stub backend instead of Ollama")
+    parser.add_argument("-m", "--model", default="llama3.2", help="Ollama model name")
+    parser.add_argument("--fast-model", help="Small model for simple turns; enables model routing")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="Maximum concurrent model requests")
+    parser.add_argument("--storage-dir", default="sessions", help="Directory for per-client sessions")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    scheduler = RequestScheduler(max_concurrent=args.concurrency)
+    backend = StubBackend() if args.stub else None
+    llm_service = LLMService(args.model, scheduler=scheduler, host=args.ollama_host, backend=backend,
+                             fast_model=args.fast_model)
+    await AdvisorServer(llm_service, args.storage_dir).serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,215 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# 2024 US federal brackets: (lower bound, rate) per filing status
+FEDERAL_BRACKETS = {
+    'single': [(0, 0.10), (11_600, 0.12), (47_150, 0.22), (100_525, 0.24),
+               (191_950, 0.32), (243_725, 0.35), (609_350, 0.37)],
+    'married': [(0, 0.10), (23_200, 0.12), (94_300, 0.22), (201_050, 0.24),
+                (383_900, 0.32), (487_450, 0.35), (731_200, 0.37)],
+}
+
+LUMP_SUM_PATTERN = re.compile(r'\b(lump[- ]sum|annuity|annuities|payout|installments?)\b', re.IGNORECASE)
+MORTGAGE_PATTERN = re.compile(r'\b(mortgage|pay (?:it |this |that )?off|payoff|debt)\b', re.IGNORECASE)
+TAX_PATTERN = re.compile(r'\b(tax|taxes|taxed|bracket|brackets|after-tax|irs)\b', re.IGNORECASE)
+AMOUNT_PATTERN = re.compile(
+    r'\$((?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)\s*(k|thousand|m|mm|mil|million|b|bn|billion)?\b', re.IGNORECASE
+)
+AMOUNT_MULTIPLIERS = {
+    'k': 1e3, 'thousand': 1e3,
+    'm': 1e6, 'mm': 1e6, 'mil': 1e6, 'million': 1e6,
+    'b': 1e9, 'bn': 1e9, 'billion': 1e9,
+}
+# Smaller amounts are prices or fees, not a windfall or a mortgage balance
+MIN_SCENARIO_AMOUNT = 1_000
+
+
+class CalculatorService:
+    """Deterministic scenario grids for questions the LLM tends to get wrong.
+
+    Every calculator takes one sequence per input axis and evaluates the full
+    cartesian product in a single vectorized pass, returning a compact table
+    of ``{'title', 'columns', 'rows'}``.
+    """
+
+    async def lump_sum_vs_annuity(self, jackpots: Sequence[float] = (1_000_000,),
+                                  lump_ratios: Sequence[float] = (0.6,),
+                                  years: Sequence[int] = (20, 30),
+                                  discount_rates: Sequence[float] = (0.03, 0.05, 0.07),
+                                  tax_rates: Sequence[float] = (0.37,)) -> Dict:
+        """Lump sum vs. level annual annuity payments, both after tax, in today's dollars"""
+        try:
+            grid = self.grid(jackpot=jackpots, lump_ratio=lump_ratios, years=years,
+                             discount_rate=discount_rates, tax_rate=tax_rates)
+            payment = grid['jackpot'] / grid['years']
+            annuity_pv = payment * self.annuity_factor(grid['discount_rate'], grid['years'], due=True)
+            lump = grid['jackpot'] * grid['lump_ratio'] * (1 - grid['tax_rate'])
+            annuity = annuity_pv * (1 - grid['tax_rate'])
+
+            table = self.table(
+                "Lump sum vs. annuity (after tax, present value)",
+                ['jackpot', 'lump %', 'years', 'discount', 'lump sum', 'annuity PV', 'better'],
+                [grid['jackpot'], grid['lump_ratio'] * 100, grid['years'], grid['discount_rate'] * 100,
+                 lump, annuity, np.where(lump >= annuity, 'lump sum', 'annuity')]
+            )
+            return self._success(table)
+        except Exception as e:
+            return self._error(e)
+
+    async def mortgage_payoff_vs_invest(self, balances: Sequence[float] = (300_000,),
+                                        mortgage_rates: Sequence[float] = (0.03, 0.05, 0.07),
+                                        return_rates: Sequence[float] = (0.04, 0.06, 0.08),
+                                        years_remaining: Sequence[int] = (15, 30)) -> Dict:
+        """Net worth at the end of the loan term: pay off now and invest the freed-up
+        payments, or invest the lump sum and keep paying the mortgage"""
+        try:
+            grid = self.grid(balance=balances, mortgage_rate=mortgage_rates,
+                             return_rate=return_rates, years=years_remaining)
+            months = grid['years'] * 12
+            monthly_return = grid['return_rate'] / 12
+            payment = grid['balance'] / self.annuity_factor(grid['mortgage_rate'] / 12, months)
+
+            payoff = payment * self.future_value_factor(monthly_return, months)
+            invest = grid['balance'] * (1 + monthly_return) ** months
+            difference = invest - payoff
+
+            table = self.table(
+                "Pay off mortgage vs. invest (value at end of term)",
+                ['balance', 'mortgage %', 'return %', 'years', 'payment/mo', 'pay off', 'invest', 'better'],
+                [grid['balance'], grid['mortgage_rate'] * 100, grid['return_rate'] * 100, grid['years'],
+                 payment, payoff, invest, np.where(difference > 0, 'invest', 'pay off')]
+            )
+            return self._success(table)
+        except Exception as e:
+            return self._error(e)
+
+    async def windfall_tax(self, amounts: Sequence[float] = (1_000_000,),
+                           filing_statuses: Sequence[str] = ('single', 'married'),
+                           state_rates: Sequence[float] = (0.0, 0.05, 0.10),
+                           other_income: Sequence[float] = (0,)) -> Dict:
+        """Federal progressive tax plus a flat state rate on a windfall"""
+        try:
+            unknown = set(filing_statuses) - set(FEDERAL_BRACKETS)
+            if unknown:
+                raise ValueError(f"Unknown filing status: {', '.join(sorted(unknown))}")
+
+            grid = self.grid(amount=amounts, status=np.arange(len(filing_statuses)),
+                             state_rate=state_rates, other_income=other_income)
+            federal = np.zeros_like(grid['amount'], dtype=float)
+            for index, status in enumerate(filing_statuses):
+                mask = grid['status'] == index
+                federal[mask] = (self.progressive_tax(grid['amount'][mask] + grid['other_income'][mask], status)
+                                 - self.progressive_tax(grid['other_income'][mask], status))
+            state = grid['amount'] * grid['state_rate']
+            total = federal + state
+
+            table = self.table(
+                "Tax on the windfall",
+                ['amount', 'filing', 'state %', 'other income', 'federal', 'state', 'net', 'effective %'],
+                [grid['amount'], np.asarray(filing_statuses)[grid['status']], grid['state_rate'] * 100,
+                 grid['other_income'], federal, state, grid['amount'] - total,
+                 np.divide(total, grid['amount'], out=np.zeros_like(total), where=grid['amount'] > 0) * 100]
+            )
+            return self._success(table)
+        except Exception as e:
+            return self._error(e)
+
+    async def scenarios_for(self, message: str) -> List[Dict]:
+        """Tables relevant to a chat message, using amounts it mentions where possible"""
+        amounts = [amount for amount in self.parse_amounts(message) if amount >= MIN_SCENARIO_AMOUNT]
+        largest = max(amounts) if amounts else None
+
+        results = []
+        if LUMP_SUM_PATTERN.search(message):
+            results.append(await self.lump_sum_vs_annuity(jackpots=(largest or 1_000_000,)))
+        if MORTGAGE_PATTERN.search(message):
+            # A mortgage balance is rarely the windfall itself, so prefer smaller amounts
+            balance = min(amounts) if amounts else 300_000
+            results.append(await self.mortgage_payoff_vs_invest(balances=(balance,)))
+        if TAX_PATTERN.search(message):
+            results.append(await self.windfall_tax(amounts=(largest or 1_000_000,)))
+        return [result['data'] for result in results if result['status'] == 'success']
+
+    @staticmethod
+    def parse_amounts(message: str) -> List[float]:
+        """Dollar amounts in a message, with suffixes such as $2.5 million or $300k expanded"""
+        return [float(value.replace(',', '')) * AMOUNT_MULTIPLIERS.get(suffix.lower(), 1)
+                for value, suffix in AMOUNT_PATTERN.findall(message)]
+
+    @staticmethod
+    def grid(**axes) -> Dict[str, np.ndarray]:
+        """Flattened cartesian product of the given axes"""
+        names = list(axes)
+        mesh = np.meshgrid(*(np.asarray(axes[name]) for name in names), indexing='ij')
+        return {name: values.ravel() for name, values in zip(names, mesh)}
+
+    @staticmethod
+    def annuity_factor(rate: np.ndarray, periods: np.ndarray, due: bool = False) -> np.ndarray:
+        """Present value of 1 paid per period; handles zero rates"""
+        rate = np.asarray(rate, dtype=float)
+        periods = np.asarray(periods, dtype=float)
+        safe = np.where(rate == 0, 1.0, rate)
+        factor = np.where(rate == 0, periods, (1 - (1 + safe) ** -periods) / safe)
+        return factor * (1 + rate) if due else factor
+
+    @staticmethod
+    def future_value_factor(rate: np.ndarray, periods: np.ndarray) -> np.ndarray:
+        """Future value of 1 invested at the end of every period; handles zero rates"""
+        rate = np.asarray(rate, dtype=float)
+        periods = np.asarray(periods, dtype=float)
+        safe = np.where(rate == 0, 1.0, rate)
+        return np.where(rate == 0, periods, ((1 + safe) ** periods - 1) / safe)
+
+    @staticmethod
+    def progressive_tax(income: np.ndarray, status: str) -> np.ndarray:
+        brackets = FEDERAL_BRACKETS[status]
+        lowers = np.array([lower for lower, _ in brackets], dtype=float)
+        uppers = np.append(lowers[1:], np.inf)
+        rates = np.array([rate for _, rate in brackets])
+        taxable = np.clip(np.asarray(income, dtype=float)[:, None] - lowers, 0, uppers - lowers)
+        return taxable @ rates
+
+    @staticmethod
+    def table(title: str, columns: List[str], values: List[np.ndarray]) -> Dict:
+        rows = []
+        for row in zip(*values):
+            rows.append([value.item() if isinstance(value, np.generic) else value for value in row])
+        return {'title': title, 'columns': columns, 'rows': rows}
+
+    @staticmethod
+    def format_table(table: Dict, max_rows: int = 24) -> str:
+        """Render a table as aligned plain text"""
+        def cell(value) -> str:
+            if isinstance(value, float):
+                return f"{value:,.0f}" if abs(value) >= 100 else f"{value:.2f}".rstrip('0').rstrip('.')
+            return str(value)
+
+        rows = [[cell(value) for value in row] for row in table['rows'][:max_rows]]
+        widths = [max([len(column)] + [len(row[index]) for row in rows])
+                  for index, column in enumerate(table['columns'])]
+        lines = [table['title'],
+                 '  '.join(column.rjust(width) for column, width in zip(table['columns'], widths)),
+                 '  '.join('-' * width for width in widths)]
+        lines.extend('  '.join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+        if len(table['rows']) > max_rows:
+            lines.append(f"... {len(table['rows']) - max_rows} more rows")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _success(table: Dict) -> Dict:
+        return {
+            'status': 'success',
+            'data': table,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _error(e: Exception) -> Dict:
+        return {
+            'status': 'error',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.llm_service import LLMService
+
+# Context cache and runtime buffers on top of the weights, for models not loaded yet
+MEMORY_OVERHEAD = 1.2
+
+
+def physical_memory() -> Optional[int]:
+    """Total RAM in bytes, where the platform reports it"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class MemoryBudget:
+    """Lets models run together only while their footprints fit in ``capacity`` bytes"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, size: int):
+        # A model larger than the whole budget still runs, alone
+        size = min(size, self.capacity)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_use + size <= self.capacity)
+            self.in_use += size
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_use -= size
+                self._condition.notify_all()
+
+
+class ComparisonService:
+    """Sends one question to several models and streams all the answers.
+
+    Models run concurrently while their memory footprints fit in
+    ``memory_budget`` together; the others wait for a running model to
+    finish, so models that do not fit side by side run one after another
+    instead of making Ollama swap them in and out. A footprint is the
+    loaded size Ollama reports, or the size on disk plus overhead for a
+    model not loaded yet. Without a known budget or footprint, models run
+    one at a time. Requests still go through the LLM service's scheduler.
+    """
+
+    def __init__(self, llm_service: LLMService, memory_budget: Optional[int] = None,
+                 memory_fraction: float = 0.75):
+        self.llm_service = llm_service
+        total = physical_memory()
+        # Leave room for the OS, the app and whatever else is running
+        self.memory_budget = memory_budget or (int(total * memory_fraction) if total else None)
+
+    def footprint(self, model: str) -> Optional[int]:
+        """Estimated bytes the model needs while loaded"""
+        backend = self.llm_service.backend
+        try:
+            loaded = backend.loaded_size(model)
+            if loaded:
+                return loaded
+            size = backend.model_size(model)
+            return int(size * MEMORY_OVERHEAD) if size else None
+        except Exception:
+            # Unknown; the model will be run on its own
+            return None
+
+    async def stream_comparison(self, prompt: str, models: List[str],
+                                facts: str = "") -> AsyncIterator[Tuple[str, str, object]]:
+        """Yield (event, model, value) as the answers come in.
+
+        Events are ``queued`` with the estimated footprint, ``started`` with
+        the seconds spent waiting for memory, ``piece`` with generated text,
+        and finally ``done`` with the model's statistics or ``error`` with a
+        message. Closing the iterator early stops every model.
+        """
+        capacity = self.memory_budget or 1
+        budget = MemoryBudget(capacity)
+        events = asyncio.Queue()
+        footprints = {model: await asyncio.to_thread(self.footprint, model) for model in models}
+
+        async def run(model: str):
+            footprint = footprints[model]
+            size = footprint if footprint and self.memory_budget else capacity
+            await events.put(('queued', model, {'memory_bytes': footprint}))
+            waited = time.perf_counter()
+            try:
+                async with budget.reserve(size):
+                    started = time.perf_counter()
+                    await events.put(('started', model, {'waited': started - waited}))
+                    with tracer.span('compare.model', 'llm', model=model):
+                        stats = await self.answer(model, prompt, facts, started, events)
+                    stats['waited'] = started - waited
+                    # Measured while the model is certainly still loaded
+                    loaded = await asyncio.to_thread(self.footprint, model)
+                    stats['memory_bytes'] = loaded or footprint
+                await events.put(('done', model, stats))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await events.put(('error', model, str(e)))
+
+        tasks = [asyncio.create_task(run(model)) for model in models]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                event = await events.get()
+                if event[0] in ('done', 'error'):
+                    remaining -= 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def answer(self, model: str, prompt: str, facts: str, started: float, events: asyncio.Queue) -> Dict:
+        """Stream one model's answer into the event queue and return its statistics"""
+        final = {}
+        first_piece = None
+        async for piece in self.llm_service.stream_response(prompt, facts=facts, model=model, final=final,
+                                                            degrade=False):
+            if first_piece is None and piece:
+                first_piece = time.perf_counter() - started
+            await events.put(('piece', model, piece))
+        latency = time.perf_counter() - started
+
+        response = final.get('response') or {}
+        tokens = response.get('eval_count') or 0
+        generate = (response.get('eval_duration') or 0) / 1e9
+        return {
+            'latency': latency,
+            'time_to_first_token': first_piece if first_piece is not None else latency,
+            'tokens': tokens,
+            'tokens_per_second': tokens / generate if generate else None,
+            'prompt_tokens': response.get('prompt_eval_count') or 0,
+            'load_seconds': (response.get('load_duration') or 0) / 1e9,
+        }
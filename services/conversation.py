@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional, Union
+
+from ttbzrs_millionaire.services.messages import ChatMessage, as_messages
+
+SYSTEM_PROMPT = (
+    "You are a financial advisor helping someone who just won a million dollars. "
+    "Provide helpful, practical advice while keeping the conversation engaging and fun. "
+    "Focus on realistic financial planning while maintaining an optimistic tone."
+)
+
+# Chat senders that are part of the model's conversation; System and Calculator notes are not
+ROLES = {'You': 'user', 'Assistant': 'assistant'}
+
+
+class Conversation:
+    """Append-only message sequence sent to the backend.
+
+    The system prompt and every earlier turn go out byte-for-byte unchanged
+    each turn, so a backend with a prompt cache (Ollama keeps the KV state
+    of the previous prompt and reply) only has to prefill the new message.
+    """
+
+    def __init__(self, system_prompt: str = SYSTEM_PROMPT, messages: Optional[List[Dict]] = None,
+                 prefix_tokens: int = 0):
+        self.system_prompt = system_prompt
+        self.messages = list(messages or [])
+        # Tokens the backend reported for the transcript so far, prompt and replies
+        self.prefix_tokens = prefix_tokens
+
+    @classmethod
+    def from_history(cls, history: List[Union[ChatMessage, Dict]],
+                     system_prompt: str = SYSTEM_PROMPT) -> 'Conversation':
+        """Rebuild a conversation from session records or saved session entries"""
+        return cls(system_prompt, [
+            {'role': ROLES[entry.sender], 'content': entry.message}
+            for entry in as_messages(history) if entry.sender in ROLES
+        ])
+
+    def request(self, content: str) -> List[Dict]:
+        """Messages for the next turn, without recording it"""
+        return ([{'role': 'system', 'content': self.system_prompt}] + self.messages
+                + [{'role': 'user', 'content': content}])
+
+    def append(self, content: str, reply: str, prefix_tokens: int = 0):
+        self.messages.append({'role': 'user', 'content': content})
+        self.messages.append({'role': 'assistant', 'content': reply})
+        self.prefix_tokens = prefix_tokens
+
+    def reply_to(self, question: str) -> Optional[str]:
+        """The latest reply in this conversation to the same question, if it was asked before"""
+        question = question.strip()
+        for index in range(len(self.messages) - 2, -1, -1):
+            message, reply = self.messages[index], self.messages[index + 1]
+            if message['role'] != 'user' or reply['role'] != 'assistant':
+                continue
+            content = message['content'].strip()
+            # Turns that cited computed figures carry them ahead of the question
+            if content == question or content.endswith("\n\n" + question):
+                return reply['content']
+        return None
+
+    def fork(self) -> 'Conversation':
+        """Copy to branch from, e.g. for speculative turns that may be thrown away"""
+        return Conversation(self.system_prompt, self.messages, self.prefix_tokens)
+
+    def __len__(self) -> int:
+        return len(self.messages)
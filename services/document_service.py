@@ -1,20 +1,74 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import numpy as np
 import PyPDF2
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
 
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.patterns import CURRENCY_PATTERN, DATE_PATTERN, PERCENT_PATTERN
+
+# Dates, quarters and version numbers that differ between versions of the same document. A year
+# only counts next to a month, quarter or version marker; other numbers, including account or
+# client identifiers such as 2005, tell documents apart and are kept
+_MONTH = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+          r'|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+_YEAR = r'(?:19|20)\d{2}'
+_MARKER = r'(?:q[1-4]|v\d+|rev\d+)'
+VERSION_PATTERN = re.compile(
+    r'(?<![a-z0-9])(?:'
+    rf'{_YEAR}[-_.]?(?:0[1-9]|1[0-2])(?:[-_.]?(?:0[1-9]|[12]\d|3[01]))?'  # 2024-05, 202405, 2024_05_31
+    rf'|(?:0[1-9]|1[0-2])[-_.]{_YEAR}'  # 05-2024
+    rf'|{_MONTH}(?:[-_. ]?(?:{_YEAR}|\d{{2}}))?'  # may_2024, may 2024, jan24
+    rf'|{_YEAR}[-_. ]?{_MONTH}'  # 2024 may
+    rf'|{_YEAR}[-_. ]?{_MARKER}|{_MARKER}[-_. ]?{_YEAR}'  # 2024_q3, v2-2024
+    r'|q[1-4]|v\d+|rev\d+|\(\d+\)'  # quarters, versions, download copies
+    r')(?![a-z0-9])'
+)
+# Where the GUI keeps page text and notes between statement versions, outside any working copy
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ttbzrs_millionaire", "document_cache")
+
+# Checked in order against each line's label; lines matching none are treated as holdings
+CATEGORY_PATTERNS = [
+    ('fee', re.compile(r'\b(fees?|commissions?|expense ratio|charged?)\b', re.IGNORECASE)),
+    ('tax', re.compile(r'\b(tax|taxes|withholding|withheld)\b', re.IGNORECASE)),
+    ('debt', re.compile(r'\b(mortgage|loans?|debt|principal|credit card|owed?)\b', re.IGNORECASE)),
+    ('income', re.compile(r'\b(dividends?|interest|income|distributions?|coupons?)\b', re.IGNORECASE)),
+    ('transfer', re.compile(r'\b(transfers?|deposits?|withdrawals?|contributions?|payments?)\b', re.IGNORECASE)),
+    # "Total" only as a line's label, not in fund names such as Total Stock Market Index
+    ('balance', re.compile(r'\b(balance|total value|subtotals?|grand total|market value|net worth|ending value)\b'
+                           r'|^totals?\b(?!\s+(?:stock|bond|international|world|market|return))|\btotals?$',
+                           re.IGNORECASE)),
+]
+# Balance and total lines sum the holdings, so they are reported apart from positions and allocation
+POSITION_CATEGORIES = ('holding',)
+# Everything removed from a line to leave its label
+FIGURE_PATTERN = re.compile('|'.join(
+    pattern.pattern for pattern in (DATE_PATTERN, CURRENCY_PATTERN, PERCENT_PATTERN)))
+MONTHS = {month: index for index, month in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1)}
+
+
 class DocumentService:
+    def __init__(self, cache_dir: str):
+        # Holds extracted statement text; created on first save
+        self.cache_dir = cache_dir
+
     @staticmethod
     async def read_pdf(file_path: str) -> Dict:
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                    
+            with tracer.span('document.read_pdf', 'document') as span:
+                # Extraction is CPU bound; keep it off the event loop shared by every tab
+                text, pages = await asyncio.to_thread(DocumentService._extract_text, file_path)
+                span.update(pages=pages, characters=len(text))
+
             return {
                 'status': 'success',
                 'content': text,
+                'figures': DocumentService.summarize_figures(DocumentService.extract_figures([text])),
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -23,3 +77,310 @@ class DocumentService:
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             }
+
+    async def read_pdf_incremental(self, file_path: str, source: Optional[str] = None) -> Dict:
+        """Read a PDF, reusing text and notes for pages seen in the last version from the same source.
+
+        Pages are matched by a fingerprint of their raw content stream, so
+        unchanged pages are found wherever they moved to and are not
+        re-extracted. When every page matches, the cached summary is
+        returned as well.
+        """
+        try:
+            source = source or self.source_key(file_path)
+            cached = await asyncio.to_thread(self._load_cache, source)
+            with tracer.span('document.read_pdf_incremental', 'document') as span:
+                pages = await asyncio.to_thread(self._extract_pages, file_path, cached['pages'])
+                changed = [index for index, page in enumerate(pages) if page['changed']]
+                span.update(pages=len(pages), changed=len(changed))
+            tracer.count('document.pages_extracted', len(changed))
+            tracer.count('document.pages_reused', len(pages) - len(changed))
+
+            fingerprints = [page['fingerprint'] for page in pages]
+            summary = cached['summary']
+            return {
+                'status': 'success',
+                'source': source,
+                'content': ''.join(page['text'] for page in pages),
+                'pages': pages,
+                'changed_pages': changed,
+                'figures': self.summarize_figures(self.extract_figures([page['text'] for page in pages])),
+                'summary': summary['message'] if summary and summary['fingerprints'] == fingerprints else None,
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    async def save_analysis(self, source: str, file_path: str, pages: List[Dict],
+                            notes: List[Optional[str]], summary: str) -> Dict:
+        """Remember this version's pages, per-page notes and summary for the next version"""
+        try:
+            cache = {
+                'source': source,
+                'file': os.path.abspath(file_path),
+                'updated': datetime.now().isoformat(),
+                'pages': {
+                    page['fingerprint']: {'text': page['text'], 'notes': note}
+                    for page, note in zip(pages, notes)
+                },
+                'summary': {'fingerprints': [page['fingerprint'] for page in pages], 'message': summary},
+            }
+            filepath = await asyncio.to_thread(self._write_cache, source, cache)
+            return {
+                'status': 'success',
+                'filepath': filepath,
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    @staticmethod
+    def extract_figures(pages: Sequence[str]) -> Dict:
+        """Columnar table of the lines in a document that mention amounts or percentages.
+
+        One row per such line, as parallel arrays: ``page``, ``line``,
+        ``label`` (the line without its figures), ``category``, ``amount``
+        (the line's largest dollar amount, NaN if none) and ``percent`` (its
+        first percentage, NaN if none). ``dates`` holds every date found and
+        ``lines``/``pages`` the document's non-empty line and page counts.
+        """
+        with tracer.span('document.extract_figures', 'document') as span:
+            text = '\n'.join(pages)
+            lines = text.split('\n')
+            line_starts = np.cumsum([0] + [len(line) + 1 for line in lines[:-1]])
+            line_pages = np.repeat(np.arange(len(pages), dtype=np.int32),
+                                   [page.count('\n') + 1 for page in pages])
+
+            # One regex pass over the whole text per pattern; match offsets are mapped to lines in bulk
+            amount_matches = list(CURRENCY_PATTERN.finditer(text))
+            amount_lines = np.searchsorted(line_starts, [match.start() for match in amount_matches],
+                                           side='right') - 1
+            amounts = np.array([
+                # "-$1,200.00" and "($1,200.00)" are debits
+                -float(match.group(1).replace(',', '')) if match.start() and text[match.start() - 1] in '-('
+                else float(match.group(1).replace(',', ''))
+                for match in amount_matches
+            ], dtype=float)
+            percent_matches = list(PERCENT_PATTERN.finditer(text))
+            percent_lines = np.searchsorted(line_starts, [match.start() for match in percent_matches],
+                                            side='right') - 1
+            percents = np.array([float(match.group(1)[:-1]) for match in percent_matches], dtype=float)
+
+            rows = np.union1d(amount_lines, percent_lines).astype(np.int64)
+            amount = np.full(len(rows), -np.inf)
+            np.maximum.at(amount, np.searchsorted(rows, amount_lines), amounts)
+            amount[np.isneginf(amount)] = np.nan
+            percent = np.full(len(rows), np.nan)
+            first_lines, first_index = np.unique(percent_lines, return_index=True)
+            percent[np.searchsorted(rows, first_lines)] = percents[first_index]
+
+            # Statements repeat a handful of line shapes, so categorize each distinct label once
+            labels = np.array(FIGURE_PATTERN.sub(' ', '\n'.join(lines[row] for row in rows)).split('\n')
+                              if len(rows) else [], dtype=object)
+            labels = np.array([' '.join(label.split()).strip(' :-()') or '(unlabeled)' for label in labels],
+                              dtype=object)
+            names, inverse = np.unique(labels.astype(str), return_inverse=True)
+            categories = np.array([DocumentService._category(name) for name in names], dtype=object)
+            figures = {
+                'page': line_pages[rows] if len(rows) else np.zeros(0, dtype=np.int32),
+                'line': rows.astype(np.int32),
+                'label': labels,
+                'category': categories[inverse] if len(rows) else np.zeros(0, dtype=object),
+                'amount': amount,
+                'percent': percent,
+                'dates': np.array([DocumentService._date(match) for match in DATE_PATTERN.finditer(text)],
+                                  dtype='datetime64[D]'),
+                'lines': sum(1 for line in lines if line.strip()),
+                'pages': len(pages),
+            }
+            span.update(rows=len(rows), amounts=len(amounts), percents=len(percents))
+        return figures
+
+    @staticmethod
+    def summarize_figures(figures: Dict, top: int = 5) -> Dict:
+        """Totals per category, balances, largest positions, allocation, rates and statement period"""
+        category, amount, label = figures['category'], figures['amount'], figures['label']
+        has_amount = ~np.isnan(amount)
+
+        totals = {}
+        for name in np.unique(category[has_amount]):
+            mask = has_amount & (category == name)
+            totals[str(name)] = {'count': int(mask.sum()), 'sum': round(float(amount[mask].sum()), 2)}
+
+        positions = has_amount & np.isin(category, POSITION_CATEGORIES) & (amount > 0)
+        if not positions.any():
+            positions = has_amount & ~np.isin(category, ('debt', 'balance')) & (amount > 0)
+        order = np.argsort(-amount[positions], kind='stable')[:top]
+        largest = [
+            {'label': str(label[positions][index]), 'amount': round(float(amount[positions][index]), 2),
+             'page': int(figures['page'][positions][index]) + 1}
+            for index in order
+        ]
+
+        allocation = []
+        if positions.any():
+            names, inverse = np.unique(label[positions].astype(str), return_inverse=True)
+            sums = np.bincount(inverse, weights=amount[positions])
+            for index in np.argsort(-sums, kind='stable')[:top]:
+                allocation.append({'label': str(names[index]), 'amount': round(float(sums[index]), 2),
+                                   'share': round(float(sums[index] / sums.sum()), 4)})
+
+        balances = has_amount & (category == 'balance')
+        balance_order = np.argsort(-amount[balances], kind='stable')[:top]
+        balance_lines = [
+            {'label': str(label[balances][index]), 'amount': round(float(amount[balances][index]), 2),
+             'page': int(figures['page'][balances][index]) + 1}
+            for index in balance_order
+        ]
+
+        percent = figures['percent'][~np.isnan(figures['percent'])]
+        # Impossible dates such as 13/45/2024 parse to NaT and would poison min and max
+        dates = figures['dates'][~np.isnat(figures['dates'])]
+        return {
+            'pages': figures['pages'],
+            'lines': figures['lines'],
+            'rows': len(amount),
+            'coverage': round(len(amount) / figures['lines'], 3) if figures['lines'] else 0.0,
+            'period': [str(dates.min()), str(dates.max())] if len(dates) else None,
+            'totals': totals,
+            'balances': balance_lines,
+            'largest_positions': largest,
+            'allocation': allocation,
+            'rates': {
+                'count': int(len(percent)),
+                'min': float(percent.min()),
+                'median': float(np.median(percent)),
+                'max': float(percent.max()),
+            } if len(percent) else None,
+        }
+
+    @staticmethod
+    def format_figures(summary: Dict) -> str:
+        """Compact plain-text digest of summarize_figures() for prompts"""
+        lines = [f"- {summary['rows']:,} lines with figures across {summary['pages']} pages"
+                 + (f", dated {summary['period'][0]} to {summary['period'][1]}" if summary['period'] else "")]
+        if summary['totals']:
+            lines.append("- Totals by type: " + "; ".join(
+                f"{name} ${total['sum']:,.2f} ({total['count']} lines)" for name, total in summary['totals'].items()
+            ))
+        if summary.get('balances'):
+            lines.append("- Balances and totals: " + "; ".join(
+                f"{balance['label']} ${balance['amount']:,.2f} (p. {balance['page']})"
+                for balance in summary['balances']
+            ))
+        if summary['largest_positions']:
+            lines.append("- Largest positions: " + "; ".join(
+                f"{position['label']} ${position['amount']:,.2f} (p. {position['page']})"
+                for position in summary['largest_positions']
+            ))
+        if summary['allocation']:
+            lines.append("- Allocation: " + "; ".join(
+                f"{entry['label']} {entry['share']:.1%}" for entry in summary['allocation']
+            ))
+        if summary['rates']:
+            rates = summary['rates']
+            lines.append(f"- {rates['count']} rates mentioned, {rates['min']:g}% to {rates['max']:g}% "
+                         f"(median {rates['median']:g}%)")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def figures_for_model(summary: Dict, min_coverage: float = 0.3) -> Optional[str]:
+        """The figures digest when it captures the document, i.e. most lines carry figures.
+
+        Statements and holdings reports qualify and can be analyzed from the
+        digest alone; narrative documents return None and need their text.
+        """
+        if summary['rows'] == 0 or summary['coverage'] < min_coverage:
+            return None
+        return DocumentService.format_figures(summary)
+
+    @staticmethod
+    def _category(label: str) -> str:
+        for name, pattern in CATEGORY_PATTERNS:
+            if pattern.search(label):
+                return name
+        return 'holding'
+
+    @staticmethod
+    def _date(match) -> np.datetime64:
+        iso_year, iso_month, iso_day, us_month, us_day, us_year, name, name_day, name_year = match.groups()
+        if iso_year:
+            year, month, day = int(iso_year), int(iso_month), int(iso_day)
+        elif us_year:
+            year, month, day = int(us_year), int(us_month), int(us_day)
+        else:
+            year, month, day = int(name_year), MONTHS[name], int(name_day)
+        try:
+            return np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", 'D')
+        except ValueError:
+            return np.datetime64('NaT', 'D')
+
+    @staticmethod
+    def source_key(file_path: str) -> str:
+        """Name shared by every version of a statement, e.g. chase_2024_05.pdf -> chase_#.pdf
+
+        Only dates and version tokens are masked, so client_1001_2024_05.pdf
+        and client_1002_2024_05.pdf stay separate sources, as do
+        client_2005_2024_05.pdf and client_2006_2024_05.pdf.
+        """
+        name = VERSION_PATTERN.sub('#', os.path.basename(file_path).lower())
+        return re.sub(r'[^a-z0-9#._-]+', '_', name)
+
+    @staticmethod
+    def fingerprint(page) -> str:
+        """Hash of a page's raw content stream; much cheaper than extracting its text"""
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b''
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _extract_text(file_path: str) -> Tuple[str, int]:
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            text = ""
+            for page in pdf_reader.pages:
+                text += page.extract_text()
+            return text, len(pdf_reader.pages)
+
+    @staticmethod
+    def _extract_pages(file_path: str, cached_pages: Dict[str, Dict]) -> List[Dict]:
+        pages = []
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page in pdf_reader.pages:
+                fingerprint = DocumentService.fingerprint(page)
+                cached = cached_pages.get(fingerprint)
+                pages.append({
+                    'fingerprint': fingerprint,
+                    'text': cached['text'] if cached else page.extract_text(),
+                    'notes': cached['notes'] if cached else None,
+                    'changed': cached is None,
+                })
+        return pages
+
+    def _cache_path(self, source: str) -> str:
+        return os.path.join(self.cache_dir, f"{source}.json")
+
+    def _load_cache(self, source: str) -> Dict:
+        path = self._cache_path(source)
+        if not os.path.exists(path):
+            return {'pages': {}, 'summary': None}
+        with open(path, 'r') as file:
+            return json.load(file)
+
+    def _write_cache(self, source: str, cache: Dict) -> str:
+        path = self._cache_path(source)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write then rename so an interrupted save never leaves a corrupt cache
+        with open(path + '.tmp', 'w') as file:
+            json.dump(cache, file)
+        os.replace(path + '.tmp', path)
+        return path
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class Span:
+    __slots__ = ('name', 'category', 'start', 'duration', 'thread_id', 'args')
+
+    def __init__(self, name: str, category: str, start: float, duration: float, thread_id: int, args: Dict):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = duration
+        self.thread_id = thread_id
+        self.args = args
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'category': self.category,
+            'start': self.start,
+            'duration': self.duration,
+            'thread_id': self.thread_id,
+            'args': self.args,
+        }
+
+
+class Tracer:
+    """Named spans, counters and value observations kept in memory.
+
+    Spans go into a fixed-size ring buffer so tracing can stay on for long
+    sessions. Times are ``time.perf_counter()`` seconds; exports convert
+    them to wall-clock microseconds, so traces from several processes can
+    be merged and still line up.
+    """
+
+    def __init__(self, capacity: int = 10_000, samples: int = 1_000):
+        self.enabled = True
+        self._spans = deque(maxlen=capacity)
+        self._counters = defaultdict(float)
+        self._observations = defaultdict(lambda: deque(maxlen=samples))
+        self._lock = threading.Lock()
+        # perf_counter has an arbitrary per-process zero; pin it to the wall clock once
+        self._origin = time.perf_counter()
+        self._wall_origin = time.time()
+
+    @contextmanager
+    def span(self, name: str, category: str = "app", **args):
+        """Time the block; the yielded dict can be filled with extra span arguments"""
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(name, start, time.perf_counter() - start, category, **args)
+
+    def record(self, name: str, start: float, duration: float, category: str = "app", **args):
+        """Add a span that was timed elsewhere, e.g. from backend response metadata"""
+        if self.enabled:
+            self._spans.append(Span(name, category, start, duration, threading.get_ident(), args))
+
+    def count(self, name: str, value: float = 1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Record one sample of a value such as tokens/s or time to first token"""
+        if self.enabled:
+            with self._lock:
+                self._observations[name].append(value)
+
+    def latest(self, name: str, default: float = None) -> float:
+        with self._lock:
+            samples = self._observations.get(name)
+            return samples[-1] if samples else default
+
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._observations.clear()
+
+    def stats(self) -> Dict:
+        """Per-span timing percentiles in milliseconds, counters and observation summaries"""
+        durations = defaultdict(list)
+        for span in self.spans():
+            durations[span.name].append(span.duration * 1000)
+
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {name: list(samples) for name, samples in self._observations.items()}
+
+        return {
+            'spans': {name: self._summary(values) for name, values in sorted(durations.items())},
+            'counters': counters,
+            'observations': {name: dict(self._summary(values), last=values[-1])
+                             for name, values in sorted(observations.items()) if values},
+        }
+
+    def chrome_trace(self) -> Dict:
+        """Trace in the Chrome trace event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        events = [
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (self._wall_origin + span.start - self._origin) * 1e6,
+                'dur': span.duration * 1e6,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': span.args,
+            }
+            for span in self.spans()
+        ]
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': self.stats(),
+        }
+
+    def export(self, path: str, format: str = "chrome"):
+        """Write the trace as Chrome trace JSON or as plain span records"""
+        if format == "chrome":
+            data = self.chrome_trace()
+        else:
+            data = {'spans': [span.to_dict() for span in self.spans()], 'stats': self.stats()}
+        with open(path, 'w') as file:
+            json.dump(data, file, default=str)
+
+    @staticmethod
+    def _summary(values: List[float]) -> Dict:
+        ordered = sorted(values)
+        return {
+            'count': len(ordered),
+            'mean': sum(ordered) / len(ordered),
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'max': ordered[-1],
+        }
+
+
+# Shared by every service in the process
+tracer = Tracer()
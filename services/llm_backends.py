@@ -0,0 +1,182 @@
+import abc
+import hashlib
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Optional, Union
+
+import httpx
+import ollama
+
+WORDS = (
+    "diversify portfolio index fund emergency savings tax bracket annuity lump sum "
+    "retirement account bond allocation inflation risk budget advisor estate plan "
+    "mortgage debt payoff dividend yield growth rebalance liquidity horizon"
+).split()
+
+
+class LLMBackend(abc.ABC):
+    """Chat interface LLMService talks to.
+
+    Responses follow the shape of Ollama's chat API: a mapping with
+    ``message.content`` plus the ``prompt_eval_count``, ``eval_count`` and
+    ``*_duration`` (nanoseconds) metadata. With ``stream=True`` an iterator
+    of such mappings is returned and only the last one carries the metadata.
+    """
+
+    @abc.abstractmethod
+    def chat(self, model: str, messages: List[Dict], stream: bool = False,
+             options: Optional[Dict] = None) -> Union[Dict, Iterator[Dict]]:
+        """Send the messages to the model and return its reply"""
+
+    def loaded_size(self, model: str) -> Optional[int]:
+        """Bytes the loaded model occupies, if the backend can tell"""
+        return None
+
+    def model_size(self, model: str) -> Optional[int]:
+        """Bytes of the model's weights on disk, known before it is loaded"""
+        return None
+
+    def ping(self):
+        """Cheap health check; raises if the backend cannot serve requests"""
+
+    def transient(self, error: Exception) -> bool:
+        """Whether a failed request may succeed if retried, e.g. a dropped connection"""
+        return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class OllamaBackend(LLMBackend):
+    # Overloaded or restarting server; 404 (model not pulled) and bad requests are not retried
+    TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, host: Optional[str] = None, keep_alive: Union[str, float, None] = "30m",
+                 timeout: float = 120.0, connect_timeout: float = 3.0):
+        # One client per backend so every caller shares its HTTP connection pool. The read
+        # timeout bounds the wait for each streamed piece, including loading the model
+        self.client = ollama.Client(host=host, timeout=httpx.Timeout(timeout, connect=connect_timeout))
+        # Keep the model, and with it the cached prompt prefix, loaded between turns
+        self.keep_alive = keep_alive
+
+    def chat(self, model: str, messages: List[Dict], stream: bool = False,
+             options: Optional[Dict] = None):
+        # keep_alive is a request field rather than a model option, but tuned profiles carry it with the options
+        options = dict(options or {})
+        keep_alive = options.pop('keep_alive', self.keep_alive)
+        return self.client.chat(model=model, messages=messages, stream=stream, options=options or None,
+                                keep_alive=keep_alive)
+
+    def loaded_size(self, model: str) -> Optional[int]:
+        names = {model, f"{model}:latest"}
+        for loaded in self.client.ps().models:
+            if loaded.model in names or loaded.name in names:
+                return loaded.size
+        return None
+
+    def model_size(self, model: str) -> Optional[int]:
+        names = {model, f"{model}:latest"}
+        for installed in self.client.list().models:
+            if installed.model in names:
+                return installed.size
+        return None
+
+    def ping(self):
+        self.client.ps()
+
+    def transient(self, error: Exception) -> bool:
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code in self.TRANSIENT_STATUS
+        return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class StubBackend(LLMBackend):
+    """Deterministic local stand-in for Ollama used by benchmarks and load tests.
+
+    Replies depend only on the model name and prompt. Latency is simulated
+    as a fixed queueing delay, prefill at ``prefill_rate`` prompt tokens per
+    second, and generation at ``token_rate`` tokens per second. With
+    ``cache_prompt`` it mimics Ollama's prompt cache: the part of a prompt
+    shared with the previous prompt and reply costs no prefill.
+    ``model_sizes`` gives the memory each model reports occupying.
+    """
+
+    def __init__(self, token_rate: float = 50.0, prefill_rate: float = 500.0,
+                 base_latency: float = 0.05, reply_tokens: int = 64, sleep: bool = True,
+                 cache_prompt: bool = False, model_sizes: Optional[Dict[str, int]] = None):
+        self.token_rate = token_rate
+        self.prefill_rate = prefill_rate
+        self.base_latency = base_latency
+        self.reply_tokens = reply_tokens
+        self.sleep = sleep
+        self.cache_prompt = cache_prompt
+        self.model_sizes = model_sizes or {}
+        # model -> text of the last prompt and reply, i.e. what the KV cache holds
+        self._cached: Dict[str, str] = {}
+
+    def chat(self, model: str, messages: List[Dict], stream: bool = False,
+             options: Optional[Dict] = None):
+        prompt = ''.join(f"<{message['role']}>{message['content']}" for message in messages)
+        num_predict = (options or {}).get('num_predict') or self.reply_tokens
+        tokens = self._reply(model, prompt, min(num_predict, self.reply_tokens))
+        prompt_tokens = self._prefill_tokens(model, prompt, ''.join(tokens))
+        if stream:
+            return self._stream(model, prompt_tokens, tokens)
+
+        self._wait(self.base_latency + prompt_tokens / self.prefill_rate + len(tokens) / self.token_rate)
+        return self._response(model, ''.join(tokens), prompt_tokens, len(tokens), done=True)
+
+    def loaded_size(self, model: str) -> Optional[int]:
+        return self.model_sizes.get(model)
+
+    def model_size(self, model: str) -> Optional[int]:
+        return self.model_sizes.get(model)
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Rough token count, about four characters per token"""
+        return max(1, len(text) // 4)
+
+    def prefill_seconds(self, prompt: str) -> float:
+        return self.count_tokens(prompt) / self.prefill_rate
+
+    def _prefill_tokens(self, model: str, prompt: str, reply: str) -> int:
+        """Prompt tokens that have to be evaluated, after any prompt cache hit"""
+        if not self.cache_prompt:
+            return self.count_tokens(prompt)
+        cached = len(os.path.commonprefix([self._cached.get(model, ''), prompt])) // 4
+        self._cached[model] = f"{prompt}<assistant>{reply}"
+        return max(1, self.count_tokens(prompt) - cached)
+
+    def _stream(self, model: str, prompt_tokens: int, tokens: List[str]) -> Iterator[Dict]:
+        self._wait(self.base_latency + prompt_tokens / self.prefill_rate)
+        for token in tokens:
+            self._wait(1 / self.token_rate)
+            yield self._response(model, token, prompt_tokens, 0, done=False)
+        yield self._response(model, '', prompt_tokens, len(tokens), done=True)
+
+    def _response(self, model: str, content: str, prompt_tokens: int, eval_count: int, done: bool) -> Dict:
+        response = {
+            'model': model,
+            'message': {'role': 'assistant', 'content': content},
+            'done': done,
+        }
+        if done:
+            response.update({
+                'prompt_eval_count': prompt_tokens,
+                'prompt_eval_duration': int(prompt_tokens / self.prefill_rate * 1e9),
+                'eval_count': eval_count,
+                'eval_duration': int(eval_count / self.token_rate * 1e9),
+                'load_duration': 0,
+            })
+            response['total_duration'] = (int(self.base_latency * 1e9) + response['prompt_eval_duration']
+                                          + response['eval_duration'])
+        return response
+
+    @staticmethod
+    def _reply(model: str, prompt: str, count: int) -> List[str]:
+        seed = hashlib.sha256(f"{model}\0{prompt}".encode()).digest()
+        rng = random.Random(seed)
+        return [rng.choice(WORDS) + ' ' for _ in range(count)]
+
+    def _wait(self, seconds: float):
+        if self.sleep and seconds > 0:
+            time.sleep(seconds)
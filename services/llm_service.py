@@ -1,53 +1,320 @@
-import ollama
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 import asyncio
+import threading
+import time
+import uuid
 from datetime import datetime
 
+from ttbzrs_millionaire.services.calculator_service import CalculatorService
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.llm_backends import LLMBackend, OllamaBackend
+from ttbzrs_millionaire.services.resilience import BackendUnavailable, CircuitBreaker, DegradedAnswer, RetryPolicy
+from ttbzrs_millionaire.services.router_service import FULL, ModelRouter
+from ttbzrs_millionaire.services.scheduler_service import Priority, RequestScheduler
+from ttbzrs_millionaire.services.tuning import TuningProfiles
+
 class LLMService:
-    def __init__(self, model_name: str = "llama3.2"):
+    def __init__(self, model_name: str = "llama3.2", scheduler: Optional[RequestScheduler] = None,
+                 chunk_size: int = 4000, host: Optional[str] = None, backend: Optional[LLMBackend] = None,
+                 fast_model: Optional[str] = None, profiles: Optional[TuningProfiles] = None,
+                 retry: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None):
         self.model = model_name
-        
-    async def get_response(self, prompt: str, context: str = "") -> Dict:
+        self.scheduler = scheduler or RequestScheduler()
+        self.chunk_size = chunk_size
+        self.backend = backend or OllamaBackend(host)
+        # With a fast model, simple requests are routed to it and the rest to model_name
+        self.router = ModelRouter(model_name, fast_model) if fast_model else None
+        # Options tuned for this machine by tune.py, per model and profile
+        self.profiles = profiles if profiles is not None else TuningProfiles()
+        # Transient failures are retried; repeated ones open the breaker and requests fail fast
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(self.backend.ping)
+        # While the breaker is open chat turns are answered from computed figures instead
+        self.calculator = CalculatorService()
+
+    async def get_response(self, prompt: str, context: str = "", facts: str = "",
+                           conversation: Optional[Conversation] = None, route: Optional[str] = None) -> Dict:
+        """Answer one chat turn.
+
+        With a conversation the turn is appended to it and the prompt prefix
+        from earlier turns is reused; otherwise ``context`` is sent as a
+        one-off transcript. ``route`` forces the fast or full model. While
+        the backend is unavailable a degraded answer is returned instead.
+        """
         try:
-            full_prompt = f"""You are a financial advisor helping someone who just won a million dollars.
-                        Previous context: {context}
-                        User message: {prompt}
-                        
-                        Provide helpful, practical advice while keeping the conversation engaging and fun.
-                        Focus on realistic financial planning while maintaining an optimistic tone."""
-            
-            response = ollama.chat(model=self.model, messages=[{
-                'role': 'user',
-                'content': full_prompt
-            }])
-            
+            conversation, content, messages = self._prepare(prompt, context, facts, conversation)
+            response = await self._chat(messages, Priority.INTERACTIVE,
+                                        route=self._route('chat', prompt, facts, route))
+            reply = response['message']['content']
+            savings = self._finish_turn(conversation, content, reply, response)
+
             return {
                 'status': 'success',
-                'message': response['message']['content'],
+                'message': reply,
+                'model': response.get('model') or self.model,
+                'usage': dict(self._usage([response]), **savings),
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
+            if self._unavailable(e):
+                return {
+                    'status': 'success',
+                    'message': str(await self._degraded_answer(prompt, facts, e, conversation)),
+                    'degraded': True,
+                    'usage': self._usage([]),
+                    'timestamp': datetime.now().isoformat()
+                }
             return {
                 'status': 'error',
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             }
-            
-    async def analyze_document(self, text: str) -> Dict:
+
+    async def stream_response(self, prompt: str, context: str = "", facts: str = "",
+                              priority: Priority = Priority.INTERACTIVE, options: Optional[Dict] = None,
+                              conversation: Optional[Conversation] = None, task: str = 'chat',
+                              route: Optional[str] = None, degrade: bool = True, model: Optional[str] = None,
+                              final: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Yield the reply piece by piece as the backend generates it.
+
+        The turn is appended to the conversation only if the stream runs to
+        the end. ``task`` tells the router what kind of request this is and
+        ``route`` forces the fast or full model; ``model`` bypasses routing
+        altogether. ``final`` receives the backend's last response, which
+        carries the token counts and timings. If the backend is
+        unavailable before anything was generated and ``degrade`` is set, a
+        DegradedAnswer is yielded in one piece and the conversation is left
+        as it was.
+        """
+        conversation, content, messages = self._prepare(prompt, context, facts, conversation)
+        final = {} if final is None else final
+        pieces = []
+        route = self._route(task, prompt, facts, route) if model is None else None
+        try:
+            async for piece in self._stream(messages, priority, options=options, final=final, route=route,
+                                            model=model):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            if pieces or not degrade or priority is not Priority.INTERACTIVE or not self._unavailable(e):
+                raise
+            yield await self._degraded_answer(prompt, facts, e, conversation)
+            return
+        if 'response' in final:
+            self._finish_turn(conversation, content, ''.join(pieces), final['response'])
+
+    async def stream_completion(self, content: str, priority: Priority = Priority.INTERACTIVE,
+                                job: str = None, options: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Stream a raw prompt; closing the generator early stops generation on the backend"""
+        async for piece in self._stream(self._user_message(content), priority, job, options):
+            yield piece
+
+    async def _stream(self, messages: List[Dict], priority: Priority, job: str = None,
+                      options: Optional[Dict] = None, final: Optional[Dict] = None,
+                      route: Optional[str] = None, delays: Optional[Iterator[float]] = None,
+                      model: Optional[str] = None) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        pieces = asyncio.Queue()
+        stopped = threading.Event()
+        finished = object()
+        final = {} if final is None else final
+        model = model or self._model(route)
+        delays = delays if delays is not None else self.retry.delays()
+        fall_back = False
+        retry_after = None
+        # Per-request options such as a speculative num_predict cap win over the tuned profile
+        tuned = dict(self._options(model, priority, messages), **(options or {}))
+
+        def pump():
+            try:
+                stream = self.backend.chat(model=model, stream=True, options=tuned or None, messages=messages)
+                for part in stream:
+                    if stopped.is_set():
+                        break
+                    if part.get('done'):
+                        final['response'] = part
+                    loop.call_soon_threadsafe(pieces.put_nowait, part['message']['content'])
+                loop.call_soon_threadsafe(pieces.put_nowait, finished)
+            except Exception as e:
+                loop.call_soon_threadsafe(pieces.put_nowait, e)
+
+        await self.breaker.check()
+        waited = time.perf_counter()
+        async with self.scheduler.slot(priority, job):
+            started = time.perf_counter()
+            tracer.record('scheduler.wait', waited, started - waited, 'llm', priority=priority.name)
+            # The backend may have gone down while this request was queued
+            await self.breaker.check()
+            first_piece = None
+            failed = False
+            worker = loop.run_in_executor(None, pump)
+            try:
+                while True:
+                    piece = await pieces.get()
+                    if piece is finished:
+                        self.breaker.record_success()
+                        break
+                    if isinstance(piece, Exception):
+                        failed = True
+                        if first_piece is None and self._fall_back(route, piece):
+                            fall_back = True
+                            break
+                        # Once pieces were shown, a retry would repeat them
+                        retry_after = self._failed(piece, delays) if first_piece is None else None
+                        if retry_after is not None:
+                            break
+                        raise piece
+                    if first_piece is None and piece:
+                        first_piece = time.perf_counter() - started
+                    yield piece
+            finally:
+                # Stop generating if the consumer went away early
+                stopped.set()
+                await worker
+                duration = time.perf_counter() - started
+                tracer.record('llm.stream', started, duration, 'llm', model=model, priority=priority.name)
+                if 'response' in final:
+                    self._trace_response(final['response'], started, time.perf_counter(), first_piece)
+                self._record_route(route, duration, final.get('response'), failed)
+
+        if fall_back:
+            async for piece in self._stream(messages, priority, job, options, final, FULL):
+                yield piece
+        elif retry_after is not None:
+            # Back off without holding the scheduler slot
+            await asyncio.sleep(retry_after)
+            async for piece in self._stream(messages, priority, job, options, final, route, delays, model):
+                yield piece
+
+    async def analyze_document(self, text: str, job: str = None, figures: Optional[str] = None) -> Dict:
+        """Analyze a document chunk by chunk at background priority.
+
+        Every chunk waits for its own scheduler slot, so interactive chat
+        turns submitted mid-analysis are served between chunks. Given the
+        figures DocumentService extracted locally, only those are sent, in
+        a single call, instead of the text.
+        """
         try:
-            prompt = f"""Analyze this financial document and provide key insights:
-                        {text[:2000]}...
-                        
+            job = job or f"document-{uuid.uuid4().hex[:8]}"
+            chunks = self._split_chunks(text)
+
+            if figures:
+                response = await self._analyze_figures(figures, job)
+                responses = [response]
+                message = response['message']['content']
+            elif len(chunks) <= 1:
+                prompt = f"""Analyze this financial document and provide key insights:
+                        {text}
+
+                        Provide a brief summary and any relevant financial advice in the context of having won a million dollars."""
+                response = await self._chat(self._user_message(prompt), Priority.BACKGROUND, job,
+                                            self._route('document_reduce', text))
+                responses = [response]
+                message = response['message']['content']
+            else:
+                notes = []
+                responses = []
+                for index, chunk in enumerate(chunks, start=1):
+                    prompt = f"""This is part {index} of {len(chunks)} of a financial document.
+                        Extract the key figures, holdings, fees and obligations as short bullet points:
+                        {chunk}"""
+                    response = await self._chat(self._user_message(prompt), Priority.BACKGROUND, job,
+                                                self._route('document_chunk', chunk))
+                    responses.append(response)
+                    notes.append(response['message']['content'])
+
+                prompt = f"""Analyze these notes taken from a financial document and provide key insights:
+                        {chr(10).join(notes)}
+
                         Provide a brief summary and any relevant financial advice in the context of having won a million dollars."""
-            
-            response = ollama.chat(model=self.model, messages=[{
-                'role': 'user',
-                'content': prompt
-            }])
-            
+                response = await self._chat(self._user_message(prompt), Priority.BACKGROUND, job,
+                                            self._route('document_reduce', prompt))
+                responses.append(response)
+                message = response['message']['content']
+
+            return {
+                'status': 'success',
+                'message': message,
+                'usage': self._usage(responses),
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    async def analyze_pages(self, pages: List[Dict], job: str = None, figures: Optional[str] = None) -> Dict:
+        """Analyze a document page by page, reusing notes carried over from an earlier version.
+
+        Each page dict has ``text`` and ``changed`` plus ``notes`` when they
+        are already known, as returned by DocumentService.read_pdf_incremental.
+        Only pages without notes cost a model call; the summary is then
+        rebuilt from all notes, with new or changed pages marked. The notes
+        are returned per page so they can be cached for the next version.
+        With locally extracted figures, only those are sent and existing
+        notes are carried over untouched.
+        """
+        try:
+            job = job or f"document-{uuid.uuid4().hex[:8]}"
+            text = ''.join(page['text'] for page in pages)
+            if figures:
+                response = await self._analyze_figures(figures, job)
+                return {
+                    'status': 'success',
+                    'message': response['message']['content'],
+                    'notes': [page.get('notes') for page in pages],
+                    'analyzed_pages': 0,
+                    'reused_pages': sum(1 for page in pages if page.get('notes') is not None),
+                    'usage': self._usage([response]),
+                    'timestamp': datetime.now().isoformat()
+                }
+            if all(page.get('notes') is None for page in pages) and len(text) <= self.chunk_size:
+                # Small documents are cheaper to analyze in one call than page by page
+                result = await self.analyze_document(text, job)
+                return dict(result, notes=[None] * len(pages), analyzed_pages=len(pages), reused_pages=0)
+
+            notes = []
+            responses = []
+            for index, page in enumerate(pages, start=1):
+                if page.get('notes') is not None or not page['text'].strip():
+                    notes.append(page.get('notes') or '')
+                    continue
+                page_notes = []
+                for chunk in self._split_chunks(page['text']):
+                    prompt = f"""This is page {index} of {len(pages)} of a financial document.
+                        Extract the key figures, holdings, fees and obligations as short bullet points:
+                        {chunk}"""
+                    response = await self._chat(self._user_message(prompt), Priority.BACKGROUND, job,
+                                                self._route('document_chunk', chunk))
+                    responses.append(response)
+                    page_notes.append(response['message']['content'])
+                notes.append('\n'.join(page_notes))
+
+            sections = [
+                f"Page {index}{' (new or changed since the last version)' if page.get('changed') else ''}:\n{note}"
+                for index, (page, note) in enumerate(zip(pages, notes), start=1) if note
+            ]
+            prompt = f"""Analyze these notes taken from a financial document and provide key insights:
+                        {chr(10).join(sections)}
+
+                        Provide a brief summary and any relevant financial advice in the context of having won a million dollars.
+                        Point out what is new or changed since the last version, if anything."""
+            response = await self._chat(self._user_message(prompt), Priority.BACKGROUND, job,
+                                        self._route('document_reduce', prompt))
+            responses.append(response)
+
+            analyzed = sum(1 for page in pages if page.get('notes') is None and page['text'].strip())
+            tracer.count('document.pages_analyzed', analyzed)
             return {
                 'status': 'success',
                 'message': response['message']['content'],
+                'notes': notes,
+                'analyzed_pages': analyzed,
+                'reused_pages': sum(1 for page in pages if page.get('notes') is not None),
+                'usage': self._usage(responses),
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -56,3 +323,215 @@ class LLMService:
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             }
+
+    async def _analyze_figures(self, figures: str, job: str):
+        prompt = f"""These figures were extracted from a financial document and computed exactly:
+                        {figures}
+
+                        Provide a brief summary and any relevant financial advice in the context of having won a million dollars.
+                        Quote the figures as given rather than recalculating them."""
+        return await self._chat(self._user_message(prompt), Priority.BACKGROUND, job,
+                                self._route('document_reduce', prompt))
+
+    def _prepare(self, prompt: str, context: str, facts: str, conversation: Optional[Conversation]):
+        """Conversation, new user message and full message list for one turn"""
+        with tracer.span('llm.prompt_build', 'llm') as span:
+            content = self._user_content(prompt, facts)
+            if conversation is None:
+                # One-off turn: the stable system prompt still comes first so it stays cached
+                conversation = Conversation()
+                if context:
+                    content = f"Previous conversation:\n{context}\n\n{content}"
+            messages = conversation.request(content)
+            span.update(characters=sum(len(message['content']) for message in messages),
+                        messages=len(messages))
+        return conversation, content, messages
+
+    @staticmethod
+    def _user_content(prompt: str, facts: str = "") -> str:
+        if not facts:
+            return prompt
+        # Precomputed figures the model should quote rather than estimate
+        return f"Computed figures (cite these exactly instead of estimating your own):\n{facts}\n\n{prompt}"
+
+    @staticmethod
+    def _user_message(content: str) -> List[Dict]:
+        return [{'role': 'user', 'content': content}]
+
+    def _finish_turn(self, conversation: Conversation, content: str, reply: str, response) -> Dict:
+        """Append the turn and measure how much prefill the cached prefix saved.
+
+        Ollama only reports the prompt tokens it actually evaluated. The
+        transcript so far is known from earlier turns' counts and the new
+        message is estimated at four characters per token; the difference
+        is what a full re-prefill would have cost on top.
+        """
+        evaluated = response.get('prompt_eval_count') or 0
+        completion = response.get('eval_count') or 0
+        total = evaluated
+        if conversation.prefix_tokens:
+            total = max(evaluated, conversation.prefix_tokens + len(content) // 4)
+        saved = total - evaluated
+
+        prefill = (response.get('prompt_eval_duration') or 0) / 1e9
+        rate = evaluated / prefill if evaluated and prefill else tracer.latest('llm.prefill_tokens_per_second')
+        saved_seconds = saved / rate if saved and rate else 0.0
+
+        conversation.append(content, reply, total + completion)
+        tracer.observe('llm.prefill_tokens_evaluated', evaluated)
+        tracer.count('llm.prefill_tokens_saved', saved)
+        tracer.observe('llm.prefill_seconds_saved', saved_seconds)
+        return {'prefill_tokens_saved': saved, 'prefill_seconds_saved': saved_seconds}
+
+    def _route(self, task: str, text: str, facts: str = "", route: Optional[str] = None) -> Optional[str]:
+        """Route for a request, or None when routing is off"""
+        if self.router is None:
+            return None
+        if route is not None:
+            return self.router.force(route)
+        route, rule = self.router.route(task, text, facts)
+        tracer.count(f'router.{route}')
+        return route
+
+    def _model(self, route: Optional[str]) -> str:
+        return self.model if route is None else self.router.model(route)
+
+    def _options(self, model: str, priority: Priority, messages: List[Dict]) -> Dict:
+        """Tuned options for a model; background requests are document analysis"""
+        # Four characters per token, as for the prefill estimate
+        prompt_tokens = sum(len(message['content']) for message in messages) // 4
+        return self.profiles.options(model, 'document' if priority is Priority.BACKGROUND else 'chat',
+                                     prompt_tokens)
+
+    def _fall_back(self, route: Optional[str], error: Exception) -> bool:
+        """Whether to retry on the full model because the routed model is not installed"""
+        if route is None or route == FULL or getattr(error, 'status_code', None) != 404:
+            return False
+        self.router.mark_unavailable(route)
+        tracer.count('router.fallbacks')
+        return True
+
+    def _failed(self, error: Exception, delays: Iterator[float]) -> Optional[float]:
+        """Count a failed attempt; seconds to back off before retrying, or None to give up"""
+        if not self.backend.transient(error):
+            return None
+        self.breaker.record_failure(error)
+        delay = next(delays, None)
+        if delay is not None:
+            tracer.count('llm.retries')
+        return delay
+
+    def _unavailable(self, error: Exception) -> bool:
+        """Whether a request failed because the backend is down rather than because of the request"""
+        return isinstance(error, BackendUnavailable) or self.backend.transient(error)
+
+    async def _degraded_answer(self, prompt: str, facts: str, error: Exception,
+                               conversation: Conversation) -> DegradedAnswer:
+        """Best answer available without the model: an earlier reply in this conversation and computed figures"""
+        tracer.count('llm.degraded_answers')
+        reason = str(error) if isinstance(error, BackendUnavailable) else f"Model backend unavailable ({error})"
+        parts = [f"{reason}. Until it is back, answers are put together from saved and computed information."]
+        cached = conversation.reply_to(prompt)
+        if cached:
+            parts.append(f"Earlier answer to the same question in this conversation:\n{cached}")
+        if not facts:
+            tables = await self.calculator.scenarios_for(prompt)
+            facts = '\n\n'.join(CalculatorService.format_table(table) for table in tables)
+        if facts:
+            parts.append(f"Computed figures for your question:\n{facts}")
+        if not cached and not facts:
+            parts.append("Please ask again in a moment.")
+        return DegradedAnswer('\n\n'.join(parts))
+
+    def _record_route(self, route: Optional[str], seconds: float, response, error: bool = False):
+        if route is not None:
+            completion_tokens = (response.get('eval_count') or 0) if response else 0
+            self.router.record(route, seconds, completion_tokens, error)
+
+    async def _chat(self, messages: List[Dict], priority: Priority, job: str = None, route: Optional[str] = None,
+                    delays: Optional[Iterator[float]] = None):
+        model = self._model(route)
+        delays = delays if delays is not None else self.retry.delays()
+        retry_after = None
+        await self.breaker.check()
+        waited = time.perf_counter()
+        async with self.scheduler.slot(priority, job):
+            started = time.perf_counter()
+            tracer.record('scheduler.wait', waited, started - waited, 'llm', priority=priority.name)
+            await self.breaker.check()
+            try:
+                with tracer.span('llm.chat', 'llm', model=model, priority=priority.name):
+                    response = await asyncio.to_thread(self.backend.chat, model=model, messages=messages,
+                                                       options=self._options(model, priority, messages) or None)
+                self.breaker.record_success()
+            except Exception as e:
+                self._record_route(route, time.perf_counter() - started, None, error=True)
+                if not self._fall_back(route, e):
+                    retry_after = self._failed(e, delays)
+                    if retry_after is None:
+                        raise
+                response = None
+        if retry_after is not None:
+            await asyncio.sleep(retry_after)
+            return await self._chat(messages, priority, job, route, delays)
+        if response is None:
+            return await self._chat(messages, priority, job, FULL)
+        self._trace_response(response, started, time.perf_counter())
+        self._record_route(route, time.perf_counter() - started, response)
+        return response
+
+    @staticmethod
+    def _trace_response(response, started: float, finished: float, time_to_first_token: float = None):
+        """Turn backend timing metadata into spans and throughput observations"""
+        load = (response.get('load_duration') or 0) / 1e9
+        prefill = (response.get('prompt_eval_duration') or 0) / 1e9
+        generate = (response.get('eval_duration') or 0) / 1e9
+        # Whatever the backend did not account for was spent on the wire or in its queue
+        queued = max(finished - started - load - prefill - generate, 0.0)
+
+        cursor = started
+        for name, seconds in (('ollama.queue', queued), ('ollama.load', load),
+                              ('ollama.prefill', prefill), ('ollama.generate', generate)):
+            if seconds:
+                tracer.record(name, cursor, seconds, 'ollama')
+                cursor += seconds
+
+        prompt_tokens = response.get('prompt_eval_count') or 0
+        completion_tokens = response.get('eval_count') or 0
+        tracer.count('llm.requests')
+        tracer.count('llm.prompt_tokens', prompt_tokens)
+        tracer.count('llm.completion_tokens', completion_tokens)
+        if prefill:
+            tracer.observe('llm.prefill_tokens_per_second', prompt_tokens / prefill)
+        if generate:
+            tracer.observe('llm.tokens_per_second', completion_tokens / generate)
+        if time_to_first_token is None:
+            # Without streaming the first token arrives after queueing, loading and prefill
+            time_to_first_token = queued + load + prefill
+        tracer.observe('llm.time_to_first_token', time_to_first_token)
+
+    @staticmethod
+    def _usage(responses: List) -> Dict:
+        """Sum token counts and generation time reported by the backend"""
+        return {
+            'prompt_tokens': sum(response.get('prompt_eval_count') or 0 for response in responses),
+            'completion_tokens': sum(response.get('eval_count') or 0 for response in responses),
+            'eval_seconds': sum(response.get('eval_duration') or 0 for response in responses) / 1e9,
+        }
+
+    def _split_chunks(self, text: str) -> List[str]:
+        """Split text into chunks of roughly chunk_size characters on line breaks"""
+        chunks = []
+        current = []
+        length = 0
+        for line in text.splitlines(keepends=True):
+            for start in range(0, len(line), self.chunk_size):
+                piece = line[start:start + self.chunk_size]
+                if current and length + len(piece) > self.chunk_size:
+                    chunks.append(''.join(current))
+                    current, length = [], 0
+                current.append(piece)
+                length += len(piece)
+        if current:
+            chunks.append(''.join(current))
+        return chunks
@@ -0,0 +1,56 @@
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Union
+
+
+class ChatMessage:
+    """One entry of a chat journal.
+
+    Senders are interned so a long session shares one string per sender,
+    and the creation time is kept as epoch seconds; the ISO timestamp is
+    only produced when the entry is serialized. Without a per-instance
+    dict a record costs about a quarter of the equivalent dict entry.
+    """
+    __slots__ = ('sender', 'message', 'created')
+
+    def __init__(self, sender: str, message: str, created: float = None):
+        self.sender = sys.intern(sender)
+        self.message = message
+        self.created = time.time() if created is None else created
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created).isoformat()
+
+    def to_dict(self) -> Dict:
+        """Session file entry, as written before records existed"""
+        entry = {'sender': self.sender, 'message': self.message}
+        if self.created:
+            entry['timestamp'] = self.timestamp
+        return entry
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'ChatMessage':
+        timestamp = entry.get('timestamp')
+        if isinstance(timestamp, str):
+            created = datetime.fromisoformat(timestamp).timestamp()
+        elif isinstance(timestamp, (int, float)):
+            created = float(timestamp)
+        else:
+            # Loaded entry without a time; written back without one too
+            created = 0.0
+        return cls(entry.get('sender') or '', entry.get('message') or '', created)
+
+    def __repr__(self) -> str:
+        return f"ChatMessage({self.sender!r}, {self.message[:40]!r}, {self.created!r})"
+
+
+def as_messages(entries: Iterable[Union[ChatMessage, Dict]]) -> List[ChatMessage]:
+    """Records for a mix of records and session file dicts"""
+    return [entry if isinstance(entry, ChatMessage) else ChatMessage.from_dict(entry) for entry in entries]
+
+
+def as_dicts(entries: Iterable[Union[ChatMessage, Dict]]) -> List[Dict]:
+    """Session file dicts for a mix of records and dicts"""
+    return [entry.to_dict() if isinstance(entry, ChatMessage) else entry for entry in entries]
@@ -0,0 +1,13 @@
+import re
+
+# Matches patterns like $1000, $1,000, $1000.00, $1,000.00
+CURRENCY_PATTERN = re.compile(r'\$((?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{2})?)')
+
+# Matches patterns like 10%, 10.5%, 0.5%
+PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?%)(?!\*\*)')
+
+# Matches 2024-05-31, 05/31/2024 and May 31, 2024
+DATE_PATTERN = re.compile(
+    r'\b(?=[\dJFMASOND])(?:(\d{4})-(\d{2})-(\d{2})|(\d{1,2})/(\d{1,2})/(\d{4})|'
+    r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.? (\d{1,2}), (\d{4}))\b'
+)
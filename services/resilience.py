@@ -0,0 +1,135 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+from ttbzrs_millionaire.services.instrumentation import tracer
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class BackendUnavailable(RuntimeError):
+    """The circuit breaker is open: the backend failed recently and is not retried yet"""
+
+
+class DegradedAnswer(str):
+    """Reply put together without the model during an outage.
+
+    Yielded by LLMService.stream_response in place of generated pieces so
+    callers can tell it apart and keep it out of saved history.
+    """
+    __slots__ = ()
+
+
+class CircuitBreaker:
+    """Stops sending requests to a backend that keeps failing.
+
+    After ``failure_threshold`` consecutive transient failures the breaker
+    opens and every request fails immediately. Once ``reset_timeout``
+    seconds have passed, one caller runs the health ``probe``; if it
+    succeeds the breaker closes, otherwise it stays open and the wait
+    doubles, up to ``max_reset_timeout``.
+    """
+
+    def __init__(self, probe: Callable[[], None], failure_threshold: int = 3,
+                 reset_timeout: float = 5.0, max_reset_timeout: float = 60.0):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = CLOSED
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._wait = reset_timeout
+        self._opened_at = 0.0
+        self._opened = 0
+        self._rejected = 0
+
+    async def check(self):
+        """Raise BackendUnavailable unless a request may go to the backend now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN or time.monotonic() - self._opened_at < self._wait:
+                # Still waiting, or another caller is already probing
+                self._rejected += 1
+                raise BackendUnavailable(self._reason())
+            self.state = HALF_OPEN
+
+        try:
+            with tracer.span('llm.health_probe', 'llm'):
+                await asyncio.to_thread(self.probe)
+        except Exception as e:
+            with self._lock:
+                self._open(str(e), backoff=True)
+                self._rejected += 1
+                raise BackendUnavailable(self._reason()) from e
+        except BaseException:
+            # Cancelled mid-probe: reopen so a later caller probes again instead of waiting forever
+            with self._lock:
+                self._open(self.last_error or "health probe cancelled", backoff=False)
+            raise
+        self.record_success()
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                tracer.count('breaker.closed')
+            self.state = CLOSED
+            self._failures = 0
+            self._wait = self.reset_timeout
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self._failures += 1
+            self.last_error = str(error)
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(str(error), backoff=self.state == HALF_OPEN)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                'opened': self._opened,
+                'rejected': self._rejected,
+                'retry_in': (max(0.0, self._wait - (time.monotonic() - self._opened_at))
+                             if self.state != CLOSED else None),
+                'last_error': self.last_error,
+            }
+
+    # The helpers below must be called with self._lock held
+
+    def _open(self, error: str, backoff: bool):
+        if self.state == CLOSED:
+            self._opened += 1
+            tracer.count('breaker.opened')
+        if backoff:
+            self._wait = min(self._wait * 2, self.max_reset_timeout)
+        self.state = OPEN
+        self.last_error = error
+        self._opened_at = time.monotonic()
+
+    def _reason(self) -> str:
+        retry_in = max(0.0, self._wait - (time.monotonic() - self._opened_at))
+        return f"Model backend unavailable ({self.last_error}); retrying in {retry_in:.0f}s"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter between attempts"""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0,
+                 seed: Optional[int] = None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.random = random.Random(seed)
+
+    def delays(self) -> Iterator[float]:
+        """Seconds to wait before each retry; spreads retries of clients that failed together"""
+        for attempt in range(self.attempts - 1):
+            yield self.random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
@@ -0,0 +1,159 @@
+import re
+import threading
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+FAST = 'fast'
+FULL = 'full'
+
+# Planning and advice questions that deserve the full model however short they are
+COMPLEX_PATTERN = re.compile(
+    r'\b(plan\w*|strateg\w*|compare|comparison|vs\.?|versus|allocat\w*|portfolio|retire\w*|tax\w*|'
+    r'invest\w*|mortgage|debt|annuit\w*|should i|how much|pros and cons|explain|why|analy[sz]\w*)\b',
+    re.IGNORECASE
+)
+
+
+class RoutingRule:
+    """Send matching requests to a route; every given condition must hold"""
+    __slots__ = ('name', 'route', 'tasks', 'pattern', 'max_words', 'with_facts')
+
+    def __init__(self, name: str, route: str, tasks: Sequence[str] = ('chat',),
+                 pattern: Optional[Pattern] = None, max_words: Optional[int] = None,
+                 with_facts: Optional[bool] = None):
+        self.name = name
+        self.route = route
+        self.tasks = tuple(tasks)
+        self.pattern = pattern
+        self.max_words = max_words
+        self.with_facts = with_facts
+
+    def matches(self, task: str, text: str, facts: str) -> bool:
+        if task not in self.tasks:
+            return False
+        if self.with_facts is not None and bool(facts) != self.with_facts:
+            return False
+        if self.pattern is not None and not self.pattern.search(text):
+            return False
+        if self.max_words is not None and len(text.split()) > self.max_words:
+            return False
+        return True
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'route': self.route,
+            'tasks': list(self.tasks),
+            'pattern': self.pattern.pattern if self.pattern is not None else None,
+            'max_words': self.max_words,
+            'with_facts': self.with_facts,
+        }
+
+
+# Checked in order; the first match decides
+DEFAULT_RULES = [
+    RoutingRule('document_reduce', FULL, tasks=('document_reduce',)),
+    RoutingRule('document_notes', FAST, tasks=('document_chunk',)),
+    RoutingRule('speculation', FAST, tasks=('speculation',)),
+    RoutingRule('computed_figures', FULL, with_facts=True),
+    RoutingRule('planning_question', FULL, pattern=COMPLEX_PATTERN),
+    RoutingRule('short_turn', FAST, max_words=12),
+]
+
+
+class ModelRouter:
+    """Picks the model for each request from cheap text heuristics.
+
+    Short conversational turns, per-chunk document notes and speculative
+    follow-ups go to a small fast model; planning questions, turns that
+    cite computed figures and document summaries go to the full model.
+    ``override`` forces every request onto one route. A fast model that
+    the backend does not have is switched off after the first failure.
+    """
+
+    def __init__(self, full_model: str = "llama3.2", fast_model: str = "llama3.2:1b",
+                 rules: Optional[List[RoutingRule]] = None, default_route: str = FULL,
+                 samples: int = 1_000):
+        self.models = {FAST: fast_model, FULL: full_model}
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.default_route = default_route
+        self.override: Optional[str] = None
+        self.unavailable = set()
+        self._lock = threading.Lock()
+        self._rule_hits = defaultdict(int)
+        self._requests = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._tokens = defaultdict(int)
+        self._latencies = defaultdict(lambda: deque(maxlen=samples))
+
+    def route(self, task: str, text: str, facts: str = "") -> Tuple[str, str]:
+        """Route name and the rule that chose it"""
+        if self.override is not None:
+            route, rule = self.override, 'override'
+        else:
+            route, rule = self.default_route, 'default'
+            for candidate in self.rules:
+                if candidate.matches(task, text, facts):
+                    route, rule = candidate.route, candidate.name
+                    break
+        if route in self.unavailable:
+            route, rule = FULL, f"{rule} (fallback)"
+        with self._lock:
+            self._rule_hits[rule] += 1
+        return route, rule
+
+    def force(self, route: str) -> str:
+        """Route chosen by the caller for a single request"""
+        self._check(route)
+        with self._lock:
+            self._rule_hits['request'] += 1
+        return FULL if route in self.unavailable else route
+
+    def model(self, route: str) -> str:
+        return self.models[route]
+
+    def set_override(self, route: Optional[str]):
+        """Send every request to one route, or back to the rules with None"""
+        if route is not None:
+            self._check(route)
+        self.override = route
+
+    def mark_unavailable(self, route: str):
+        """Stop routing to a model the backend cannot serve"""
+        if route != FULL:
+            self.unavailable.add(route)
+
+    def record(self, route: str, seconds: float, completion_tokens: int = 0, error: bool = False):
+        with self._lock:
+            self._requests[route] += 1
+            if error:
+                self._errors[route] += 1
+                return
+            self._tokens[route] += completion_tokens
+            self._latencies[route].append(seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            routes = {}
+            for route, model in self.models.items():
+                latencies = sorted(self._latencies[route])
+                routes[route] = {
+                    'model': model,
+                    'available': route not in self.unavailable,
+                    'requests': self._requests[route],
+                    'errors': self._errors[route],
+                    'completion_tokens': self._tokens[route],
+                    'latency_p50': latencies[len(latencies) // 2] if latencies else None,
+                    'latency_p95': (latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                                    if latencies else None),
+                }
+            return {
+                'override': self.override,
+                'routes': routes,
+                'rule_hits': dict(self._rule_hits),
+                'rules': [rule.to_dict() for rule in self.rules],
+            }
+
+    def _check(self, route: str):
+        if route not in self.models:
+            raise ValueError(f"Unknown route: {route}")
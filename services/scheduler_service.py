@@ -0,0 +1,148 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, Optional
+
+
+class Priority(IntEnum):
+    """Request classes, lower values are served first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    # Work nobody has asked for yet, e.g. prefetched follow-up answers
+    SPECULATIVE = 2
+
+
+class _Ticket:
+    __slots__ = ('priority', 'job', 'loop', 'future', 'enqueued_at', 'granted')
+
+    def __init__(self, priority: Priority, job: str, loop: asyncio.AbstractEventLoop):
+        self.priority = priority
+        self.job = job
+        self.loop = loop
+        self.future = loop.create_future()
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class RequestScheduler:
+    """Orders access to the model backend across threads and event loops.
+
+    Each priority class has its own concurrency limit on top of a global
+    limit. When a slot frees up, classes are tried in priority order and
+    the first one with a waiting request and room under its own limit gets
+    it, so waiting interactive requests go before background ones, and
+    within a class jobs are served round-robin so one large document cannot
+    monopolise the background slots. Speculative requests come last: they
+    get a slot only when no higher class can use it, either because nothing
+    is waiting there or because that class is at its limit, and are
+    limited to one at a time unless configured otherwise.
+    """
+
+    def __init__(self, max_concurrent: int = 1, class_limits: Optional[Dict[Priority, int]] = None):
+        self.max_concurrent = max_concurrent
+        self.class_limits = {
+            Priority.INTERACTIVE: max_concurrent,
+            Priority.BACKGROUND: max_concurrent,
+            Priority.SPECULATIVE: 1,
+        }
+        if class_limits:
+            self.class_limits.update(class_limits)
+
+        self._lock = threading.Lock()
+        self._anonymous = itertools.count()
+        # priority -> OrderedDict(job -> deque of waiting tickets)
+        self._queues = {priority: OrderedDict() for priority in Priority}
+        self._running = {priority: 0 for priority in Priority}
+        self._completed = {priority: 0 for priority in Priority}
+        self._total_wait = {priority: 0.0 for priority in Priority}
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE, job: str = None):
+        """Wait for a slot in the given class and hold it for the block"""
+        ticket = _Ticket(Priority(priority), job or f"anon-{next(self._anonymous)}", asyncio.get_running_loop())
+        with self._lock:
+            self._queues[ticket.priority].setdefault(ticket.job, deque()).append(ticket)
+            self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if ticket.granted:
+                    self._release(ticket)
+                else:
+                    self._discard(ticket)
+            raise
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._release(ticket)
+
+    def waiting(self, priority: Priority) -> int:
+        """Number of requests queued in a priority class"""
+        with self._lock:
+            return sum(len(tickets) for tickets in self._queues[priority].values())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                priority.name.lower(): {
+                    'running': self._running[priority],
+                    'waiting': sum(len(tickets) for tickets in self._queues[priority].values()),
+                    'completed': self._completed[priority],
+                    'avg_wait': (self._total_wait[priority] / self._completed[priority]
+                                 if self._completed[priority] else 0.0),
+                    'limit': self.class_limits[priority],
+                }
+                for priority in Priority
+            }
+
+    # The helpers below must be called with self._lock held
+
+    def _dispatch(self):
+        while sum(self._running.values()) < self.max_concurrent:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            ticket.granted = True
+            self._running[ticket.priority] += 1
+            self._total_wait[ticket.priority] += time.monotonic() - ticket.enqueued_at
+            ticket.loop.call_soon_threadsafe(self._resolve, ticket.future)
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        for priority in Priority:
+            jobs = self._queues[priority]
+            if not jobs or self._running[priority] >= self.class_limits[priority]:
+                continue
+            # Round-robin across jobs: serve the head job, then rotate it to the back
+            job, tickets = next(iter(jobs.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                jobs.move_to_end(job)
+            else:
+                del jobs[job]
+            return ticket
+        return None
+
+    def _release(self, ticket: _Ticket):
+        self._running[ticket.priority] -= 1
+        self._completed[ticket.priority] += 1
+        self._dispatch()
+
+    def _discard(self, ticket: _Ticket):
+        tickets = self._queues[ticket.priority].get(ticket.job)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self._queues[ticket.priority][ticket.job]
+
+    @staticmethod
+    def _resolve(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
@@ -0,0 +1,337 @@
+import asyncio
+import inspect
+import itertools
+import multiprocessing
+import pickle
+import threading
+import time
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.instrumentation import tracer
+
+# Methods whose results are async iterators, forwarded piece by piece
+STREAMING_METHODS = {'stream_response', 'stream_completion', 'stream_comparison'}
+
+# Payloads larger than this go through shared memory instead of the pipe
+SHARED_MEMORY_THRESHOLD = 256 * 1024
+
+
+class ServiceUnavailable(RuntimeError):
+    """The service worker exited while handling a call, or keeps crashing"""
+
+
+def default_services(config: Dict) -> Dict[str, Any]:
+    """Services hosted for the GUI; runs in the worker process"""
+    from ttbzrs_millionaire.services.comparison_service import ComparisonService
+    from ttbzrs_millionaire.services.document_service import DEFAULT_CACHE_DIR, DocumentService
+    from ttbzrs_millionaire.services.llm_backends import StubBackend
+    from ttbzrs_millionaire.services.llm_service import LLMService
+    from ttbzrs_millionaire.services.scheduler_service import Priority, RequestScheduler
+    from ttbzrs_millionaire.services.session_service import SessionService
+
+    scheduler = RequestScheduler(
+        max_concurrent=config.get('max_concurrent', 2),
+        class_limits={Priority[name]: limit for name, limit in config.get('class_limits', {}).items()}
+    )
+    backend = StubBackend(**config['stub']) if config.get('stub') is not None else None
+    llm_service = LLMService(config.get('model', "llama3.2"), scheduler=scheduler, host=config.get('host'),
+                             backend=backend, fast_model=config.get('fast_model'))
+    return {
+        'llm': llm_service,
+        'comparison': ComparisonService(llm_service, memory_budget=config.get('compare_memory_bytes')),
+        'documents': DocumentService(config.get('cache_dir', DEFAULT_CACHE_DIR)),
+        'sessions': SessionService(config.get('sessions_dir', "sessions")),
+        'tracer': tracer,
+    }
+
+
+def _send(connection, message, lock: threading.Lock):
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) > SHARED_MEMORY_THRESHOLD:
+        block = shared_memory.SharedMemory(create=True, size=len(data))
+        block.buf[:len(data)] = data
+        block.close()
+        # The receiver unlinks the block once it has read it
+        resource_tracker.unregister(block._name, 'shared_memory')
+        data = pickle.dumps(('shm', block.name, len(data)))
+    with lock:
+        connection.send_bytes(data)
+
+
+def _receive(connection):
+    message = pickle.loads(connection.recv_bytes())
+    if message[0] == 'shm':
+        _, name, size = message
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            message = pickle.loads(block.buf[:size])
+        finally:
+            block.close()
+            block.unlink()
+    return message
+
+
+def _sync_state(args, kwargs) -> Dict:
+    """Conversations passed to a call, which the call may have appended to"""
+    return {key: value for key, value in itertools.chain(enumerate(args), kwargs.items())
+            if isinstance(value, Conversation)}
+
+
+def _serve(connection, factory: Callable[[Dict], Dict[str, Any]], config: Dict):
+    """Worker process: run hosted services on one event loop until the pipe closes"""
+    services = factory(config)
+    loop = asyncio.new_event_loop()
+    lock = threading.Lock()
+    tasks: Dict[int, asyncio.Task] = {}
+
+    def resolve(target: str):
+        name, *path = target.split('.')
+        value = services[name]
+        for attribute in path:
+            value = getattr(value, attribute)
+        return value
+
+    async def handle(request_id: int, target: str, args, kwargs):
+        try:
+            function = resolve(target)
+            if target.rsplit('.', 1)[-1] in STREAMING_METHODS:
+                async for piece in function(*args, **kwargs):
+                    _send(connection, ('piece', request_id, piece), lock)
+                result = None
+            else:
+                result = function(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            _send(connection, ('result', request_id, result, _sync_state(args, kwargs)), lock)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            try:
+                _send(connection, ('error', request_id, e), lock)
+            except Exception:
+                # Exceptions that cannot be pickled are sent as their message
+                _send(connection, ('error', request_id, RuntimeError(f"{type(e).__name__}: {e}")), lock)
+        finally:
+            tasks.pop(request_id, None)
+
+    def dispatch(message):
+        if message[0] == 'call':
+            _, request_id, target, args, kwargs = message
+            tasks[request_id] = loop.create_task(handle(request_id, target, args, kwargs))
+        elif message[0] == 'cancel' and message[1] in tasks:
+            tasks[message[1]].cancel()
+
+    def read():
+        try:
+            while True:
+                loop.call_soon_threadsafe(dispatch, _receive(connection))
+        except (EOFError, OSError):
+            # The host went away; nothing left to serve
+            loop.call_soon_threadsafe(loop.stop)
+
+    threading.Thread(target=read, daemon=True).start()
+    loop.run_forever()
+
+
+class ServiceHost:
+    """Runs services in a worker process so their CPU work never holds the GUI's GIL.
+
+    Calls are forwarded over a pipe and awaited on the caller's event loop;
+    large arguments and results, such as extracted PDF text, go through
+    shared memory. Conversations passed to a call are updated in place with
+    whatever the worker appended. If the worker dies, calls in flight fail
+    with ServiceUnavailable and a fresh worker is started, unless it has
+    crashed ``max_restarts`` times within ``restart_window`` seconds.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, factory: Callable[[Dict], Dict[str, Any]] = default_services,
+                 max_restarts: int = 5, restart_window: float = 60.0):
+        self.config = config or {}
+        self.factory = factory
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._send_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._ids = itertools.count()
+        # request id -> (loop, future or queue, args, kwargs)
+        self._pending: Dict[int, tuple] = {}
+        self._crashes = deque()
+        self._process = None
+        self._connection = None
+        self._stopping = False
+        self._failed: Optional[str] = None
+
+    def start(self):
+        with self._state_lock:
+            parent, child = self._context.Pipe()
+            self._process = self._context.Process(target=_serve, args=(child, self.factory, self.config),
+                                                  name="service-host", daemon=True)
+            self._process.start()
+            child.close()
+            self._connection = parent
+        threading.Thread(target=self._read, args=(parent, self._process), daemon=True).start()
+
+    def stop(self):
+        self._stopping = True
+        with self._state_lock:
+            if self._connection is not None:
+                self._connection.close()
+            if self._process is not None:
+                self._process.join(timeout=2)
+                if self._process.is_alive():
+                    self._process.terminate()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def proxy(self, name: str) -> 'ServiceProxy':
+        return ServiceProxy(self, name)
+
+    async def call(self, target: str, *args, **kwargs):
+        """Call ``service.method`` (or a dotted attribute path) in the worker"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with tracer.span('host.call', 'host', target=target):
+            request_id = self._request(target, args, kwargs, loop, future)
+            try:
+                return await future
+            except asyncio.CancelledError:
+                self._cancel(request_id)
+                raise
+
+    async def stream(self, target: str, *args, **kwargs) -> AsyncIterator:
+        """Iterate a streaming method in the worker; leaving early stops it there"""
+        loop = asyncio.get_running_loop()
+        pieces = asyncio.Queue()
+        request_id = self._request(target, args, kwargs, loop, pieces)
+        finished = False
+        try:
+            while True:
+                kind, value = await pieces.get()
+                if kind == 'piece':
+                    yield value
+                elif kind == 'error':
+                    finished = True
+                    raise value
+                else:
+                    finished = True
+                    return
+        finally:
+            if not finished:
+                self._cancel(request_id)
+
+    def _request(self, target: str, args, kwargs, loop, waiter) -> int:
+        if self._failed:
+            raise ServiceUnavailable(self._failed)
+        request_id = next(self._ids)
+        self._pending[request_id] = (loop, waiter, args, kwargs)
+        try:
+            _send(self._connection, ('call', request_id, target, args, kwargs), self._send_lock)
+        except (OSError, ValueError) as e:
+            self._pending.pop(request_id, None)
+            raise ServiceUnavailable(f"Service worker unavailable: {e}") from e
+        return request_id
+
+    def _cancel(self, request_id: int):
+        if self._pending.pop(request_id, None) is None:
+            return
+        try:
+            _send(self._connection, ('cancel', request_id), self._send_lock)
+        except (OSError, ValueError):
+            pass
+
+    def _read(self, connection, process):
+        """Deliver replies to waiting callers; restart the worker when it dies"""
+        try:
+            while True:
+                self._deliver(_receive(connection))
+        except (EOFError, OSError):
+            pass
+        if self._stopping:
+            return
+
+        process.join(timeout=1)
+        reason = f"Service worker exited with code {process.exitcode}"
+        tracer.count('host.crashes')
+        for request_id in list(self._pending):
+            self._deliver(('error', request_id, ServiceUnavailable(f"{reason} during the call")))
+
+        now = time.monotonic()
+        self._crashes.append(now)
+        while self._crashes and now - self._crashes[0] > self.restart_window:
+            self._crashes.popleft()
+        if len(self._crashes) > self.max_restarts:
+            self._failed = f"{reason}; gave up after {len(self._crashes)} crashes in {self.restart_window:.0f}s"
+            return
+        self.restarts += 1
+        tracer.count('host.restarts')
+        self.start()
+
+    def _deliver(self, message):
+        kind, request_id = message[0], message[1]
+        pending = self._pending.get(request_id)
+        if pending is None:
+            return
+        loop, waiter, args, kwargs = pending
+        if kind == 'piece':
+            loop.call_soon_threadsafe(waiter.put_nowait, ('piece', message[2]))
+            return
+
+        if self._pending.pop(request_id, None) is None:
+            # Cancelled by the caller in the meantime
+            return
+        if kind == 'result':
+            for key, conversation in message[3].items():
+                local = args[key] if isinstance(key, int) else kwargs[key]
+                local.messages[:] = conversation.messages
+                local.prefix_tokens = conversation.prefix_tokens
+        if isinstance(waiter, asyncio.Queue):
+            loop.call_soon_threadsafe(waiter.put_nowait, ('done' if kind == 'result' else 'error', message[2]))
+        elif kind == 'result':
+            loop.call_soon_threadsafe(_resolve, waiter, message[2], None)
+        else:
+            loop.call_soon_threadsafe(_resolve, waiter, None, message[2])
+
+
+def _resolve(future: asyncio.Future, result, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class ServiceProxy:
+    """Stand-in for a hosted service: ``await proxy.method(...)`` runs it in the worker.
+
+    Attribute access builds a dotted path, so ``proxy.router.stats()``
+    works too. Streaming methods return an async iterator instead.
+    """
+
+    def __init__(self, host: ServiceHost, path: str):
+        self._host = host
+        self._path = path
+
+    def __getattr__(self, name: str) -> 'ServiceProxy':
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return ServiceProxy(self._host, f"{self._path}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        if self._path.rsplit('.', 1)[-1] in STREAMING_METHODS:
+            return self._host.stream(self._path, *args, **kwargs)
+        return self._host.call(self._path, *args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"ServiceProxy({self._path!r})"
@@ -1,22 +1,26 @@
 import json
-from typing import Dict, List
+from typing import Dict, Sequence, Union
 from datetime import datetime
 import os
 
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.messages import ChatMessage, as_dicts, as_messages
+
 class SessionService:
     def __init__(self, storage_dir: str = "sessions"):
         self.storage_dir = storage_dir
         os.makedirs(storage_dir, exist_ok=True)
         
-    async def save_session(self, session_data: List[Dict], filename: str = None) -> Dict:
+    async def save_session(self, session_data: Sequence[Union[ChatMessage, Dict]], filename: str = None) -> Dict:
         try:
             if filename is None:
                 filename = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 
             filepath = os.path.join(self.storage_dir, filename)
             
-            with open(filepath, 'w') as file:
-                json.dump(session_data, file, indent=2)
+            with tracer.span('session.save', 'session', messages=len(session_data)), open(filepath, 'w') as file:
+                # Records are written in the original dict format so older sessions and tools still read them
+                json.dump(as_dicts(session_data), file, indent=2)
                 
             return {
                 'status': 'success',
@@ -30,10 +34,14 @@ class SessionService:
                 'timestamp': datetime.now().isoformat()
             }
             
-    async def load_session(self, filepath: str) -> Dict:
+    async def load_session(self, filepath: str, records: bool = False) -> Dict:
+        """Load a saved session as dicts, or as ChatMessage records with ``records``"""
         try:
-            with open(filepath, 'r') as file:
+            with tracer.span('session.load', 'session') as span, open(filepath, 'r') as file:
                 session_data = json.load(file)
+                if records:
+                    session_data = as_messages(session_data)
+                span['messages'] = len(session_data)
                 
             return {
                 'status': 'success',
@@ -46,3 +54,45 @@ class SessionService:
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             }
+            
+    async def list_sessions(self) -> Dict:
+        try:
+            sessions = []
+            for filename in sorted(os.listdir(self.storage_dir)):
+                if not filename.endswith('.json'):
+                    continue
+                filepath = os.path.join(self.storage_dir, filename)
+                sessions.append({
+                    'filename': filename,
+                    'size': os.path.getsize(filepath),
+                    'modified': datetime.fromtimestamp(os.path.getmtime(filepath)).isoformat()
+                })
+                
+            return {
+                'status': 'success',
+                'data': sessions,
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+            
+    async def delete_session(self, filename: str) -> Dict:
+        try:
+            filepath = os.path.join(self.storage_dir, filename)
+            os.remove(filepath)
+            
+            return {
+                'status': 'success',
+                'filepath': filepath,
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
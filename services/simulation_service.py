@@ -0,0 +1,221 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ttbzrs_millionaire.services.calculator_service import CalculatorService
+
+# Nominal annual (mean return, volatility) per asset class
+DEFAULT_ASSUMPTIONS = {
+    'stocks': (0.07, 0.16),
+    'bonds': (0.035, 0.06),
+    'real_estate': (0.05, 0.12),
+    'cash': (0.02, 0.01),
+}
+
+# Pairwise return correlations; unlisted pairs are uncorrelated
+DEFAULT_CORRELATIONS = {
+    ('stocks', 'bonds'): 0.1,
+    ('stocks', 'real_estate'): 0.5,
+    ('bonds', 'real_estate'): 0.2,
+}
+
+DEFAULT_ALLOCATION = {'stocks': 0.6, 'bonds': 0.3, 'cash': 0.1}
+
+# Questions that ask for a projection outright
+PROJECTION_PATTERN = re.compile(
+    r'\b(project\w*|simulat\w*|monte carlo|outlive|run(?:s|ning)? out of money|worth in \d+\s*(?:years?|yrs?)|'
+    r'(?:will|would|does|could|can) (?:it|this|that|the money|my money|my savings|my portfolio|[$\d][\w$,.]*) '
+    r'(?:last|hold out)|how long (?:will|would|does|could|can) .{0,40}?\blast)\b', re.IGNORECASE
+)
+# Words that make a horizon plus an amount a projection question too, e.g. "retire on $2M for 30 years"
+PROJECTION_CONTEXT_PATTERN = re.compile(r'\b(retire\w*|withdraw\w*|grow\w*|invest\w*|spend\w*)\b', re.IGNORECASE)
+# Smallest amount read as the starting balance rather than a price or a fee
+MIN_PRINCIPAL = 10_000
+YEARS_PATTERN = re.compile(r'(\d{1,2})\s*(?:years?|yrs?)\b', re.IGNORECASE)
+WITHDRAWAL_PATTERN = re.compile(
+    r'\$(\d{1,3}(?:,\d{3})+|\d+)(k)?\s*(?:a|per|/|each|every)\s*(?:year|yr|annum)', re.IGNORECASE
+)
+ALLOCATION_PATTERN = re.compile(r'(\d{1,3})\s*%\s*(stocks?|bonds?|cash|real estate)', re.IGNORECASE)
+
+
+class SimulationService:
+    """Monte Carlo projections of the windfall, vectorized over paths.
+
+    Each year the portfolio earns a normally distributed return whose mean
+    and volatility follow from the allocation, per-asset assumptions and
+    correlations (the portfolio is rebalanced annually), then pays an
+    inflation-adjusted withdrawal. Results are cached by parameter set.
+    """
+
+    def __init__(self, cache_size: int = 64):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def run_simulation(self, principal: float = 1_000_000, years: int = 30,
+                             allocation: Optional[Dict[str, float]] = None,
+                             annual_withdrawal: float = 40_000, inflation: float = 0.025,
+                             assumptions: Optional[Dict[str, Tuple[float, float]]] = None,
+                             paths: int = 100_000, seed: int = 0,
+                             percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict:
+        try:
+            allocation = allocation or DEFAULT_ALLOCATION
+            assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+            key = (
+                float(principal), int(years), tuple(sorted(allocation.items())), float(annual_withdrawal),
+                float(inflation), tuple(sorted(assumptions.items())), int(paths), int(seed), tuple(percentiles),
+            )
+
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is None:
+                cached = self.simulate(principal, years, allocation, annual_withdrawal, inflation,
+                                       assumptions, paths, seed, percentiles)
+                with self._lock:
+                    self._cache[key] = cached
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+            return {
+                'status': 'success',
+                'data': cached,
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    @staticmethod
+    def portfolio_moments(allocation: Dict[str, float],
+                          assumptions: Dict[str, Tuple[float, float]]) -> Tuple[float, float]:
+        """Mean and volatility of an annually rebalanced allocation"""
+        unknown = set(allocation) - set(assumptions)
+        if unknown:
+            raise ValueError(f"No return assumptions for: {', '.join(sorted(unknown))}")
+        total = sum(allocation.values())
+        if total <= 0:
+            raise ValueError("Allocation weights must sum to a positive number")
+
+        assets = sorted(allocation)
+        weights = np.array([allocation[asset] / total for asset in assets])
+        means = np.array([assumptions[asset][0] for asset in assets])
+        vols = np.array([assumptions[asset][1] for asset in assets])
+
+        correlation = np.eye(len(assets))
+        for i, first in enumerate(assets):
+            for j, second in enumerate(assets):
+                if i != j:
+                    correlation[i, j] = DEFAULT_CORRELATIONS.get(
+                        (first, second), DEFAULT_CORRELATIONS.get((second, first), 0.0)
+                    )
+        covariance = correlation * np.outer(vols, vols)
+        return float(weights @ means), float(np.sqrt(weights @ covariance @ weights))
+
+    def simulate(self, principal: float, years: int, allocation: Dict[str, float],
+                 annual_withdrawal: float, inflation: float, assumptions: Dict[str, Tuple[float, float]],
+                 paths: int, seed: int, percentiles: Sequence[float]) -> Dict:
+        if years < 1 or paths < 1:
+            raise ValueError("years and paths must be positive")
+        mean, volatility = self.portfolio_moments(allocation, assumptions)
+
+        rng = np.random.default_rng(seed)
+        # Returns below -100% are impossible for a long-only portfolio
+        returns = np.maximum(rng.normal(mean, volatility, size=(years, paths)), -1.0)
+        withdrawals = annual_withdrawal * (1 + inflation) ** np.arange(years)
+
+        balances = np.empty((years + 1, paths))
+        balances[0] = principal
+        depleted_year = np.full(paths, -1, dtype=np.int32)
+        for year in range(years):
+            balance = balances[year] * (1 + returns[year]) - withdrawals[year]
+            newly_depleted = (balance <= 0) & (depleted_year < 0)
+            depleted_year[newly_depleted] = year + 1
+            balances[year + 1] = np.maximum(balance, 0.0)
+
+        deflator = (1 + inflation) ** np.arange(years + 1)
+        trajectory = np.percentile(balances, percentiles, axis=1)
+        failed = depleted_year > 0
+
+        return {
+            'params': {
+                'principal': principal, 'years': years, 'allocation': dict(allocation),
+                'annual_withdrawal': annual_withdrawal, 'inflation': inflation, 'paths': paths, 'seed': seed,
+            },
+            'portfolio_return': mean,
+            'portfolio_volatility': volatility,
+            'percentiles': list(percentiles),
+            'final_balance': dict(zip(map(str, percentiles), trajectory[:, -1].round(2).tolist())),
+            'final_balance_real': dict(zip(map(str, percentiles),
+                                           (trajectory[:, -1] / deflator[-1]).round(2).tolist())),
+            # One row per year, one column per percentile
+            'trajectory': trajectory.T.round(2).tolist(),
+            'success_rate': float(1 - failed.mean()),
+            'median_depletion_year': float(np.median(depleted_year[failed])) if failed.any() else None,
+        }
+
+    @staticmethod
+    def params_from_text(message: str) -> Optional[Dict]:
+        """Simulation parameters mentioned in a chat message.
+
+        None unless the message asks for a projection and gives at least one
+        parameter; a projection of the defaults is not worth citing.
+        """
+        params = {}
+        years = YEARS_PATTERN.search(message)
+        if years:
+            params['years'] = max(1, min(int(years.group(1)), 60))
+        withdrawal = WITHDRAWAL_PATTERN.search(message)
+        if withdrawal:
+            amount = float(withdrawal.group(1).replace(',', ''))
+            params['annual_withdrawal'] = amount * 1000 if withdrawal.group(2) else amount
+        # The starting balance is the largest other amount, e.g. "$2.5 million"
+        remainder = message[:withdrawal.start()] + message[withdrawal.end():] if withdrawal else message
+        principals = [amount for amount in CalculatorService.parse_amounts(remainder) if amount >= MIN_PRINCIPAL]
+        if principals:
+            params['principal'] = max(principals)
+        allocation = {}
+        for weight, asset in ALLOCATION_PATTERN.findall(message):
+            asset = asset.lower().replace(' ', '_')
+            asset = asset if asset in DEFAULT_ASSUMPTIONS else asset + 's'
+            allocation[asset] = int(weight) / 100
+        if allocation:
+            params['allocation'] = allocation
+
+        asked = PROJECTION_PATTERN.search(message) or (
+            years and (withdrawal or principals) and PROJECTION_CONTEXT_PATTERN.search(message))
+        return params if asked and params else None
+
+    @staticmethod
+    def summarize(result: Dict) -> str:
+        """Short plain-text digest of a simulation for prompts and chat"""
+        params = result['params']
+        final = result['final_balance']
+        real = result['final_balance_real']
+        allocation = ', '.join(f"{weight:.0%} {asset.replace('_', ' ')}"
+                               for asset, weight in params['allocation'].items())
+        lines = [
+            f"Monte Carlo projection of ${params['principal']:,.0f} over {params['years']} years "
+            f"({params['paths']:,} paths, {allocation}, "
+            f"${params['annual_withdrawal']:,.0f}/year withdrawals rising with {params['inflation']:.1%} inflation):",
+            f"- Expected portfolio return {result['portfolio_return']:.1%}, "
+            f"volatility {result['portfolio_volatility']:.1%}",
+            f"- Probability the money lasts the full horizon: {result['success_rate']:.1%}",
+        ]
+        lines.extend(
+            f"- {percentile}th percentile ending balance: ${final[percentile]:,.0f} "
+            f"(${real[percentile]:,.0f} in today's dollars)"
+            for percentile in final
+        )
+        if result['median_depletion_year'] is not None:
+            lines.append(f"- When the money runs out, it does so after a median of "
+                         f"{result['median_depletion_year']:.0f} years")
+        return '\n'.join(lines)
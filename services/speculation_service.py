@@ -0,0 +1,90 @@
+import re
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.llm_service import LLMService
+from ttbzrs_millionaire.services.scheduler_service import Priority
+
+# Where users usually go after an answer; used when the model suggests too few questions
+DEFAULT_FOLLOWUPS = (
+    "Can you go into more detail on that?",
+    "What are the risks of this approach?",
+    "What are the tax implications?",
+)
+
+LIST_MARKER_PATTERN = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+
+
+class SpeculationService:
+    """Prefetches answers to likely follow-up questions while the user reads.
+
+    Everything runs at SPECULATIVE priority, so the scheduler only serves it
+    when no chat turn or document analysis is waiting and never runs more
+    than its class limit at once. Each generation is capped at a fixed
+    number of tokens, and cancelling the consuming task stops the backend
+    mid-generation. Given the conversation, every speculative turn branches
+    from it, so the backend reuses the cached transcript for each of them.
+    """
+
+    def __init__(self, llm_service: LLMService, followups: int = 3, max_tokens: int = 256,
+                 question_tokens: int = 96):
+        self.llm_service = llm_service
+        self.followups = followups
+        self.max_tokens = max_tokens
+        self.question_tokens = question_tokens
+
+    async def speculate(self, prompt: str, reply: str, conversation: Optional[Conversation] = None,
+                        facts_for: Optional[Callable[[str], Awaitable[str]]] = None
+                        ) -> AsyncIterator[Tuple[str, str, Conversation]]:
+        """Yield (question, answer, conversation) as each prefetched answer completes.
+
+        ``conversation`` should already end with the prompt and reply; the
+        yielded conversation is a branch that also contains the follow-up.
+        """
+        if conversation is None:
+            conversation = Conversation()
+            conversation.append(prompt, reply)
+        questions = await self.followup_questions(conversation)
+        for question in questions:
+            facts = await facts_for(question) if facts_for else ""
+            answer, branch = await self.answer(question, conversation, facts)
+            if answer:
+                tracer.count('speculation.answers')
+                yield question, answer, branch
+
+    async def followup_questions(self, conversation: Conversation) -> List[str]:
+        """Ask the model for the questions the user is most likely to ask next"""
+        request = (f"Before answering anything else: list the {self.followups} follow-up questions "
+                   "I am most likely to ask next. Write one short question per line and nothing else.")
+        pieces = []
+        async for piece in self.llm_service.stream_response(
+                request, priority=Priority.SPECULATIVE, options={'num_predict': self.question_tokens},
+                conversation=conversation.fork(), task='speculation'):
+            pieces.append(piece)
+        return self.parse_questions(''.join(pieces), self.followups)
+
+    async def answer(self, question: str, conversation: Conversation, facts: str = "") -> Tuple[str, Conversation]:
+        """Answer a follow-up on a branch of the conversation"""
+        branch = conversation.fork()
+        pieces = []
+        async for piece in self.llm_service.stream_response(
+                question, facts=facts, priority=Priority.SPECULATIVE,
+                options={'num_predict': self.max_tokens}, conversation=branch, task='speculation'):
+            pieces.append(piece)
+        return ''.join(pieces).strip(), branch
+
+    @staticmethod
+    def parse_questions(text: str, count: int) -> List[str]:
+        """Clean up a model-written question list, topped up with common follow-ups"""
+        questions = []
+        for line in text.splitlines():
+            line = LIST_MARKER_PATTERN.sub('', line).strip().strip('"')
+            if line.endswith('?') and line not in questions:
+                questions.append(line)
+        for question in DEFAULT_FOLLOWUPS:
+            if len(questions) >= count:
+                break
+            if question not in questions:
+                questions.append(question)
+        return questions[:count]
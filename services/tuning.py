@@ -0,0 +1,208 @@
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ttbzrs_millionaire.services.conversation import SYSTEM_PROMPT
+from ttbzrs_millionaire.services.llm_backends import LLMBackend
+
+DEFAULT_PROFILES_PATH = "tuning_profiles.json"
+PROFILES = ('chat', 'document')
+
+# Prompt and reply tokens of a typical request; a candidate's score is how long one takes
+TYPICAL_REQUEST = {
+    'chat': (150, 300),       # a new turn on a cached conversation prefix, a few paragraphs back
+    'document': (1100, 250),  # a full analysis chunk, short bullet notes back
+}
+
+# Smallest context each profile needs: long conversations, or a chunk plus its instructions
+MIN_CONTEXT = {'chat': 4096, 'document': 2048}
+
+# Tokens kept free for the reply when a prompt is checked against a tuned context size
+REPLY_HEADROOM = 1024
+
+CHAT_PROMPTS = [
+    "I just won a million dollars. What should I do first?",
+    "Should I pay off my mortgage or invest the money instead?",
+    "How would you split the money between index funds, bonds and cash?",
+]
+
+DOCUMENT_LINES = [
+    "Account balance as of statement date: $482,310.55",
+    "Dividend reinvested in index ETF: $1,204.18",
+    "Management fee 0.4% charged on portfolio value",
+    "Mortgage principal remaining $231,877.02 at 6.25% APR",
+    "Transfer to high-yield savings account $25,000.00",
+    "Estimated tax withholding on lump sum payout $118,420.90",
+]
+
+# Loads the model without sharing a prefix with any measured request
+WARM_UP = [{'role': 'user', 'content': "Reply with OK."}]
+
+
+def cold(messages: List[Dict], nonce: int) -> List[Dict]:
+    """The request with a unique first line, so Ollama's prompt cache cannot skip its prefill"""
+    first = dict(messages[0], content=f"[trial request {nonce}]\n{messages[0]['content']}")
+    return [first] + messages[1:]
+
+
+def machine_id() -> str:
+    """Profiles are only valid for the hardware they were measured on"""
+    return f"{platform.node()}-{platform.machine()}-{os.cpu_count()}cpu"
+
+
+def workload(profile: str) -> List[List[Dict]]:
+    """Representative requests for a profile, as chat message lists"""
+    if profile == 'chat':
+        return [[{'role': 'system', 'content': SYSTEM_PROMPT}, {'role': 'user', 'content': prompt}]
+                for prompt in CHAT_PROMPTS]
+    chunk = '\n'.join(DOCUMENT_LINES[index % len(DOCUMENT_LINES)] for index in range(80))
+    return [[{'role': 'user', 'content': f"""This is part 1 of 3 of a financial document.
+                        Extract the key figures, holdings, fees and obligations as short bullet points:
+                        {chunk}"""}]]
+
+
+class TuningProfiles:
+    """Tuned Ollama options per machine, model and profile, kept in a JSON file.
+
+    LLMService reads these for every request; ``tune.py`` writes them.
+    """
+
+    def __init__(self, path: str = DEFAULT_PROFILES_PATH, machine: Optional[str] = None):
+        self.path = path
+        self.machine = machine or machine_id()
+        self.data = {'machines': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as file:
+                    data = json.load(file)
+                if isinstance(data, dict):
+                    self.data = data
+            except (OSError, ValueError):
+                # Untuned defaults are better than refusing to start
+                pass
+
+    def options(self, model: str, profile: str, prompt_tokens: int = 0) -> Dict:
+        """Tuned options, with the context grown to fit a prompt longer than the profile was tuned for"""
+        entry = self.data.get('machines', {}).get(self.machine, {}).get(model, {}).get(profile)
+        options = dict(entry.get('options') or {}) if entry else {}
+        context = options.get('num_ctx')
+        if context and prompt_tokens + REPLY_HEADROOM > context:
+            # Ollama silently drops the start of a prompt that does not fit, e.g. a long map-reduce summary
+            while context < prompt_tokens + REPLY_HEADROOM:
+                context *= 2
+            options['num_ctx'] = context
+        return options
+
+    def set(self, model: str, profile: str, options: Dict, measured: Dict):
+        self.data.setdefault('machines', {}).setdefault(self.machine, {}).setdefault(model, {})[profile] = {
+            'options': options,
+            'measured': measured,
+            'tuned_at': datetime.now().isoformat(),
+        }
+
+    def save(self):
+        # Write then rename so a running app never reads a half-written file
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as file:
+            json.dump(self.data, file, indent=2)
+        os.replace(temporary, self.path)
+
+
+class OptionsTuner:
+    """Finds the Ollama options that serve a profile's requests fastest on this machine.
+
+    Starting from Ollama's defaults with the profile's minimum context, one
+    option is varied at a time and the best value kept (coordinate
+    descent), which needs a handful of trials where a full grid would need
+    dozens of model reloads. Each trial reloads the model, warms it up,
+    then runs the profile's workload with a unique prefix on every request
+    so each one is a cold prefill, as a new document chunk would be;
+    prefill and generation throughput come from Ollama's timing metadata
+    and memory from the loaded model size. A candidate is scored by the
+    time a typical request for the profile would take at those rates.
+    """
+
+    def __init__(self, backend: LLMBackend, model: str, num_predict: int = 128, repeat: int = 1,
+                 max_memory: Optional[int] = None, candidates: Optional[Dict[str, List[int]]] = None):
+        self.backend = backend
+        self.model = model
+        self.num_predict = num_predict
+        self.repeat = repeat
+        self.max_memory = max_memory
+        self.candidates = candidates or self.default_candidates()
+        self.trials: List[Dict] = []
+        self._requests = 0
+
+    @staticmethod
+    def default_candidates() -> Dict[str, List[int]]:
+        cpus = os.cpu_count() or 4
+        return {
+            'num_thread': sorted({max(1, cpus // 2), max(1, cpus * 3 // 4), cpus}),
+            'num_batch': [128, 256, 512],
+            'num_ctx': [2048, 4096, 8192],
+        }
+
+    def tune(self, profile: str) -> Tuple[Dict, Dict]:
+        """Best options for the profile and their measurements"""
+        best = {'num_ctx': MIN_CONTEXT[profile]}
+        best_measured = self.measure(profile, best)
+        for name, values in self.candidates.items():
+            for value in values:
+                # Never pick a context the benchmarked prompts and their replies do not fit in
+                needed = max(MIN_CONTEXT[profile], best_measured['max_prompt_tokens'] + self.num_predict)
+                if name == 'num_ctx' and value < needed:
+                    continue
+                candidate = dict(best, **{name: value})
+                if candidate == best:
+                    continue
+                measured = self.measure(profile, candidate)
+                if self._better(measured, best_measured):
+                    best, best_measured = candidate, measured
+        return best, best_measured
+
+    def measure(self, profile: str, options: Dict) -> Dict:
+        # Fixed sampling so every candidate generates comparable replies
+        trial_options = dict(options, num_predict=self.num_predict, temperature=0, seed=0)
+        requests = workload(profile)
+        started = time.perf_counter()
+        self.backend.chat(self.model, WARM_UP, options=dict(trial_options, num_predict=1))
+        load_seconds = time.perf_counter() - started
+
+        prefill_tokens = prefill_seconds = generated_tokens = generate_seconds = max_prompt_tokens = 0
+        for _ in range(self.repeat):
+            for messages in requests:
+                self._requests += 1
+                response = self.backend.chat(self.model, cold(messages, self._requests), options=trial_options)
+                prefill_tokens += response.get('prompt_eval_count') or 0
+                max_prompt_tokens = max(max_prompt_tokens, response.get('prompt_eval_count') or 0)
+                prefill_seconds += (response.get('prompt_eval_duration') or 0) / 1e9
+                generated_tokens += response.get('eval_count') or 0
+                generate_seconds += (response.get('eval_duration') or 0) / 1e9
+
+        prefill_rate = prefill_tokens / prefill_seconds if prefill_seconds else float('inf')
+        generate_rate = generated_tokens / generate_seconds if generate_seconds else float('inf')
+        prompt_tokens, reply_tokens = TYPICAL_REQUEST[profile]
+        measured = {
+            'options': options,
+            'prefill_tokens_per_second': round(prefill_rate, 2),
+            'tokens_per_second': round(generate_rate, 2),
+            'typical_request_seconds': round(prompt_tokens / prefill_rate + reply_tokens / generate_rate, 4),
+            'load_seconds': round(load_seconds, 3),
+            'max_prompt_tokens': max_prompt_tokens,
+            'memory_bytes': self.backend.loaded_size(self.model),
+        }
+        self.trials.append(dict(measured, profile=profile))
+        return measured
+
+    def _better(self, candidate: Dict, best: Dict) -> bool:
+        if self.max_memory:
+            fits, best_fits = (self._fits(candidate), self._fits(best))
+            if fits != best_fits:
+                return fits
+        return candidate['typical_request_seconds'] < best['typical_request_seconds']
+
+    def _fits(self, measured: Dict) -> bool:
+        return (measured['memory_bytes'] or 0) <= self.max_memory
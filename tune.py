@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttbzrs_millionaire.services.llm_backends import OllamaBackend, StubBackend
+from ttbzrs_millionaire.services.tuning import DEFAULT_PROFILES_PATH, PROFILES, OptionsTuner, TuningProfiles
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find the fastest Ollama options for this machine and save them")
+    parser.add_argument("-m", "--model", nargs="+", default=["llama3.2"], help="Ollama models to tune")
+    parser.add_argument("--profile", nargs="+", choices=PROFILES, default=list(PROFILES),
+                        help="Workloads to tune for")
+    parser.add_argument("--profiles-path", default=DEFAULT_PROFILES_PATH, help="JSON file profiles are saved to")
+    parser.add_argument("--num-predict", type=int, default=128, help="Tokens generated per measured request")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each workload is run per candidate")
+    parser.add_argument("--max-memory-gb", type=float, help="Reject options that make the loaded model larger")
+    parser.add_argument("--keep-alive", default="30m", help="How long Ollama keeps the model loaded between requests")
+    parser.add_argument("--num-thread", type=int, nargs="+", help="Thread counts to try instead of the defaults")
+    parser.add_argument("--num-batch", type=int, nargs="+", help="Batch sizes to try instead of the defaults")
+    parser.add_argument("--num-ctx", type=int, nargs="+", help="Context sizes to try instead of the defaults")
+    parser.add_argument("--ollama-host", help="Ollama server URL, e.g. http://gpu-box:11434")
+    parser.add_argument("--stub", action="store_true", help="Use the deterministic stub backend instead of Ollama")
+    parser.add_argument("--dry-run", action="store_true", help="Print the results without saving them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    backend = StubBackend(sleep=False) if args.stub else OllamaBackend(args.ollama_host)
+    candidates = OptionsTuner.default_candidates()
+    for name in candidates:
+        if getattr(args, name):
+            candidates[name] = getattr(args, name)
+    max_memory = int(args.max_memory_gb * 1024 ** 3) if args.max_memory_gb else None
+    profiles = TuningProfiles(args.profiles_path)
+
+    results = {'machine': profiles.machine, 'models': {}}
+    for model in args.model:
+        tuner = OptionsTuner(backend, model, num_predict=args.num_predict, repeat=args.repeat,
+                             max_memory=max_memory, candidates=candidates)
+        results['models'][model] = {}
+        for profile in args.profile:
+            print(f"Tuning {model} for {profile}...", file=sys.stderr)
+            try:
+                options, measured = tuner.tune(profile)
+            except Exception as e:
+                print(f"  failed: {e}", file=sys.stderr)
+                results['models'][model][profile] = {'status': 'error', 'message': str(e)}
+                continue
+            options = dict(options, keep_alive=args.keep_alive)
+            profiles.set(model, profile, options, measured)
+            results['models'][model][profile] = {'status': 'success', 'options': options, 'measured': measured}
+            print(f"  {options}: {measured['typical_request_seconds']:.2f}s per typical request, "
+                  f"{measured['prefill_tokens_per_second']:.0f} prefill tok/s, "
+                  f"{measured['tokens_per_second']:.1f} tok/s", file=sys.stderr)
+        results['models'][model]['trials'] = tuner.trials
+
+    if not args.dry_run:
+        profiles.save()
+        print(f"Profiles saved to {args.profiles_path}", file=sys.stderr)
+    print(json.dumps(results, indent=2, default=str))
+    failed = any(result.get('status') == 'error' for model in results['models'].values()
+                 for name, result in model.items() if name != 'trials')
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import customtkinter as ctk
+from typing import Callable, Dict, List, Optional
+
+from ttbzrs_millionaire.ui.events import ComparisonEvent
+from ttbzrs_millionaire.ui.formatting import WHITE_STYLE, format_financial_terms, parse_markdown
+
+# Models offered for comparison until the user edits the list
+DEFAULT_MODELS = ("llama3.2", "llama3.2:1b")
+
+
+class ModelColumn:
+    """One model's answer and statistics in the comparison window"""
+
+    def __init__(self, parent: ctk.CTkFrame, model: str, column: int):
+        self.model = model
+        self.text = ''
+        parent.grid_columnconfigure(column, weight=1, uniform="models")
+
+        self.title = ctk.CTkLabel(
+            parent,
+            text=model,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            text_color="#ff1493"
+        )
+        self.title.grid(row=0, column=column, padx=5, pady=(0, 5))
+
+        self.display = ctk.CTkTextbox(
+            parent,
+            wrap="word",
+            font=ctk.CTkFont(size=12),
+            fg_color="#2d2d2d",
+            text_color="#ffffff",
+            border_width=1,
+            border_color="#404040",
+            corner_radius=10
+        )
+        self.display.grid(row=1, column=column, padx=5, sticky="nsew")
+        self.display.configure(state="disabled")
+
+        self.stats = ctk.CTkLabel(
+            parent,
+            text="",
+            font=ctk.CTkFont(size=10, family="Courier"),
+            text_color="#ffd700",
+            justify="left"
+        )
+        self.stats.grid(row=2, column=column, padx=5, pady=(5, 0), sticky="w")
+
+    def handle(self, event: ComparisonEvent):
+        if event.kind == 'queued':
+            memory = event.value.get('memory_bytes')
+            self.stats.configure(text="waiting for memory" + (f" ({memory / 1024 ** 3:.1f} GB)" if memory else ""))
+        elif event.kind == 'started':
+            self.stats.configure(text="generating...")
+        elif event.kind == 'piece':
+            self.text += event.value
+            self._insert([(event.value, WHITE_STYLE)])
+        elif event.kind == 'done':
+            # Replace the raw streamed text with the formatted answer
+            self.display.configure(state="normal")
+            self.display.delete("1.0", "end")
+            self.display.configure(state="disabled")
+            self._insert(parse_markdown(format_financial_terms(self.text), "#ffffff"))
+            self.stats.configure(text=self.format_stats(event.value))
+        elif event.kind == 'error':
+            self.stats.configure(text=f"error: {event.value}", text_color="#ff0000")
+
+    @staticmethod
+    def format_stats(stats: Dict) -> str:
+        tokens_per_second = stats.get('tokens_per_second')
+        memory = stats.get('memory_bytes')
+        lines = [
+            f"total  {stats['latency']:6.2f} s",
+            f"first  {stats['time_to_first_token']:6.2f} s",
+            f"gen    {tokens_per_second:6.1f} tok/s" if tokens_per_second else "gen         - tok/s",
+            f"memory {memory / 1024 ** 3:6.1f} GB" if memory else "memory      - GB",
+        ]
+        if stats.get('waited', 0) >= 0.1:
+            lines.append(f"queued {stats['waited']:6.2f} s")
+        return "\n".join(lines)
+
+    def _insert(self, spans):
+        self.display.configure(state="normal")
+        for text, style in spans:
+            self.display.insert("end", text, style)
+        self.display.see("end")
+        self.display.configure(state="disabled")
+
+
+class ComparisonWindow(ctk.CTkToplevel):
+    """Asks several models the same question and shows their answers side by side.
+
+    ``on_run(prompt, models)`` starts a comparison and returns its run
+    token; its events are passed back in through ``handle``, and those of
+    earlier runs still in the queue are dropped. ``on_close`` stops
+    whatever is running.
+    """
+
+    def __init__(self, master, prompt: str, models: List[str],
+                 on_run: Callable[[str, List[str]], int], on_close: Callable[[], None]):
+        super().__init__(master)
+        self.on_run = on_run
+        self.on_close = on_close
+        self.columns: Dict[str, ModelColumn] = {}
+        self.run_id: Optional[int] = None
+
+        self.title("Compare Models")
+        self.geometry("1100x650")
+        self.configure(fg_color="#1a1a1a")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.grid(row=0, column=0, padx=15, pady=15, sticky="ew")
+        controls.grid_columnconfigure(0, weight=3)
+        controls.grid_columnconfigure(1, weight=1)
+
+        self.prompt_entry = ctk.CTkEntry(controls, placeholder_text="Question to ask every model")
+        self.prompt_entry.grid(row=0, column=0, padx=(0, 10), sticky="ew")
+        if prompt:
+            self.prompt_entry.insert(0, prompt)
+
+        self.models_entry = ctk.CTkEntry(controls, placeholder_text="Models, comma separated")
+        self.models_entry.grid(row=0, column=1, padx=(0, 10), sticky="ew")
+        self.models_entry.insert(0, ", ".join(models or DEFAULT_MODELS))
+
+        ctk.CTkButton(
+            controls,
+            text="⚖ Compare",
+            width=120,
+            corner_radius=10,
+            border_width=2,
+            hover_color="#1a1a1a",
+            fg_color="#2d2d2d",
+            border_color="#ff1493",
+            text_color="#ffffff",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            command=self.run
+        ).grid(row=0, column=2)
+
+        self.results = ctk.CTkFrame(self, fg_color="transparent")
+        self.results.grid(row=1, column=0, padx=10, pady=(0, 15), sticky="nsew")
+        self.results.grid_rowconfigure(1, weight=1)
+
+        self.prompt_entry.bind("<Return>", lambda e: self.run())
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    @property
+    def models(self) -> List[str]:
+        return [model.strip() for model in self.models_entry.get().split(',') if model.strip()]
+
+    def run(self):
+        prompt = self.prompt_entry.get().strip()
+        models = list(dict.fromkeys(self.models))
+        if not prompt or not models:
+            return
+        for widget in self.results.winfo_children():
+            widget.destroy()
+        self.columns = {model: ModelColumn(self.results, model, index) for index, model in enumerate(models)}
+        self.run_id = self.on_run(prompt, models)
+
+    def handle(self, event: ComparisonEvent):
+        if event.run != self.run_id:
+            return
+        column = self.columns.get(event.model)
+        if column is not None:
+            column.handle(event)
+
+    def close(self):
+        self.on_close()
+        self.destroy()
@@ -0,0 +1,144 @@
+import customtkinter as ctk
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.messages import ChatMessage
+from ttbzrs_millionaire.ui.formatting import WHITE_STYLE, parse_markdown, sender_style
+
+
+class ConversationTab:
+    """One conversation in the tab view.
+
+    The session journal (``session_data``) is the source of truth and lives
+    for as long as the tab does. The chat display is only built while the
+    tab is visible and is rebuilt from the journal when the tab comes back.
+    """
+
+    def __init__(self, tab_id: str, frame: ctk.CTkFrame):
+        self.tab_id = tab_id
+        self.frame = frame
+        self.session_data: List[ChatMessage] = []
+        self.chat_display: Optional[ctk.CTkTextbox] = None
+        # Reply currently being streamed in: {'sender': ..., 'text': ...}
+        self.streaming: Optional[Dict] = None
+        # What the model has seen of this chat, kept append-only for prompt cache reuse
+        self.conversation = Conversation()
+        # Prefetched follow-ups for the latest reply: question -> (answer, conversation branch)
+        self.suggestions: Dict[str, Tuple[str, Conversation]] = OrderedDict()
+
+    @property
+    def attached(self) -> bool:
+        return self.chat_display is not None
+
+    def attach(self):
+        """Build the chat display and render the journal into it"""
+        if self.attached:
+            return
+        with tracer.span('ui.attach_tab', 'ui', messages=len(self.session_data)):
+            self.frame.grid_columnconfigure(0, weight=1)
+            self.frame.grid_rowconfigure(0, weight=1)
+            self.chat_display = ctk.CTkTextbox(
+                self.frame,
+                wrap="word",
+                font=ctk.CTkFont(size=12),
+                fg_color="#2d2d2d",
+                text_color="#ffffff",
+                border_width=1,
+                border_color="#404040",
+                corner_radius=10
+            )
+            self.chat_display.grid(row=0, column=0, padx=0, pady=0, sticky="nsew")
+            self.chat_display.configure(state="disabled")
+
+            for entry in self.session_data:
+                self._render(entry.sender, entry.message)
+            if self.streaming is not None:
+                self._render_stream_start(self.streaming['sender'])
+                self._insert_plain(self.streaming['text'])
+
+    def release(self):
+        """Drop the rendered widgets; the journal is kept"""
+        if self.attached:
+            self.chat_display.destroy()
+            self.chat_display = None
+
+    def add_message(self, sender: str, message: str):
+        """Record a message in the journal and render it if the tab is visible"""
+        if self.attached:
+            self._render(sender, message)
+
+        # Store in session data
+        self.session_data.append(ChatMessage(sender, message))
+
+    def begin_stream(self, sender: str):
+        self.streaming = {'sender': sender, 'text': ''}
+        if self.attached:
+            self._render_stream_start(sender)
+
+    def append_stream(self, text: str):
+        if self.streaming is None:
+            return
+        self.streaming['text'] += text
+        if self.attached:
+            self._insert_plain(text)
+
+    def end_stream(self, message: str):
+        """Replace the raw streamed text with the final formatted message"""
+        if self.streaming is None:
+            return
+        sender = self.streaming['sender']
+        self.streaming = None
+        if self.attached:
+            self.chat_display.configure(state="normal")
+            self.chat_display.delete("stream_start", "end")
+            self.chat_display.configure(state="disabled")
+        self.add_message(sender, message)
+
+    def clear(self):
+        self.session_data = []
+        self.conversation = Conversation()
+        self.streaming = None
+        self.suggestions.clear()
+        if self.attached:
+            self.chat_display.configure(state="normal")
+            self.chat_display.delete("1.0", "end")
+            self.chat_display.configure(state="disabled")
+
+    def history(self) -> str:
+        """Conversation so far as plain text context for the model"""
+        lines = [f"{entry.sender}: {entry.message}" for entry in self.session_data]
+        return '\n\n'.join(lines)
+
+    def _render(self, sender: str, message: str):
+        """Add a message to the chat display with proper styling"""
+        with tracer.span('ui.render_message', 'ui', sender=sender, characters=len(message)):
+            self.chat_display.configure(state="normal")
+
+            # Add the prefix with extra spacing
+            prefix, base_color, prefix_style = sender_style(sender)
+            self.chat_display.insert("end", "\n" + prefix + "\n", prefix_style)
+
+            # Insert the message formatted with markdown
+            for text, style in parse_markdown(message, base_color):
+                self.chat_display.insert("end", text, style)
+
+            # Auto-scroll to the bottom
+            self.chat_display.see("end")
+            self.chat_display.configure(state="disabled")
+
+    def _render_stream_start(self, sender: str):
+        self.chat_display.configure(state="normal")
+        # Mark where the streamed reply starts so it can be replaced once complete
+        self.chat_display.mark_set("stream_start", "end-1c")
+        self.chat_display.mark_gravity("stream_start", "left")
+        prefix, _, prefix_style = sender_style(sender)
+        self.chat_display.insert("end", "\n" + prefix + "\n", prefix_style)
+        self.chat_display.configure(state="disabled")
+
+    def _insert_plain(self, text: str):
+        self.chat_display.configure(state="normal")
+        self.chat_display.insert("end", text, WHITE_STYLE)
+        self.chat_display.see("end")
+        self.chat_display.configure(state="disabled")
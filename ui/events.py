@@ -0,0 +1,105 @@
+from typing import Dict, Optional
+
+from ttbzrs_millionaire.services.conversation import Conversation
+
+
+class UIEvent:
+    """Something a service thread asks the UI thread to show, via the message queue.
+
+    ``tab`` is the conversation it belongs to; None means the active tab.
+    """
+    __slots__ = ('tab',)
+
+    def __init__(self, tab: Optional[str] = None):
+        self.tab = tab
+
+
+class ChatEvent(UIEvent):
+    """A complete message from any sender"""
+    __slots__ = ('sender', 'message')
+
+    def __init__(self, sender: str, message: str, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.sender = sender
+        self.message = message
+
+
+class NoticeEvent(UIEvent):
+    """An error or informational note, shown as a System message"""
+    __slots__ = ('message',)
+
+    def __init__(self, message: str, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.message = message
+
+
+class TableEvent(UIEvent):
+    __slots__ = ('table',)
+
+    def __init__(self, table: Dict, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.table = table
+
+
+class StreamStartEvent(UIEvent):
+    __slots__ = ('sender',)
+
+    def __init__(self, sender: str, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.sender = sender
+
+
+class StreamPieceEvent(UIEvent):
+    __slots__ = ('text',)
+
+    def __init__(self, text: str, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.text = text
+
+
+class StreamEndEvent(UIEvent):
+    """The streamed reply is complete; ``message`` is its formatted text"""
+    __slots__ = ('message',)
+
+    def __init__(self, message: str, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.message = message
+
+
+class SuggestionEvent(UIEvent):
+    """A prefetched follow-up and the conversation branch that answered it"""
+    __slots__ = ('question', 'answer', 'conversation')
+
+    def __init__(self, question: str, answer: str, conversation: Conversation, tab: Optional[str] = None):
+        super().__init__(tab)
+        self.question = question
+        self.answer = answer
+        self.conversation = conversation
+
+
+class ComparisonEvent(UIEvent):
+    """Progress of one model in a side-by-side comparison, as yielded by ComparisonService.
+
+    ``run`` is the token run_comparison returned for the comparison it belongs to.
+    """
+    __slots__ = ('run', 'kind', 'model', 'value')
+
+    def __init__(self, run: int, kind: str, model: str, value=None):
+        super().__init__()
+        self.run = run
+        self.kind = kind
+        self.model = model
+        self.value = value
+
+
+class StatusEvent(UIEvent):
+    __slots__ = ('status', 'color')
+
+    def __init__(self, status: str, color: str):
+        super().__init__()
+        self.status = status
+        self.color = color
+
+
+class ExitEvent(UIEvent):
+    __slots__ = ()
@@ -0,0 +1,133 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Shared with DocumentService's figure extraction
+from ttbzrs_millionaire.services.patterns import CURRENCY_PATTERN, PERCENT_PATTERN
+
+FINANCIAL_TERMS = [
+    (re.compile(r'\b(ETF|IRA|401k|ROI|APR|APY)\b', re.IGNORECASE), r'`\1`'),  # Technical terms
+    (re.compile(r'\b(stock market|bull market|bear market)\b', re.IGNORECASE), r'*\1*'),  # Market terms
+    (re.compile(r'\b(high-risk|low-risk|medium-risk)\b', re.IGNORECASE), r'**\1**'),  # Risk levels
+    (re.compile(r'\b(dividend|yield|portfolio|diversification)\b', re.IGNORECASE), r'*\1*'),  # Investment terms
+]
+
+SENDER_STYLES = {
+    "Assistant": ("🤖 Assistant:", "#ff1493"),  # Neon pink
+    "Calculator": ("🧮 Calculator:", "#ffd700"),  # Gold
+}
+DEFAULT_SENDER_STYLE = ("👤 You:", "#00ffff")  # Neon blue
+
+Span = Tuple[str, Dict]
+
+# Span styles are shared between spans and messages; treat them as read-only
+PLAIN_STYLE = {"fg": "#ffffff", "font": ("Helvetica", 11)}
+ITALIC_STYLE = {"fg": "#ffffff", "font": ("Helvetica", 11, "italic")}
+CODE_STYLE = {"fg": "#ffd700", "bg": "#2d2d2d", "font": ("Courier", 10)}
+WHITE_STYLE = {"fg": "#ffffff"}
+
+
+def format_financial_terms(message: str) -> str:
+    """Automatically format common financial terms and numbers"""
+    message = CURRENCY_PATTERN.sub(r'**$\1**', message)
+    message = PERCENT_PATTERN.sub(r'`\1`', message)
+
+    for pattern, replacement in FINANCIAL_TERMS:
+        message = pattern.sub(replacement, message)
+
+    return message
+
+
+@lru_cache(maxsize=None)
+def sender_style(sender: str) -> Tuple[str, str, Dict]:
+    """Prefix text, base color and prefix style for a sender"""
+    prefix, base_color = SENDER_STYLES.get(sender, DEFAULT_SENDER_STYLE)
+    prefix_style = {
+        "fg": base_color,
+        "font": ("Helvetica", 14, "bold"),
+        "spacing3": 10
+    }
+    return prefix, base_color, prefix_style
+
+
+@lru_cache(maxsize=None)
+def bold_style(base_color: str) -> Dict:
+    return {"fg": base_color, "font": ("Helvetica", 11, "bold")}
+
+
+def parse_markdown(message: str, base_color: str) -> List[Span]:
+    """Split a message into (text, style) spans ready to insert into a textbox"""
+    spans = []
+    lines = message.split('\n')
+    in_code_block = False
+    code_buffer = []
+
+    for line in lines:
+        # Handle code blocks
+        if line.strip().startswith('```'):
+            if in_code_block:
+                # End code block
+                if code_buffer:
+                    spans.append(('\n'.join(code_buffer) + '\n', CODE_STYLE))
+                code_buffer = []
+                in_code_block = False
+            else:
+                in_code_block = True
+            continue
+
+        if in_code_block:
+            code_buffer.append(line)
+            continue
+
+        # Handle bullet points
+        if line.strip().startswith('- '):
+            line = '  • ' + line[2:]
+
+        # Process inline formatting
+        current_text = ''
+        i = 0
+        current_style = PLAIN_STYLE
+
+        while i < len(line):
+            if line[i:i+2] == '**' and i+2 < len(line):  # Bold
+                if current_text:
+                    spans.append((current_text, current_style))
+                    current_text = ''
+                i += 2
+                end = line.find('**', i)
+                if end != -1:
+                    spans.append((line[i:end], bold_style(base_color)))
+                    i = end + 2
+                    continue
+            elif line[i:i+1] == '*' and i+1 < len(line):  # Italic
+                if current_text:
+                    spans.append((current_text, current_style))
+                    current_text = ''
+                i += 1
+                end = line.find('*', i)
+                if end != -1:
+                    spans.append((line[i:end], ITALIC_STYLE))
+                    i = end + 1
+                    continue
+            elif line[i:i+1] == '`':  # Inline code
+                if current_text:
+                    spans.append((current_text, current_style))
+                    current_text = ''
+                i += 1
+                end = line.find('`', i)
+                if end != -1:
+                    spans.append((line[i:end], CODE_STYLE))
+                    i = end + 1
+                    continue
+
+            current_text += line[i]
+            i += 1
+
+        if current_text:
+            spans.append((current_text, current_style))
+
+        spans.append(("\n", WHITE_STYLE))
+
+    # Add extra newline at the end
+    spans.append(("\n", WHITE_STYLE))
+    return spans
@@ -1,32 +1,87 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import asyncio
+import json
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import threading
 import queue
-import re
+import time
 
-from ttbzrs_millionaire.services.llm_service import LLMService
+from ttbzrs_millionaire.services.calculator_service import CalculatorService
+from ttbzrs_millionaire.services.conversation import Conversation
+from ttbzrs_millionaire.services.scheduler_service import Priority
 from ttbzrs_millionaire.services.document_service import DocumentService
-from ttbzrs_millionaire.services.session_service import SessionService
+from ttbzrs_millionaire.services.instrumentation import tracer
+from ttbzrs_millionaire.services.resilience import DegradedAnswer
+from ttbzrs_millionaire.services.service_host import ServiceHost
+from ttbzrs_millionaire.services.simulation_service import SimulationService
+from ttbzrs_millionaire.services.speculation_service import SpeculationService
+from ttbzrs_millionaire.services.messages import ChatMessage
+from ttbzrs_millionaire.ui.comparison_window import DEFAULT_MODELS, ComparisonWindow
+from ttbzrs_millionaire.ui.conversation_tab import ConversationTab
+from ttbzrs_millionaire.ui.events import (
+    ChatEvent, ComparisonEvent, ExitEvent, NoticeEvent, StatusEvent, StreamEndEvent, StreamPieceEvent,
+    StreamStartEvent, SuggestionEvent, TableEvent, UIEvent
+)
+from ttbzrs_millionaire.ui.formatting import format_financial_terms
 
 class MainWindow(ctk.CTk):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, fast_model: Optional[str] = None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Small model for simple turns; routing is off without one
+        self.fast_model = fast_model
         
-        # Initialize services
-        self.llm_service = LLMService()
-        self.document_service = DocumentService()
-        self.session_service = SessionService()
+        # Model, document and session services run in a worker process so PDF extraction and
+        # response handling never hold this process's GIL; every tab shares its one LLM service,
+        # connection pool and scheduler
+        self.service_host = ServiceHost({
+            'max_concurrent': 2,
+            'class_limits': {Priority.BACKGROUND.name: 1},
+            'fast_model': fast_model,
+        })
+        self.service_host.start()
+        self.llm_service = self.service_host.proxy('llm')
+        self.document_service = self.service_host.proxy('documents')
+        self.session_service = self.service_host.proxy('sessions')
+        self.service_tracer = self.service_host.proxy('tracer')
+        self.comparison_service = self.service_host.proxy('comparison')
+        self._service_stats: Optional[Dict] = None
+        self.simulation_service = SimulationService()
+        self.calculator_service = CalculatorService()
+        self.speculation_service = SpeculationService(self.llm_service)
         
         # Message queue for thread-safe communication
         self.message_queue = queue.Queue()
         self._callbacks = []
         
-        # Session data
-        self.session_data = []
+        # Instrumentation: queue polls double as a heartbeat for spotting frame stalls
+        self.poll_interval_ms = 100
+        self.frame_stall_ms = 50
+        self._last_poll = None
+        self.stats_visible = False
+        self._stats_refresh = None
+        
+        # Service calls from every tab run on one background event loop
+        self._service_loop = asyncio.new_event_loop()
+        self._service_thread = threading.Thread(target=self._service_loop.run_forever, daemon=True)
+        self._service_thread.start()
+        
+        # Conversations, one per tab
+        self.tabs: Dict[str, ConversationTab] = {}
+        self.active_tab_id: Optional[str] = None
+        self._tab_counter = 0
+        
+        # Opt-in prefetching of likely follow-up answers; tasks live on the service loop
+        self.speculation_enabled = False
+        self._speculation: Dict[str, asyncio.Task] = {}
+        
+        # Side-by-side model comparison window and the comparison it is showing
+        self.compare_models = list(DEFAULT_MODELS)
+        self.comparison_window: Optional[ComparisonWindow] = None
+        self._comparison = None
+        self._comparison_runs = 0
         
         # Help panel state
         self.help_panel_visible = False
@@ -36,12 +91,17 @@ class MainWindow(ctk.CTk):
         
         # Keyboard shortcuts
         self.bind("<Control-n>", lambda e: self.clear_chat())
+        self.bind("<Control-t>", lambda e: self.new_tab())
+        self.bind("<Control-w>", lambda e: self.close_tab())
         self.bind("<Control-s>", lambda e: self.handle_save_session())
         self.bind("<Control-o>", lambda e: self.handle_load_pdf())
         self.bind("<Control-h>", lambda e: self.toggle_help_panel())
         self.bind("<Control-q>", lambda e: self.quit())
         self.bind("<F1>", lambda e: self.toggle_help_panel())
         self.bind("<Escape>", lambda e: self.hide_help_panel())
+        self.bind("<F2>", lambda e: self.toggle_stats())
+        self.bind("<Control-e>", lambda e: self.handle_export_trace())
+        self.bind("<Control-m>", lambda e: self.open_comparison())
         
         # Configure window
         self.title("You Won a Million Dollars, Now What?")
@@ -66,20 +126,40 @@ class MainWindow(ctk.CTk):
     
     def _start_message_processing(self):
         """Start the message processing loop with a stored reference"""
-        callback = self.after(100, self.process_message_queue)
+        callback = self.after(self.poll_interval_ms, self.process_message_queue)
         self._callbacks.append(callback)
     
     def process_message_queue(self):
         """Process messages from the queue"""
+        self._check_frame_stall()
         try:
             while True:
-                message = self.message_queue.get_nowait()
+                event = self.message_queue.get_nowait()
                 
-                if message['type'] == 'chat':
-                    self._add_chat_message(message['sender'], message['message'])
-                elif message['type'] == 'status':
-                    self.update_status(message['status'], message['color'])
-                elif message['type'] == 'exit':
+                tab = self.tabs.get(event.tab)
+                
+                if isinstance(event, ChatEvent):
+                    self._add_chat_message(event.sender, event.message, event.tab)
+                elif isinstance(event, TableEvent):
+                    self._add_table_message(event.table, event.tab)
+                elif isinstance(event, NoticeEvent):
+                    self._add_chat_message("System", event.message, event.tab)
+                elif isinstance(event, StreamStartEvent) and tab:
+                    tab.begin_stream(event.sender)
+                elif isinstance(event, StreamPieceEvent) and tab:
+                    tab.append_stream(event.text)
+                elif isinstance(event, StreamEndEvent) and tab:
+                    tab.end_stream(event.message)
+                elif isinstance(event, SuggestionEvent) and tab:
+                    tab.suggestions[event.question] = (event.answer, event.conversation)
+                    if tab is self.active_tab:
+                        self._refresh_suggestions()
+                elif isinstance(event, ComparisonEvent):
+                    if self.comparison_window is not None:
+                        self.comparison_window.handle(event)
+                elif isinstance(event, StatusEvent):
+                    self.update_status(event.status, event.color)
+                elif isinstance(event, ExitEvent):
                     break
                 
                 self.message_queue.task_done()
@@ -87,159 +167,49 @@ class MainWindow(ctk.CTk):
             pass
         finally:
             # Schedule next check
-            self.after(100, self.process_message_queue)
-    
-    def _add_chat_message(self, sender: str, message: str):
-        """Add a message to the chat display with proper styling"""
-        self.chat_display.configure(state="normal")
-        
-        # Add the message with appropriate formatting
-        if sender == "Assistant":
-            prefix = "🤖 Assistant:"
-            base_color = "#ff1493"  # Neon pink
-            prefix_style = {
-                "fg": base_color,
-                "font": ("Helvetica", 14, "bold"),
-                "spacing3": 10
-            }
-        else:
-            prefix = "👤 You:"
-            base_color = "#00ffff"  # Neon blue
-            prefix_style = {
-                "fg": base_color,
-                "font": ("Helvetica", 14, "bold"),
-                "spacing3": 10
-            }
-            
-        # Add the prefix with extra spacing
-        self.chat_display.insert("end", "\n" + prefix + "\n", prefix_style)
-        
-        # Process and format the message with markdown
-        lines = message.split('\n')
-        in_code_block = False
-        code_buffer = []
-        
-        for line in lines:
-            # Handle code blocks
-            if line.strip().startswith('```'):
-                if in_code_block:
-                    # End code block
-                    if code_buffer:
-                        self.chat_display.insert("end", '\n'.join(code_buffer) + '\n', 
-                            {"fg": "#ffd700", "bg": "#2d2d2d", "font": ("Courier", 10)})
-                    code_buffer = []
-                    in_code_block = False
-                else:
-                    in_code_block = True
-                continue
-                
-            if in_code_block:
-                code_buffer.append(line)
-                continue
-            
-            # Handle bullet points
-            if line.strip().startswith('- '):
-                line = '  • ' + line[2:]
-            
-            # Process inline formatting
-            parts = []
-            current_text = ''
-            i = 0
-            current_style = {"fg": "#ffffff", "font": ("Helvetica", 11)}
-            
-            while i < len(line):
-                if line[i:i+2] == '**' and i+2 < len(line):  # Bold
-                    if current_text:
-                        parts.append((current_text, current_style.copy()))
-                        current_text = ''
-                    i += 2
-                    end = line.find('**', i)
-                    if end != -1:
-                        parts.append((line[i:end], {"fg": base_color, "font": ("Helvetica", 11, "bold")}))
-                        i = end + 2
-                        continue
-                elif line[i:i+1] == '*' and i+1 < len(line):  # Italic
-                    if current_text:
-                        parts.append((current_text, current_style.copy()))
-                        current_text = ''
-                    i += 1
-                    end = line.find('*', i)
-                    if end != -1:
-                        parts.append((line[i:end], {"fg": "#ffffff", "font": ("Helvetica", 11, "italic")}))
-                        i = end + 1
-                        continue
-                elif line[i:i+1] == '`':  # Inline code
-                    if current_text:
-                        parts.append((current_text, current_style.copy()))
-                        current_text = ''
-                    i += 1
-                    end = line.find('`', i)
-                    if end != -1:
-                        parts.append((line[i:end], {"fg": "#ffd700", "bg": "#2d2d2d", "font": ("Courier", 10)}))
-                        i = end + 1
-                        continue
-                
-                current_text += line[i]
-                i += 1
-            
-            if current_text:
-                parts.append((current_text, current_style))
-            
-            # Insert the formatted line
-            for text, style in parts:
-                self.chat_display.insert("end", text, style)
-            self.chat_display.insert("end", "\n", {"fg": "#ffffff"})
-        
-        # Add extra newline at the end
-        self.chat_display.insert("end", "\n", {"fg": "#ffffff"})
-        
-        # Auto-scroll to the bottom
-        self.chat_display.see("end")
-        self.chat_display.configure(state="disabled")
-        
-        # Store in session data
-        self.session_data.append({
-            "sender": sender,
-            "message": message,
-            "timestamp": datetime.now().isoformat()
-        })
+            self._last_poll = time.perf_counter()
+            self.after(self.poll_interval_ms, self.process_message_queue)
+    
+    def _check_frame_stall(self):
+        """Record a stall when the event loop ran this poll noticeably late"""
+        if self._last_poll is None:
+            return
+        now = time.perf_counter()
+        late = now - self._last_poll - self.poll_interval_ms / 1000
+        if late * 1000 > self.frame_stall_ms:
+            tracer.record('ui.frame_stall', now - late, late, 'ui')
+            tracer.count('ui.frame_stalls')
+    
+    def _add_chat_message(self, sender: str, message: str, tab_id: str = None):
+        """Add a message to a conversation, the active one by default"""
+        tab = self.tabs.get(tab_id or self.active_tab_id)
+        if tab is not None:
+            tab.add_message(sender, message)
+
+    def _add_table_message(self, table: Dict, tab_id: str = None):
+        """Add a calculator table to the chat display as a monospaced block"""
+        self._add_chat_message("Calculator", "```\n" + CalculatorService.format_table(table) + "\n```", tab_id)
+
+    def _submit(self, coroutine):
+        """Run a coroutine on the shared service loop"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._service_loop)
+
+    @property
+    def active_tab(self) -> Optional[ConversationTab]:
+        return self.tabs.get(self.active_tab_id)
 
-    def post_message(self, msg_type: str, **kwargs):
-        """Post a message to the queue"""
-        self.message_queue.put({'type': msg_type, **kwargs})
+    @property
+    def session_data(self) -> List[ChatMessage]:
+        return self.active_tab.session_data if self.active_tab else []
+
+    def post_message(self, event: UIEvent):
+        """Post an event to the queue"""
+        self.message_queue.put(event)
     
     def _format_financial_terms(self, message: str) -> str:
         """Automatically format common financial terms and numbers"""
-        import re
-        
-        # Format currency amounts
-        # Matches patterns like $1000, $1,000, $1000.00, $1,000.00
-        message = re.sub(
-            r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'**$\1**',
-            message
-        )
-        
-        # Format percentages
-        # Matches patterns like 10%, 10.5%, 0.5%
-        message = re.sub(
-            r'(\d+(?:\.\d+)?%)(?!\*\*)',
-            r'`\1`',
-            message
-        )
-        
-        # Format common financial terms
-        financial_terms = {
-            r'\b(ETF|IRA|401k|ROI|APR|APY)\b': '`\1`',  # Technical terms
-            r'\b(stock market|bull market|bear market)\b': '*\1*',  # Market terms
-            r'\b(high-risk|low-risk|medium-risk)\b': '**\1**',  # Risk levels
-            r'\b(dividend|yield|portfolio|diversification)\b': '*\1*',  # Investment terms
-        }
-        
-        for pattern, replacement in financial_terms.items():
-            message = re.sub(pattern, replacement, message, flags=re.IGNORECASE)
-        
-        return message
+        with tracer.span('ui.format_terms', 'ui', characters=len(message)):
+            return format_financial_terms(message)
 
     def handle_send(self):
         """Handle sending a message"""
@@ -250,6 +220,11 @@ class MainWindow(ctk.CTk):
         # Clear input
         self.user_input.delete("1.0", "end")
         
+        # Suggestions belong to the previous reply
+        self._cancel_speculation(self.active_tab_id)
+        self.active_tab.suggestions.clear()
+        self._refresh_suggestions()
+        
         # Format financial terms in user's message
         formatted_message = self._format_financial_terms(message)
         
@@ -259,36 +234,197 @@ class MainWindow(ctk.CTk):
         # Update status to thinking
         self.update_status("thinking", "#ffd700")
         
-        # Get chat history before starting the thread
-        context = self.get_chat_history()
-        
         # Process message in background
-        threading.Thread(target=self._process_message, args=(message, context), daemon=True).start()
+        self._submit(self._process_message(self.active_tab_id, message, self.active_tab.conversation))
     
-    def _process_message(self, message: str, context: str):
-        """Process message in background thread"""
+    async def _process_message(self, tab_id: str, message: str, conversation: Conversation):
+        """Stream the reply for one tab on the service loop"""
+        streaming = False
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
             # Update status to processing
-            self.post_message('status', status="processing", color="#00ffff")
+            self.post_message(StatusEvent("processing", "#00ffff"))
             
-            response = loop.run_until_complete(self.llm_service.get_response(message, context))
+            facts, tables = await self._gather_facts(message)
+            for table in tables:
+                self.post_message(TableEvent(table, tab=tab_id))
             
-            if response['status'] == 'success':
-                formatted_response = self._format_financial_terms(response['message'])
-                self.post_message('chat', sender="Assistant", message=formatted_response)
-                self.post_message('status', status="ready", color="#00ff00")
+            pieces = []
+            async for piece in self.llm_service.stream_response(message, facts=facts, conversation=conversation):
+                if isinstance(piece, DegradedAnswer):
+                    # An outage reply is a note, not a turn of the conversation the model sees
+                    self.post_message(ChatEvent("System", piece, tab=tab_id))
+                    self.post_message(StatusEvent("offline", "#ffd700"))
+                    return
+                if not streaming:
+                    self.post_message(StreamStartEvent("Assistant", tab=tab_id))
+                    streaming = True
+                pieces.append(piece)
+                self.post_message(StreamPieceEvent(piece, tab=tab_id))
+            
+            formatted_response = self._format_financial_terms(''.join(pieces))
+            if streaming:
+                self.post_message(StreamEndEvent(formatted_response, tab=tab_id))
             else:
-                self.post_message('chat', sender="System", message=f"Error: {response['message']}")
-                self.post_message('status', status="error", color="#ff0000")
+                self.post_message(ChatEvent("Assistant", formatted_response, tab=tab_id))
+            self.post_message(StatusEvent("ready", "#00ff00"))
+            
+            if self.speculation_enabled and pieces:
+                self._start_speculation(tab_id, message, ''.join(pieces), conversation)
             
         except Exception as e:
-            self.post_message('chat', sender="System", message=f"Error: {str(e)}")
-            self.post_message('status', status="error", color="#ff0000")
-        finally:
-            loop.close()
+            if streaming:
+                self.post_message(StreamEndEvent(self._format_financial_terms(''.join(pieces)), tab=tab_id))
+            self.post_message(ChatEvent("System", f"Error: {str(e)}", tab=tab_id))
+            self.post_message(StatusEvent("error", "#ff0000"))
+    
+    def _start_speculation(self, tab_id: str, message: str, reply: str, conversation: Conversation):
+        """Replace a tab's prefetching; runs on the service loop"""
+        previous = self._speculation.get(tab_id)
+        if previous is not None:
+            previous.cancel()
+        # Registered before it first runs so typing straight away already cancels it
+        task = asyncio.create_task(self._speculate(tab_id, message, reply, conversation))
+        self._speculation[tab_id] = task
+        task.add_done_callback(lambda done: self._forget_speculation(tab_id, done))
+    
+    async def _speculate(self, tab_id: str, message: str, reply: str, conversation: Conversation):
+        """Prefetch follow-up answers for a tab until done or cancelled by typing"""
+        async def facts_for(question: str) -> str:
+            return (await self._gather_facts(question))[0]
+        
+        try:
+            async for question, answer, branch in self.speculation_service.speculate(
+                    message, reply, conversation, facts_for):
+                self.post_message(SuggestionEvent(question, self._format_financial_terms(answer), branch,
+                                                  tab=tab_id))
+        except asyncio.CancelledError:
+            tracer.count('speculation.cancelled')
+            raise
+        except Exception:
+            # Speculation is best effort; a failure only means no suggestions
+            tracer.count('speculation.errors')
+    
+    def _forget_speculation(self, tab_id: str, task: asyncio.Task):
+        # A newer speculation for the tab may have replaced this one already
+        if self._speculation.get(tab_id) is task:
+            del self._speculation[tab_id]
+    
+    def _cancel_speculation(self, tab_id: str = None):
+        """Stop prefetching for one tab, or for every tab"""
+        # Queued behind any pending start, so a speculation that has not begun yet is cancelled too
+        self._service_loop.call_soon_threadsafe(self._cancel_speculation_tasks, tab_id)
+    
+    def _cancel_speculation_tasks(self, tab_id: Optional[str]):
+        for key, task in list(self._speculation.items()):
+            if tab_id is None or key == tab_id:
+                task.cancel()
+    
+    def toggle_speculation(self):
+        self.speculation_enabled = bool(self.speculation_switch.get())
+        if not self.speculation_enabled:
+            self._cancel_speculation()
+    
+    def use_suggestion(self, question: str):
+        """Show a prefetched follow-up as if it had just been asked and answered"""
+        tab = self.active_tab
+        suggestion = tab.suggestions.pop(question, None)
+        if suggestion is None:
+            return
+        answer, branch = suggestion
+        tracer.count('speculation.hits')
+        
+        self._cancel_speculation(tab.tab_id)
+        tab.suggestions.clear()
+        self._refresh_suggestions()
+        
+        # The branch already holds this question and answer, so the next turn continues from it
+        tab.conversation = branch
+        self._add_chat_message("You", self._format_financial_terms(question))
+        self._add_chat_message("Assistant", answer)
+        if self.speculation_enabled:
+            self._service_loop.call_soon_threadsafe(
+                self._start_speculation, tab.tab_id, question, branch.messages[-1]['content'], branch)
+    
+    def _refresh_suggestions(self):
+        """Show the active tab's prefetched follow-ups as buttons above the input"""
+        for button in self.suggestion_frame.winfo_children():
+            button.destroy()
+        
+        tab = self.active_tab
+        if tab is None or not tab.suggestions:
+            self.suggestion_frame.grid_remove()
+            return
+        
+        for question in tab.suggestions:
+            ctk.CTkButton(
+                self.suggestion_frame,
+                text=f"⚡ {question}",
+                height=28,
+                corner_radius=14,
+                border_width=1,
+                hover_color="#1a1a1a",
+                fg_color="#2d2d2d",
+                border_color="#ffd700",
+                text_color="#ffd700",
+                font=ctk.CTkFont(size=12),
+                command=lambda question=question: self.use_suggestion(question)
+            ).pack(side="left", padx=(0, 8))
+        self.suggestion_frame.grid()
+    
+    async def _gather_facts(self, message: str) -> Tuple[str, List[Dict]]:
+        """Compute figures and scenario tables the assistant should cite for this message"""
+        facts = []
+        
+        params = SimulationService.params_from_text(message)
+        if params is not None:
+            result = await self.simulation_service.run_simulation(**params)
+            if result['status'] == 'success':
+                facts.append(SimulationService.summarize(result['data']))
+        
+        tables = await self.calculator_service.scenarios_for(message)
+        facts.extend(CalculatorService.format_table(table) for table in tables)
+        return '\n\n'.join(facts), tables
+    
+    def open_comparison(self):
+        """Open the side-by-side comparison, seeded with whatever is in the input box"""
+        if self.comparison_window is not None:
+            self.comparison_window.focus()
+            return
+        prompt = self.user_input.get("1.0", "end-1c").strip()
+        self.comparison_window = ComparisonWindow(self, prompt, self.compare_models,
+                                                  on_run=self.run_comparison, on_close=self._close_comparison)
+    
+    def run_comparison(self, prompt: str, models: List[str]) -> int:
+        """Start a comparison; its events carry the returned run token"""
+        self._cancel_comparison()
+        self.compare_models = models
+        self._comparison_runs += 1
+        self._comparison = self._submit(self._compare(self._comparison_runs, prompt, models))
+        return self._comparison_runs
+    
+    async def _compare(self, run: int, prompt: str, models: List[str]):
+        """Stream every model's answer into the comparison window"""
+        pending = set(models)
+        try:
+            facts, _ = await self._gather_facts(prompt)
+            async for kind, model, value in self.comparison_service.stream_comparison(prompt, models, facts):
+                if kind in ('done', 'error'):
+                    pending.discard(model)
+                self.post_message(ComparisonEvent(run, kind, model, value))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            for model in pending:
+                self.post_message(ComparisonEvent(run, 'error', model, str(e)))
+    
+    def _cancel_comparison(self):
+        if self._comparison is not None:
+            self._comparison.cancel()
+            self._comparison = None
+    
+    def _close_comparison(self):
+        self._cancel_comparison()
+        self.comparison_window = None
     
     def update_status(self, status: str = "ready", color: str = "#00ff00"):
         """Update the status indicator"""
@@ -388,6 +524,12 @@ class MainWindow(ctk.CTk):
             "Start a fresh conversation (Ctrl+N)"
         )
         
+        self.new_tab_btn = create_button(
+            "New Tab", "🗂",
+            self.new_tab,
+            "Open another conversation (Ctrl+T)"
+        )
+        
         self.load_pdf_btn = create_button(
             "Load PDF", "📄",
             self.handle_load_pdf,
@@ -400,12 +542,42 @@ class MainWindow(ctk.CTk):
             "Save this conversation (Ctrl+S)"
         )
         
+        self.compare_btn = create_button(
+            "Compare", "⚖",
+            self.open_comparison,
+            "Ask several models side by side (Ctrl+M)"
+        )
+        
         self.help_btn = create_button(
             "Help", "❓",
             self.toggle_help_panel,
             "Show help and shortcuts (F1)"
         )
         
+        # Model routing: Auto follows the router's rules, Fast/Full pin every request
+        self.route_selector = ctk.CTkSegmentedButton(
+            self.sidebar,
+            values=["Auto", "Fast", "Full"],
+            selected_color="#ff1493",
+            selected_hover_color="#ff1493",
+            font=ctk.CTkFont(size=12),
+            command=self.set_model_route
+        )
+        self.route_selector.set("Auto")
+        if self.fast_model:
+            self.route_selector.pack(pady=(0, 15), padx=10)
+        
+        # Opt-in: prefetch answers to likely follow-ups while the model is idle
+        self.speculation_switch = ctk.CTkSwitch(
+            self.sidebar,
+            text="Prefetch follow-ups",
+            font=ctk.CTkFont(size=12),
+            text_color="#ffffff",
+            progress_color="#ff1493",
+            command=self.toggle_speculation
+        )
+        self.speculation_switch.pack(pady=(0, 15), padx=10)
+        
         # Status indicator
         self.status_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
         self.status_frame.pack(side="bottom", pady=20, padx=10)
@@ -418,6 +590,15 @@ class MainWindow(ctk.CTk):
         )
         self.status_label.pack()
         
+        # Live latency/throughput readout, hidden until toggled with F2
+        self.stats_label = ctk.CTkLabel(
+            self.status_frame,
+            text="",
+            font=ctk.CTkFont(size=10, family="Courier"),
+            text_color="#ffd700",
+            justify="left"
+        )
+        
         # Version info
         version_label = ctk.CTkLabel(
             self.status_frame,
@@ -427,6 +608,92 @@ class MainWindow(ctk.CTk):
         )
         version_label.pack(pady=(5, 0))
     
+    def set_model_route(self, choice: str):
+        """Pin every request to the fast or full model, or let the router decide"""
+        self._submit(self.llm_service.router.set_override(None if choice == "Auto" else choice.lower()))
+    
+    def toggle_stats(self):
+        """Show or hide the live stats readout under the status indicator"""
+        self.stats_visible = not self.stats_visible
+        # Toggling quickly must not leave an earlier refresh loop running alongside the new one
+        if self._stats_refresh is not None:
+            self.after_cancel(self._stats_refresh)
+            self._stats_refresh = None
+        if self.stats_visible:
+            self.stats_label.pack(after=self.status_label, pady=(5, 0))
+            self.refresh_stats()
+        else:
+            self.stats_label.pack_forget()
+    
+    def refresh_stats(self):
+        """Update the stats readout once a second while it is visible"""
+        self._stats_refresh = None
+        if not self.stats_visible:
+            return
+        
+        # Model figures come from the service worker and lag by one refresh
+        self._submit(self._fetch_service_stats())
+        service_stats = self._service_stats or {}
+        stats = tracer.stats()
+        tokens_per_second = service_stats.get('tokens_per_second')
+        first_token = service_stats.get('time_to_first_token')
+        render = stats['spans'].get('ui.render_message')
+        lines = [
+            f"gen  {tokens_per_second:6.1f} tok/s" if tokens_per_second is not None else "gen       - tok/s",
+            f"ttft {first_token:6.2f} s" if first_token is not None else "ttft      - s",
+            f"draw {render['p50']:6.1f} ms" if render else "draw      - ms",
+            f"stalls {int(stats['counters'].get('ui.frame_stalls', 0)):4d}",
+            f"model {service_stats.get('backend', '-'):>9s}",
+        ]
+        for route, route_stats in service_stats.get('routes', {}).items():
+            latency = route_stats['latency_p50']
+            lines.append(f"{route:4s} {route_stats['requests']:4d} req"
+                         + (f" {latency:5.1f} s" if latency is not None else ""))
+        self.stats_label.configure(text="\n".join(lines))
+        self._stats_refresh = self.after(1000, self.refresh_stats)
+    
+    async def _fetch_service_stats(self):
+        try:
+            self._service_stats = {
+                'tokens_per_second': await self.service_tracer.latest('llm.tokens_per_second'),
+                'time_to_first_token': await self.service_tracer.latest('llm.time_to_first_token'),
+                'backend': (await self.llm_service.breaker.stats())['state'],
+                'routes': (await self.llm_service.router.stats())['routes'] if self.fast_model else {},
+                'restarts': self.service_host.restarts,
+            }
+        except Exception:
+            # Stats are best effort; keep showing the last snapshot
+            pass
+    
+    def handle_export_trace(self):
+        """Export recorded spans as a Chrome trace for offline profiling"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            initialfile=f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("Chrome trace", "*.json")]
+        )
+        if not file_path:
+            return
+        
+        self._submit(self._export_trace(self.active_tab_id, file_path))
+    
+    async def _export_trace(self, tab_id: str, file_path: str):
+        """Write this process's spans and the service worker's into one trace"""
+        try:
+            trace = tracer.chrome_trace()
+            services = await self.service_tracer.chrome_trace()
+            trace['traceEvents'].extend(services['traceEvents'])
+            trace['otherData'] = {'ui': trace['otherData'], 'services': services['otherData']}
+            await asyncio.to_thread(self._write_json, file_path, trace)
+            self.post_message(NoticeEvent(f"Trace exported: {os.path.basename(file_path)}", tab=tab_id))
+        except Exception as e:
+            self.post_message(NoticeEvent(f"Failed to export trace: {e}", tab=tab_id))
+    
+    @staticmethod
+    def _write_json(file_path: str, data: Dict):
+        with open(file_path, 'w') as file:
+            json.dump(data, file, default=str)
+    
     def create_main_content(self):
         # Main content area with gradient border
         self.main_content = ctk.CTkFrame(self, 
@@ -438,23 +705,26 @@ class MainWindow(ctk.CTk):
         self.main_content.grid_columnconfigure(0, weight=1)
         self.main_content.grid_rowconfigure(0, weight=1)
         
-        # Chat display area with custom styling
-        self.chat_display = ctk.CTkTextbox(
+        # One tab per conversation; only the visible tab keeps its chat display
+        self.tabview = ctk.CTkTabview(
             self.main_content,
-            wrap="word",
-            font=ctk.CTkFont(size=12),
-            fg_color="#2d2d2d",
-            text_color="#ffffff",
-            border_width=1,
-            border_color="#404040",
-            corner_radius=10
+            fg_color="#1a1a1a",
+            segmented_button_selected_color="#ff1493",
+            segmented_button_selected_hover_color="#ff1493",
+            command=self._on_tab_changed
         )
-        self.chat_display.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="nsew")
-        self.chat_display.configure(state="disabled")
+        self.tabview.grid(row=0, column=0, padx=10, pady=(0, 5), sticky="nsew")
+        
+        # Prefetched follow-up questions, hidden while there are none
+        self.suggestion_frame = ctk.CTkFrame(self.main_content, fg_color="transparent")
+        self.suggestion_frame.grid(row=1, column=0, padx=10, pady=(0, 5), sticky="ew")
+        self.suggestion_frame.grid_remove()
+        
+        self.new_tab()
         
         # Input area with modern styling
         input_frame = ctk.CTkFrame(self.main_content, fg_color="transparent")
-        input_frame.grid(row=1, column=0, padx=10, pady=(5, 10), sticky="ew")
+        input_frame.grid(row=2, column=0, padx=10, pady=(5, 10), sticky="ew")
         input_frame.grid_columnconfigure(0, weight=1)
         
         self.user_input = ctk.CTkTextbox(
@@ -487,6 +757,8 @@ class MainWindow(ctk.CTk):
         
         # Bind Enter key to send message
         self.user_input.bind("<Return>", lambda e: self.handle_send())
+        # The user is writing their own question, so stop spending compute on guesses
+        self.user_input.bind("<Key>", lambda e: self._cancel_speculation(self.active_tab_id), add="+")
         
         # Add initial greeting with enhanced markdown
         welcome_message = (
@@ -542,6 +814,45 @@ class MainWindow(ctk.CTk):
         )
         self._add_chat_message("Assistant", response_message)
     
+    def new_tab(self) -> ConversationTab:
+        """Open a new conversation in its own tab and switch to it"""
+        self._tab_counter += 1
+        tab_id = f"Chat {self._tab_counter}"
+        tab = ConversationTab(tab_id, self.tabview.add(tab_id))
+        self.tabs[tab_id] = tab
+        self.tabview.set(tab_id)
+        self._on_tab_changed()
+        return tab
+    
+    def close_tab(self):
+        """Close the active conversation; the last tab is cleared instead"""
+        if len(self.tabs) <= 1:
+            self.clear_chat()
+            return
+        if not messagebox.askyesno("Close Tab", f"Close {self.active_tab_id}? Its conversation will be discarded."):
+            return
+        
+        tab = self.tabs.pop(self.active_tab_id)
+        self._cancel_speculation(tab.tab_id)
+        tab.release()
+        self.active_tab_id = None
+        self.tabview.delete(tab.tab_id)
+        self._on_tab_changed()
+    
+    def _on_tab_changed(self):
+        """Release the widgets of the tab being left and rebuild the one being shown"""
+        selected = self.tabview.get()
+        if selected == self.active_tab_id:
+            return
+        
+        previous = self.active_tab
+        if previous is not None:
+            previous.release()
+        self.active_tab_id = selected
+        if self.active_tab is not None:
+            self.active_tab.attach()
+        self._refresh_suggestions()
+    
     def create_help_panel(self):
         """Create sliding help panel"""
         panel_width = 300  # Back to original width
@@ -587,10 +898,15 @@ class MainWindow(ctk.CTk):
         shortcuts_tab = tabview.add("Shortcuts")
         shortcuts = [
             ("New Chat", "Ctrl + N"),
+            ("New Tab", "Ctrl + T"),
+            ("Close Tab", "Ctrl + W"),
             ("Save Session", "Ctrl + S"),
             ("Load PDF", "Ctrl + O"),
             ("Show/Hide Help", "F1 or Ctrl + H"),
             ("Close Help", "Esc"),
+            ("Show/Hide Stats", "F2"),
+            ("Export Trace", "Ctrl + E"),
+            ("Compare Models", "Ctrl + M"),
             ("Quit", "Ctrl + Q"),
             ("Send Message", "Enter"),
             ("New Line", "Shift + Enter")
@@ -718,34 +1034,46 @@ class MainWindow(ctk.CTk):
         if not file_path:
             return
             
-        threading.Thread(target=self.process_pdf, args=(file_path,), daemon=True).start()
+        self._submit(self.process_pdf(self.active_tab_id, file_path))
     
-    def process_pdf(self, file_path: str):
+    async def process_pdf(self, tab_id: str, file_path: str):
         try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Read PDF
-            pdf_result = loop.run_until_complete(self.document_service.read_pdf(file_path))
+            # Read PDF, reusing pages unchanged since the last version of this statement
+            pdf_result = await self.document_service.read_pdf_incremental(file_path)
             
             if pdf_result['status'] == 'success':
-                self.post_message('chat', sender="System", message=f"PDF loaded: {os.path.basename(file_path)}")
+                pages, changed = len(pdf_result['pages']), len(pdf_result['changed_pages'])
+                note = "" if changed == pages else f" ({changed} of {pages} pages new or changed since the last version)"
+                self.post_message(ChatEvent("System", f"PDF loaded: {os.path.basename(file_path)}{note}", tab=tab_id))
+                # Figures parsed locally are shown right away, before any model call
+                if pdf_result['figures']['rows']:
+                    self.post_message(ChatEvent(
+                        "System", "Extracted figures:\n" + DocumentService.format_figures(pdf_result['figures']),
+                        tab=tab_id
+                    ))
                 
-                # Analyze content
-                analysis = loop.run_until_complete(self.llm_service.analyze_document(pdf_result['content']))
+                # Analyze content; an unchanged statement keeps its previous analysis
+                if pdf_result['summary'] is not None:
+                    analysis = {'status': 'success', 'message': pdf_result['summary']}
+                else:
+                    analysis = await self.llm_service.analyze_pages(
+                        pdf_result['pages'], job=file_path,
+                        figures=DocumentService.figures_for_model(pdf_result['figures'])
+                    )
+                    if analysis['status'] == 'success':
+                        await self.document_service.save_analysis(
+                            pdf_result['source'], file_path, pdf_result['pages'], analysis['notes'], analysis['message']
+                        )
                 
                 if analysis['status'] == 'success':
-                    self.post_message('chat', sender="Assistant", message=analysis['message'])
+                    self.post_message(ChatEvent("Assistant", analysis['message'], tab=tab_id))
                 else:
-                    self.post_message('chat', sender="System", message=f"Error analyzing PDF: {analysis['message']}")
+                    self.post_message(ChatEvent("System", f"Error analyzing PDF: {analysis['message']}", tab=tab_id))
             else:
-                self.post_message('error', message=f"Failed to load PDF: {pdf_result['message']}")
+                self.post_message(NoticeEvent(f"Failed to load PDF: {pdf_result['message']}", tab=tab_id))
                 
         except Exception as e:
-            self.post_message('error', message=f"Error processing PDF: {str(e)}")
-        finally:
-            loop.close()
+            self.post_message(NoticeEvent(f"Error processing PDF: {str(e)}", tab=tab_id))
     
     def handle_save_session(self):
         file_path = filedialog.asksaveasfilename(
@@ -755,46 +1083,46 @@ class MainWindow(ctk.CTk):
         if not file_path:
             return
             
-        threading.Thread(target=self.process_save, args=(file_path,), daemon=True).start()
+        # Snapshot the journal so messages arriving mid-save are not half written
+        self._submit(self.process_save(self.active_tab_id, list(self.session_data), file_path))
     
-    def process_save(self, file_path: str):
+    async def process_save(self, tab_id: str, session_data: List[ChatMessage], file_path: str):
         try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            result = loop.run_until_complete(self.session_service.save_session(self.session_data, file_path))
+            result = await self.session_service.save_session(session_data, file_path)
             
             if result['status'] == 'success':
-                self.post_message('info', message="Session saved successfully!")
+                self.post_message(NoticeEvent("Session saved successfully!", tab=tab_id))
             else:
-                self.post_message('error', message=f"Failed to save session: {result['message']}")
+                self.post_message(NoticeEvent(f"Failed to save session: {result['message']}", tab=tab_id))
                 
         except Exception as e:
-            self.post_message('error', message=f"Error saving session: {str(e)}")
-        finally:
-            loop.close()
+            self.post_message(NoticeEvent(f"Error saving session: {str(e)}", tab=tab_id))
     
     def clear_chat(self):
         """Clear the chat display and start a new session after confirmation"""
         if messagebox.askyesno("New Chat", "Start a new chat? This will clear the current conversation."):
-            self.chat_display.configure(state="normal")
-            self.chat_display.delete("1.0", "end")
-            self.chat_display.configure(state="disabled")
-            self.session_data = []
+            self._cancel_speculation(self.active_tab_id)
+            self.active_tab.clear()
+            self._refresh_suggestions()
             self._add_chat_message("Assistant", "Hi! How would you like to invest your million dollars?")
     
     def get_chat_history(self) -> str:
-        return self.chat_display.get("1.0", "end-1c")
+        return self.active_tab.history()
     
     def on_closing(self):
         """Handle window closing event"""
         try:
             # Stop the message processing thread
             if hasattr(self, '_message_processor') and self._message_processor.is_alive():
-                self.message_queue.put({"type": "exit"})
+                self.message_queue.put(ExitEvent())
                 self._message_processor.join(timeout=1.0)
             
+            # Stop prefetching, comparisons, the shared service loop and the service worker
+            self._cancel_speculation()
+            self._cancel_comparison()
+            self._service_loop.call_soon_threadsafe(self._service_loop.stop)
+            self.service_host.stop()
+            
             # Destroy the window
             self.quit()
         except Exception as e: